@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import perfilador
+
+# Threads que adiantam as figuras das abas fechadas (sem chamadas st.*); o que
+# elas fazem não entra no perfil da execução que as disparou
+_pre_carga = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pre-carga-abas', initializer=perfilador.ignorar_thread)
+
+
+class Aba:
+    """Uma aba que só é calculada quando está aberta.
+
+    `preparar()` calcula as tabelas e figuras da aba sem chamar st.* (as
+    figuras vêm do fabrica_figuras, então ficam em cache); `mostrar(preparado)`
+    desenha a aba com o resultado.
+    """
+
+    def __init__(self, titulo, preparar, mostrar):
+        self.titulo = titulo
+        self.preparar = preparar
+        self.mostrar = mostrar
+
+
+def mostrar_abas(abas, key, pre_carregar=True):
+    """Desenha as abas executando só a aberta; as outras são preparadas numa thread.
+
+    Com on_change='rerun' o st.tabs informa qual aba está aberta (`.open`) e
+    trocar de aba roda a página de novo. As abas fechadas só aquecem o cache
+    das figuras, para a troca ser rápida.
+    """
+    conteineres = st.tabs([aba.titulo for aba in abas], key=key, on_change='rerun')
+    for aba, conteiner in zip(abas, conteineres):
+        if conteiner.open:
+            with conteiner:
+                aba.mostrar(aba.preparar())
+        elif pre_carregar:
+            _pre_carga.submit(aba.preparar)
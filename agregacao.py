@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Até este número de combinações possíveis (ou 4x o número de linhas) a chave
+# combinada indexa direto um vetor denso; acima disso é compactada com np.unique
+LIMITE_DENSO = 1 << 20
+
+
+# Função para transformar uma coluna em códigos inteiros (categóricas já vêm codificadas)
+def _codificar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories, True
+    codigos, valores = pd.factorize(serie, sort=False)
+    return codigos, valores, False
+
+
+def agregar(dados, dimensoes, medidas, dropna=True):
+    """Agrupa por todas as dimensões juntas e calcula todas as medidas numa passada só.
+
+    `dimensoes` é uma lista com nomes de colunas ou pares (nome, Series) para
+    dimensões derivadas (ex.: o mês da compra). `medidas` é um dicionário
+    nome -> (coluna, 'sum' | 'count'). Cada dimensão é codificada uma vez, as
+    chaves são combinadas num único inteiro e cada medida sai de um
+    np.bincount sobre esse inteiro. Retorna um DataFrame com uma linha por
+    combinação observada. Como no groupby, linhas com dimensão nula ficam de
+    fora; com dropna=False o nulo vira mais um valor da dimensão (NaN no resultado).
+    """
+    nomes, codigos, valores, categoricas = [], [], [], []
+    for dimensao in dimensoes:
+        nome, serie = (dimensao, dados[dimensao]) if isinstance(dimensao, str) else dimensao
+        cod, val, cat = _codificar(serie)
+        nomes.append(nome)
+        codigos.append(cod)
+        valores.append(val)
+        categoricas.append(cat)
+
+    validos = np.ones(len(dados), dtype=bool)
+    nulos = [False] * len(codigos)
+    for posicao, (cod, val) in enumerate(zip(codigos, valores)):
+        if dropna:
+            validos &= cod >= 0
+        elif (cod < 0).any():
+            # O nulo ganha o código logo depois do último valor
+            nulos[posicao] = True
+            codigos[posicao] = np.where(cod < 0, len(val), cod)
+
+    # Chave combinada em base mista: código_0 * (n_1 * n_2 ...) + código_1 * (n_2 ...) + ...
+    tamanhos = [max(len(val) + nulo, 1) for val, nulo in zip(valores, nulos)]
+    chave = np.zeros(int(validos.sum()), dtype=np.int64)
+    for cod, tamanho in zip(codigos, tamanhos):
+        chave = chave * tamanho + cod[validos]
+
+    total = int(np.prod(tamanhos, dtype=np.float64))
+    denso = total <= max(LIMITE_DENSO, 4 * len(chave))
+    if denso:
+        grupo, n_grupos = chave, total
+    else:
+        chaves_unicas, grupo = np.unique(chave, return_inverse=True)
+        n_grupos = len(chaves_unicas)
+
+    linhas = np.bincount(grupo, minlength=n_grupos)
+    observados = np.flatnonzero(linhas)
+
+    resultado = {}
+    for nome_medida, (coluna, funcao) in medidas.items():
+        valores_coluna = dados[coluna].to_numpy()[validos]
+        presentes = ~pd.isna(valores_coluna)
+        if funcao == 'count':
+            resultado[nome_medida] = np.bincount(grupo, weights=presentes, minlength=n_grupos)[observados].astype(np.int64)
+        elif funcao == 'sum':
+            pesos = np.where(presentes, valores_coluna, 0).astype(np.float64)
+            resultado[nome_medida] = np.bincount(grupo, weights=pesos, minlength=n_grupos)[observados]
+        else:
+            raise ValueError(f'Função de agregação não suportada: {funcao}')
+
+    # Decodifica a chave combinada de volta para o valor de cada dimensão
+    chave_observada = observados if denso else chaves_unicas[observados]
+    colunas = {}
+    for nome, val, tamanho, cat, nulo in reversed(list(zip(nomes, valores, tamanhos, categoricas, nulos))):
+        chave_observada, cod = np.divmod(chave_observada, tamanho)
+        if nulo:
+            cod = np.where(cod == len(val), -1, cod)
+            colunas[nome] = pd.Categorical.from_codes(cod, categories=val) if cat else val.take(cod, allow_fill=True, fill_value=np.nan)
+        else:
+            colunas[nome] = pd.Categorical.from_codes(cod, categories=val) if cat else val.take(cod)
+    colunas = {nome: colunas[nome] for nome in nomes}
+    colunas.update(resultado)
+    return pd.DataFrame(colunas)
+
+
+def mes_da_data(datas):
+    """Último dia do mês de cada data, como Categorical (pronto para ser dimensão).
+
+    O cálculo de calendário roda só sobre as datas distintas (poucos milhares
+    mesmo com milhões de vendas) e depois é espalhado pelos códigos.
+    """
+    codigos_dia, dias = pd.factorize(datas, sort=False)
+    meses_dia = pd.DatetimeIndex(dias).to_period('M').to_timestamp(how='end').normalize()
+    codigos_mes, meses = pd.factorize(meses_dia, sort=False)
+    codigos = np.where(codigos_dia >= 0, codigos_mes[codigos_dia], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=meses), index=datas.index)
+
+
+def tabela_dimensao(dados, chave, atributos):
+    """Tabela com os atributos de cada valor da chave (ex.: lat/lon de cada estado).
+
+    Usa a primeira ocorrência de cada valor, na ordem em que aparecem nos
+    dados, como o drop_duplicates(subset=chave) que os dashboards faziam.
+    """
+    codigos, _, _ = _codificar(dados[chave])
+    unicos, primeiras = np.unique(codigos, return_index=True)
+    primeiras = np.sort(primeiras[unicos >= 0])
+    return dados[[chave] + list(atributos)].iloc[primeiras].reset_index(drop=True)
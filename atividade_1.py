@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
+from tabela_paginada import mostrar_tabela
 
 np.random.seed(23)  # Garante que os dados gerados sejam reprodutíveis
 
@@ -60,4 +61,4 @@ with coluna2:
     st.metric('Número de Registros', dados.shape[0])
     st.plotly_chart(fig_salario_profissoes, use_container_width=True)
     
-    st.dataframe(dados)
+    mostrar_tabela(dados, 'tabela_pessoas')
@@ -1,12 +1,22 @@
 import streamlit as st
-import requests
+import perfilador
+from carregador_vendas import carregar_vendas
+from planejador_consultas import consultar_visiveis
+from exportacao import FORMATOS, assinatura, preparar_download
+from tabela_paginada import mostrar_tabela
+from notificacoes import exibir_notificacoes, notificar
 import pandas as pd
 import plotly.express as px
-import time
 
 # Configuração da página
 st.set_page_config(layout='wide')
 
+# Avisos deixados pelos callbacks (ex.: confirmação de download)
+exibir_notificacoes()
+
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 # Função para formatar números
 def formata_numero(valor, prefixo=''):
     for unidade in ['', 'mil', 'milhões', 'bilhões']:
@@ -15,25 +25,15 @@ def formata_numero(valor, prefixo=''):
         valor /= 1000
     return f'{prefixo} {valor:.2f} trilhões'
 
-# Função para converter DataFrame em CSV
-@st.cache_data
-def converte_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Função para exibir mensagem de sucesso
+# Função para exibir mensagem de sucesso (toast que some sozinho, sem travar a sessão)
 def mensagem_sucesso():
-    sucesso = st.success('Arquivo baixado com sucesso!', icon="✅")
-    time.sleep(5)
-    sucesso.empty()
+    notificar('Arquivo baixado com sucesso!', icone='✅')
 
 # Página 1: Dados Brutos
 def pagina_dados_brutos():
     st.title('DADOS BRUTOS')
 
-    url = 'https://labdados.com/produtos'
-    response = requests.get(url)
-    dados = pd.DataFrame.from_dict(response.json())
-    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+    dados = carregar_vendas()
 
     with st.expander('Colunas'):
         colunas = st.multiselect('Selecione as colunas', list(dados.columns), list(dados.columns))
@@ -59,37 +59,30 @@ def pagina_dados_brutos():
         "qtd_parcelas": st.sidebar.slider('Quantidade de parcelas', 1, 24, (1, 24))
     }
 
-    query = ' & '.join([
-        "Produto in @filtros['produtos']" if filtros['produtos'] else "Produto == Produto",
-        "`Categoria do Produto` in @filtros['categoria']" if filtros['categoria'] else "`Categoria do Produto` == `Categoria do Produto`",
-        f"{filtros['preco'][0]} <= Preço <= {filtros['preco'][1]}",
-        f"{filtros['frete'][0]} <= Frete <= {filtros['frete'][1]}",
-        f"`Data da Compra` >= @filtros['data_compra'][0] and `Data da Compra` <= @filtros['data_compra'][1]",
-        "Vendedor in @filtros['vendedores']" if filtros['vendedores'] else "Vendedor == Vendedor",
-        "`Local da compra` in @filtros['local_compra']" if filtros['local_compra'] else "`Local da compra` == `Local da compra`",
-        f"{filtros['avaliacao'][0]} <= `Avaliação da compra` <= {filtros['avaliacao'][1]}",
-        "`Tipo de pagamento` in @filtros['tipo_pagamento']" if filtros['tipo_pagamento'] else "`Tipo de pagamento` == `Tipo de pagamento`",
-        f"{filtros['qtd_parcelas'][0]} <= `Quantidade de parcelas` <= {filtros['qtd_parcelas'][1]}"
-    ])
-
-    dados_filtrados = dados.query(query)
-    dados_filtrados = dados_filtrados[colunas]
-
-    st.dataframe(dados_filtrados)
-    st.markdown(f'A tabela possui :blue[{dados_filtrados.shape[0]}] linhas e :blue[{dados_filtrados.shape[1]}] colunas')
+    # Lista vazia quer dizer "sem filtro" nesta página
+    filtros = {nome: (None if isinstance(valor, list) and not valor else valor) for nome, valor in filtros.items()}
+    # Só a página aberta sai do motor de consultas; o download busca todas as linhas no clique
+    resultado = consultar_visiveis(filtros, colunas)
+    chave_dados = assinatura(resultado.versao, filtros, colunas)
+
+    mostrar_tabela(resultado, 'tabela_dados_brutos', chave_dados)
+    st.markdown(f'A tabela possui :blue[{resultado.total}] linhas e :blue[{len(colunas)}] colunas')
 
     # Download CSV
     st.markdown('Escreva um nome para o arquivo')
     coluna1, coluna2 = st.columns(2)
     with coluna1:
-        nome_arquivo = st.text_input('', label_visibility='collapsed', value='dados.csv')
+        nome_arquivo = st.text_input('', label_visibility='collapsed', value='dados')
+        formato = st.selectbox('Formato do arquivo', list(FORMATOS))
+        mime, extensao = FORMATOS[formato]
+        nome_arquivo += extensao
     with coluna2:
-        if not dados_filtrados.empty:
+        if resultado.total > 0 and colunas:
             st.download_button(
-                'Fazer o download da tabela em csv',
-                data=converte_csv(dados_filtrados),
+                f'Fazer o download da tabela em {formato}',
+                data=preparar_download(resultado.tudo, formato, chave_dados),
                 file_name=nome_arquivo,
-                mime='text/csv',
+                mime=mime,
                 on_click=mensagem_sucesso
             )
         else:
@@ -99,7 +92,6 @@ def pagina_dados_brutos():
 def pagina_dashboard():
     st.title('DASHBOARD DE VENDAS :shopping_trolley:')
 
-    url = 'https://labdados.com/produtos'
     regioes = ['Brasil', 'Centro-Oeste', 'Nordeste', 'Norte', 'Sudeste', 'Sul']
 
     st.sidebar.title('Filtros')
@@ -109,10 +101,7 @@ def pagina_dashboard():
     todos_anos = st.sidebar.checkbox('Dados de todo o período', value=True)
     ano = '' if todos_anos else st.sidebar.slider('Ano', 2020, 2023)
 
-    query_string = {'regiao': regiao, 'ano': ano}
-    response = requests.get(url, params=query_string)
-    dados = pd.DataFrame.from_dict(response.json())
-    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+    dados = carregar_vendas(regiao, ano)
 
     st.sidebar.multiselect('Vendedores', dados['Vendedor'].unique())
 
@@ -129,4 +118,6 @@ pagina = st.sidebar.selectbox('Selecione a página', ['Dados Brutos', 'Dashboard
 if pagina == 'Dados Brutos':
     pagina_dados_brutos()
 else:
-    pagina_dashboard()
\ No newline at end of file
+    pagina_dashboard()
+
+perfilador.finalizar()
@@ -0,0 +1,78 @@
+import argparse
+import time
+import warnings
+
+import pandas as pd
+
+from cubo_vendas import CuboVendas
+from gerador_sintetico import gerar
+
+# Benchmark: tabelas do dashboard com o código antigo (seis groupbys + drop_duplicates/merge)
+# contra o cubo montado numa passada só com agregacao.agregar.
+TAMANHOS_PADRAO = [10_000, 1_000_000, 10_000_000]
+
+
+# Vendas sintéticas no formato da API (já tipadas), do gerador_sintetico.py
+def gerar_vendas(linhas, semente=0):
+    return gerar('vendas', linhas, semente)
+
+
+# Mesmas vendas com as colunas de texto como object, como o DataFrame montado do JSON da API
+# (o formato em que o código antigo rodava)
+def formato_api(dados):
+    return dados.astype({coluna: object for coluna in dados.columns if isinstance(dados[coluna].dtype, pd.CategoricalDtype)})
+
+
+# O que o dashboard_9 fazia antes do cubo (expressões copiadas do código original)
+def tabelas_codigo_atual(dados):
+    receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
+    receita_estados = dados.drop_duplicates(subset='Local da compra')[['Local da compra', 'lat', 'lon']].merge(receita_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
+
+    receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].sum().reset_index()
+    receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
+    receita_mensal['Mes'] = receita_mensal['Data da Compra'].dt.month_name()
+
+    receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
+
+    vendas_estados = pd.DataFrame(dados.groupby('Local da compra')['Preço'].count())
+    vendas_estados = dados.drop_duplicates(subset='Local da compra')[['Local da compra', 'lat', 'lon']].merge(vendas_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
+
+    vendas_mensal = pd.DataFrame(dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].count()).reset_index()
+    vendas_mensal['Ano'] = vendas_mensal['Data da Compra'].dt.year
+    vendas_mensal['Mes'] = vendas_mensal['Data da Compra'].dt.month_name()
+
+    vendas_categorias = pd.DataFrame(dados.groupby('Categoria do Produto')['Preço'].count().sort_values(ascending=False))
+
+    vendedores = pd.DataFrame(dados.groupby('Vendedor')['Preço'].agg(['sum', 'count']))
+    return [receita_estados, receita_mensal, receita_categorias, vendas_estados, vendas_mensal, vendas_categorias, vendedores]
+
+
+def tabelas_cubo(dados):
+    cubo = CuboVendas.construir(dados)
+    return [cubo.receita_estados(), cubo.receita_mensal(), cubo.receita_categorias(), cubo.vendas_estados(),
+            cubo.vendas_mensal(), cubo.vendas_categorias(), cubo.vendedores()]
+
+
+def cronometrar(funcao, dados, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(dados)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+if __name__ == '__main__':
+    # O código antigo usa freq='M' (hoje 'ME'); o aviso de depreciação não interessa aqui
+    warnings.filterwarnings('ignore', category=FutureWarning)
+    parser = argparse.ArgumentParser(description='Compara o cálculo das tabelas de vendas')
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"linhas":>12} {"código atual (s)":>18} {"agregacao (s)":>15} {"ganho":>8}')
+    for linhas in args.linhas:
+        dados = gerar_vendas(linhas)
+        atual = cronometrar(tabelas_codigo_atual, formato_api(dados), args.repeticoes)
+        novo = cronometrar(tabelas_cubo, dados, args.repeticoes)
+        print(f'{linhas:>12,} {atual:>18.4f} {novo:>15.4f} {atual / novo:>7.1f}x')
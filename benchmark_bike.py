@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import carregador_bike
+import gerador_sintetico
+
+# Benchmark: carga do Bike_rent.csv como os dashboards faziam (tipos inferidos + to_datetime)
+# contra o carregador tipado e o cache em Parquet, numa versão por hora com vários anos.
+
+
+# Função para gravar uma versão por hora do Bike_rent.csv com `anos` anos (gerador_sintetico.py)
+def gerar_csv_horario(destino, anos, semente=0):
+    return gerador_sintetico.escrever('bike_horario', anos * 365 * 24, destino, semente)
+
+
+def carga_antiga(caminho):
+    df = pd.read_csv(caminho)
+    df['dteday'] = pd.to_datetime(df['dteday'], format='%d-%m-%Y')
+    return df
+
+
+def cronometrar(funcao, caminho, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        dados = funcao(caminho)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), dados.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara a carga do Bike_rent.csv')
+    parser.add_argument('--anos', type=int, nargs='+', default=[2, 10, 40])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        carregador_bike.PASTA_CACHE = pasta
+        print(f'{"anos":>5} {"linhas":>12} {"carga":>14} {"tempo (s)":>10} {"memória (MB)":>13}')
+        for anos in args.anos:
+            caminho = os.path.join(pasta, f'bike_{anos}_anos.csv')
+            linhas = gerar_csv_horario(caminho, anos)
+            carregador_bike.carregar_bike(caminho)  # grava o Parquet
+            for nome, funcao in [('antiga', carga_antiga), ('tipada', carregador_bike.ler_csv), ('parquet', carregador_bike.carregar_bike)]:
+                tempo, memoria = cronometrar(funcao, caminho, args.repeticoes)
+                print(f'{anos:>5} {linhas:>12,} {nome:>14} {tempo:>10.3f} {memoria:>13.1f}')
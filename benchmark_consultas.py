@@ -0,0 +1,86 @@
+import argparse
+import time
+
+import numpy as np
+
+from gerador_sintetico import gerar
+from motor_colunar import MotorColunar
+
+# Benchmark: filtros e agregações com máscaras do pandas contra o DuckDB
+# (motor_colunar.py). Nos dados brutos de vendas o DuckDB só entrega o total e as
+# LINHAS_VISIVEIS primeiras; o pandas monta a tabela filtrada inteira.
+TAMANHOS_PADRAO = [100_000, 1_000_000, 2_000_000]
+
+# Linhas da tabela filtrada que os dois lados entregam além do total
+LINHAS_VISIVEIS = 10_000
+
+PREDICADOS_VENDAS = [('Categoria do Produto', 'lista', ['eletronicos', 'moveis', 'livros']),
+                     ('Avaliação da compra', 'intervalo', (3, 5)),
+                     ('Preço', 'intervalo', (50, 2000))]
+COLUNAS_VENDAS = ['Produto', 'Categoria do Produto', 'Preço', 'Data da Compra', 'Vendedor', 'Local da compra']
+
+PREDICADOS_BIKE = [('weathersit', 'lista', [1, 2]), ('temp', 'intervalo', (5, 30))]
+GRUPOS_BIKE = ['mnth', 'weathersit']
+MEDIDAS_BIKE = {'alugueis': ('cnt', 'sum'), 'media': ('cnt', 'mean')}
+
+
+# Máscara de uma lista de (coluna, tipo, valor), sem o cache do motor_filtros.py (como num widget que mudou)
+def mascara(dados, predicados):
+    resultado = np.ones(len(dados), dtype=bool)
+    for coluna, tipo, valor in predicados:
+        if tipo == 'lista':
+            resultado &= dados[coluna].isin(valor).to_numpy()
+        else:
+            resultado &= dados[coluna].between(*valor).to_numpy()
+    return resultado
+
+
+def vendas_pandas(dados):
+    filtrados = dados.loc[mascara(dados, PREDICADOS_VENDAS), COLUNAS_VENDAS]
+    return len(filtrados), filtrados.iloc[:LINHAS_VISIVEIS]
+
+
+def vendas_duckdb(motor):
+    resultado = motor.consultar('vendas', PREDICADOS_VENDAS, COLUNAS_VENDAS)
+    return resultado.total, resultado.janela(0, LINHAS_VISIVEIS)
+
+
+def bike_pandas(dados):
+    return dados[mascara(dados, PREDICADOS_BIKE)].groupby(GRUPOS_BIKE).agg(**MEDIDAS_BIKE)
+
+
+def bike_duckdb(motor):
+    return motor.agregar('bike', PREDICADOS_BIKE, GRUPOS_BIKE,
+                         {nome: f'{"avg" if funcao == "mean" else funcao}("{coluna}")'
+                          for nome, (coluna, funcao) in MEDIDAS_BIKE.items()})
+
+
+def cronometrar(funcao, argumento, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(argumento)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara as consultas com pandas e com DuckDB')
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"consulta":>10} {"linhas":>12} {"pandas (s)":>12} {"duckdb (s)":>12} {"ganho":>8}')
+    for linhas in args.linhas:
+        vendas, bike = gerar('vendas', linhas), gerar('bike_horario', linhas)
+        motor = MotorColunar()
+        motor.registrar('vendas', vendas)
+        motor.registrar('bike', bike)
+        # As duas formas têm de concordar antes de medir
+        assert vendas_pandas(vendas)[0] == vendas_duckdb(motor)[0]
+        assert (bike_pandas(bike)['alugueis'].to_numpy() == bike_duckdb(motor)['alugueis'].to_numpy()).all()
+        for nome, com_pandas, com_duckdb, dados in (('vendas', vendas_pandas, vendas_duckdb, vendas),
+                                                    ('bike', bike_pandas, bike_duckdb, bike)):
+            antes = cronometrar(com_pandas, dados, args.repeticoes)
+            depois = cronometrar(com_duckdb, motor, args.repeticoes)
+            print(f'{nome:>10} {linhas:>12,} {antes:>12.4f} {depois:>12.4f} {antes / depois:>7.1f}x')
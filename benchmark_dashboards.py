@@ -0,0 +1,162 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import carregador_bike
+import carregador_vendas
+import gerador_sintetico
+import perfilador
+import servidor_local
+import snapshot_vendas
+from perfilador import ETAPAS, Medidor
+
+# Benchmark dos dashboards sem navegador: cada script roda no AppTest do Streamlit
+# contra o servidor_local.py (vendas) ou um CSV gerado (bicicletas), e as etapas do
+# perfilador.py (carga, filtro, agregação, figuras, render...) medem tempo e pico de memória.
+PASTA = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_BASE = os.path.join(PASTA, 'base_dashboards.json')
+TAMANHOS_PADRAO = [10_000, 100_000]
+
+# Cenário -> (script, página escolhida no menu lateral ou None para a inicial, dados)
+CENARIOS = {
+    'dashboard_9/dados_brutos': ('dashboard_9.py', None, 'vendas'),
+    'dashboard_9/dashboard': ('dashboard_9.py', 'Dashboard', 'vendas'),
+    'atividade_3/dados_brutos': ('atividade_3.py', None, 'vendas'),
+    'dashbike': ('dashbike.py', None, 'bike_diario'),
+}
+
+# Diferença mínima (s) para uma etapa mais lenta contar como regressão
+RUIDO_SEGUNDOS = 0.01
+
+
+def executar(cenario, medidor):
+    """Roda o cenário duas vezes: a primeira sem caches (fria) e um rerun (quente)."""
+    script, pagina, _ = CENARIOS[cenario]
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    carregador_vendas.limpar_cache()
+    if os.path.exists(snapshot_vendas.ARQUIVO_SNAPSHOT):
+        os.remove(snapshot_vendas.ARQUIVO_SNAPSHOT)
+
+    app = AppTest.from_file(os.path.join(PASTA, script), default_timeout=600)
+    resultados = {}
+    for execucao in ['fria', 'quente']:
+        if execucao == 'fria' and pagina is not None:
+            app.run()
+            app.sidebar.selectbox[0].select(pagina)
+        medidor.coletar()
+        inicio = time.perf_counter()
+        app.run()
+        total = time.perf_counter() - inicio
+        if app.exception:
+            raise RuntimeError(f'{cenario}: {app.exception[0].value}')
+        resultados[execucao] = {'total_segundos': total, 'etapas': medidor.coletar()}
+    return resultados
+
+
+def medir(cenarios, tamanhos, semente=0):
+    """Resultados por chave 'cenario|linhas|execucao'."""
+    resultados = {}
+    medidor = Medidor()
+    diretorio_original = os.getcwd()
+    pasta_temporaria = tempfile.TemporaryDirectory()
+    # O snapshot de vendas do benchmark fica na pasta temporária: o do usuário não é tocado
+    url_original, pasta_cache_bike = carregador_vendas.URL, carregador_bike.PASTA_CACHE
+    snapshot_original = snapshot_vendas.ARQUIVO_SNAPSHOT
+    snapshot_vendas.ARQUIVO_SNAPSHOT = os.path.join(pasta_temporaria.name, 'produtos.parquet')
+
+    os.chdir(PASTA)
+    tracemalloc.start()
+    perfilador.medir_processo(medidor)
+    carregar_bike = carregador_bike.carregar_bike
+    try:
+        for linhas in tamanhos:
+            vendas = os.path.join(pasta_temporaria.name, f'vendas_{linhas}.parquet')
+            gerador_sintetico.escrever('vendas', linhas, vendas, semente)
+            servidor, url = servidor_local.iniciar_servidor(fixture=vendas)
+            carregador_vendas.URL = snapshot_vendas.URL = url
+
+            bike = os.path.join(pasta_temporaria.name, f'bike_{linhas}.csv')
+            gerador_sintetico.escrever('bike_diario', linhas, bike, semente)
+            carregador_bike.PASTA_CACHE = pasta_temporaria.name
+            carregador_bike.carregar_bike = functools.partial(carregar_bike, bike)
+            try:
+                for cenario in cenarios:
+                    for execucao, resultado in executar(cenario, medidor).items():
+                        resultados[f'{cenario}|{linhas}|{execucao}'] = resultado
+                        print(f'{cenario:<26} {linhas:>10,} {execucao:<6} {resultado["total_segundos"]:>8.3f} s', file=sys.stderr)
+            finally:
+                servidor.shutdown()
+                servidor.server_close()
+    finally:
+        perfilador.medir_processo(None)
+        carregador_bike.carregar_bike = carregar_bike
+        tracemalloc.stop()
+        os.chdir(diretorio_original)
+        carregador_vendas.URL = snapshot_vendas.URL = url_original
+        carregador_bike.PASTA_CACHE = pasta_cache_bike
+        snapshot_vendas.ARQUIVO_SNAPSHOT = snapshot_original
+        pasta_temporaria.cleanup()
+    return resultados
+
+
+def imprimir(resultados):
+    etapas = list(ETAPAS)
+    print(f'{"cenário":<26} {"linhas":>10} {"exec.":<6} {"total (s)":>9} ' + ' '.join(f'{etapa:>17}' for etapa in etapas))
+    for chave, resultado in resultados.items():
+        cenario, linhas, execucao = chave.split('|')
+        colunas = []
+        for etapa in etapas:
+            medida = resultado['etapas'].get(etapa)
+            colunas.append(f'{medida["segundos"]:>7.3f}s {medida["pico_mb"]:>6.1f}MB' if medida else f'{"-":>17}')
+        print(f'{cenario:<26} {int(linhas):>10,} {execucao:<6} {resultado["total_segundos"]:>9.3f} ' + ' '.join(colunas))
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista das etapas (e totais) que ficaram mais de `tolerancia` vezes mais lentas que a base."""
+    regressoes = []
+    for chave, resultado in resultados.items():
+        anterior = base.get(chave)
+        if anterior is None:
+            continue
+        medidas = [('total', resultado['total_segundos'], anterior['total_segundos'])]
+        medidas += [(etapa, medida['segundos'], anterior['etapas'][etapa]['segundos'])
+                    for etapa, medida in resultado['etapas'].items() if etapa in anterior['etapas']]
+        for etapa, atual, antes in medidas:
+            if atual > antes * tolerancia and atual - antes > RUIDO_SEGUNDOS:
+                regressoes.append(f'{chave} {etapa}: {antes:.3f}s -> {atual:.3f}s')
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tempo e memória por etapa dos dashboards, sem navegador')
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--base', default=ARQUIVO_BASE, help='arquivo JSON com a linha de base')
+    parser.add_argument('--salvar-base', action='store_true', help='grava os resultados como nova linha de base')
+    parser.add_argument('--tolerancia', type=float, default=1.5, help='quanto mais lento que a base conta como regressão')
+    args = parser.parse_args()
+
+    resultados = medir(args.cenarios, args.linhas)
+    imprimir(resultados)
+
+    if args.salvar_base:
+        with open(args.base, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+        print(f'Linha de base gravada em {args.base}')
+    elif os.path.exists(args.base):
+        with open(args.base, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.tolerancia)
+        for regressao in regressoes:
+            print(f'REGRESSÃO {regressao}')
+        if regressoes:
+            sys.exit(1)
+        print('Sem regressões em relação à linha de base')
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+import gerador_sintetico
+import servidor_local
+
+# Teste de carga do caminho de download com a página de verdade: um `streamlit run
+# dashboard_9.py` (vendas do servidor_local.py, snapshot numa pasta temporária) e
+# várias sessões ao mesmo tempo, cada uma numa thread, falando com o servidor pelo
+# mesmo protocolo do navegador. Em cada download a sessão pede o arquivo do
+# st.download_button (o servidor roda a função adiada), baixa a URL devolvida e
+# manda o clique, que roda o callback on_click e o rerun da página. Compara o
+# callback antigo (st.success + time.sleep + empty) com o aviso na fila da sessão
+# (notificacoes.py) pela vazão de downloads com todas as sessões ativas.
+PASTA = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(PASTA, 'dashboard_9.py')
+
+# Callback que o dashboard_9.py usava antes do notificacoes.py
+CALLBACK_ANTIGO = '''def mensagem_sucesso():
+    sucesso = st.success('Arquivo baixado com sucesso!', icon="✅")
+    time.sleep({espera})
+    sucesso.empty()
+'''
+
+
+def codigo_pagina(callback, espera):
+    """Código do dashboard_9.py com o callback de download atual ou o antigo."""
+    with open(SCRIPT, encoding='utf-8') as arquivo:
+        codigo = arquivo.read()
+    if callback == 'antigo':
+        codigo = re.sub(r'def mensagem_sucesso\(\):\r?\n(?:    .*\r?\n)+', CALLBACK_ANTIGO.format(espera=espera), codigo)
+        codigo = 'import time\n' + codigo
+    return codigo
+
+
+def porta_livre():
+    with socket.socket() as conexao:
+        conexao.bind(('127.0.0.1', 0))
+        return conexao.getsockname()[1]
+
+
+def iniciar_streamlit(script, url_api, snapshot, timeout=120):
+    """Sobe `streamlit run script` numa porta livre; devolve (processo, endereço http)."""
+    porta = porta_livre()
+    ambiente = dict(os.environ, LABDADOS_URL=url_api, SNAPSHOT_VENDAS=snapshot,
+                    PYTHONPATH=os.pathsep.join(filter(None, [PASTA, os.environ.get('PYTHONPATH')])))
+    processo = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', script, '--server.headless', 'true',
+                                 '--server.port', str(porta), '--browser.gatherUsageStats', 'false'],
+                                cwd=PASTA, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    endereco = f'http://127.0.0.1:{porta}'
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(f'{endereco}/_stcore/health', timeout=1).read()
+            return processo, endereco
+        except OSError:
+            if processo.poll() is not None:
+                raise RuntimeError(f'streamlit run {script} terminou com código {processo.returncode}')
+            time.sleep(0.2)
+    processo.kill()
+    raise TimeoutError(f'streamlit run {script} não respondeu em {timeout} s')
+
+
+async def _rodar(conexao, estado):
+    """Pede um rerun com `estado` e lê até o fim da execução; devolve (botão de download, id da sessão).
+
+    O id só vem na primeira execução da sessão (nas outras sai '').
+    """
+    pedido = BackMsg()
+    pedido.rerun_script.CopyFrom(estado)
+    await conexao.send(pedido.SerializeToString())
+    botao, id_sessao = None, ''
+    while True:
+        mensagem = ForwardMsg.FromString(await conexao.recv())
+        tipo = mensagem.WhichOneof('type')
+        if tipo == 'new_session':
+            id_sessao = id_sessao or mensagem.new_session.initialize.session_id
+        elif tipo == 'delta' and mensagem.delta.WhichOneof('type') == 'new_element' \
+                and mensagem.delta.new_element.WhichOneof('type') == 'download_button':
+            botao = mensagem.delta.new_element.download_button
+        elif tipo == 'script_finished':
+            if botao is None:
+                raise RuntimeError('A página terminou sem botão de download')
+            return botao, id_sessao
+
+
+async def _baixar(conexao, endereco, id_sessao, botao):
+    """Pede o arquivo adiado do botão (como o navegador no clique) e baixa a URL devolvida; devolve os bytes."""
+    pedido = BackMsg()
+    pedido.backend_operation_request.request_id = uuid.uuid4().hex
+    pedido.backend_operation_request.session_id = id_sessao
+    pedido.backend_operation_request.deferred_file.file_id = botao.deferred_file_id
+    await conexao.send(pedido.SerializeToString())
+    while True:
+        mensagem = ForwardMsg.FromString(await conexao.recv())
+        if mensagem.WhichOneof('type') != 'backend_operation_response':
+            continue
+        resposta = mensagem.backend_operation_response
+        if resposta.request_id != pedido.backend_operation_request.request_id:
+            continue
+        if resposta.error_msg:
+            raise RuntimeError(resposta.error_msg)
+        url = urllib.parse.urljoin(endereco + '/', resposta.deferred_file.url)
+        return len(await asyncio.to_thread(lambda: urllib.request.urlopen(url).read()))
+
+
+async def _sessao(endereco, downloads, barreira):
+    """Uma sessão do navegador: carrega a página, espera as outras e faz `downloads` downloads."""
+    ws = endereco.replace('http://', 'ws://') + '/_stcore/stream'
+    async with websockets.connect(ws, subprotocols=['streamlit'], max_size=None) as conexao:
+        try:
+            botao, id_sessao = await _rodar(conexao, ClientState())
+        except BaseException:
+            # Sem isso as outras sessões esperariam por esta na barreira para sempre
+            barreira.abort()
+            raise
+        await asyncio.to_thread(barreira.wait)
+        tempos, tamanho = [], 0
+        for _ in range(downloads):
+            inicio = time.perf_counter()
+            tamanho = await _baixar(conexao, endereco, id_sessao, botao)
+            clique = ClientState()
+            estado = clique.widget_states.widgets.add()
+            estado.id, estado.trigger_value = botao.id, True
+            botao, _ = await _rodar(conexao, clique)
+            tempos.append(time.perf_counter() - inicio)
+        return tempos, tamanho
+
+
+def simular(endereco, sessoes, downloads):
+    """`sessoes` sessões simultâneas; devolve (tempos por download, segundos do início ao fim dos downloads, bytes do arquivo)."""
+    instantes = {}
+    barreira = threading.Barrier(sessoes, action=lambda: instantes.setdefault('inicio', time.perf_counter()))
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        futuros = [executor.submit(asyncio.run, _sessao(endereco, downloads, barreira)) for _ in range(sessoes)]
+        resultados = [futuro.result() for futuro in futuros]
+    total = time.perf_counter() - instantes['inicio']
+    return [tempo for tempos, _ in resultados for tempo in tempos], total, resultados[0][1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Downloads simultâneos no dashboard_9 com o aviso antigo e o novo')
+    parser.add_argument('--sessoes', type=int, default=5)
+    parser.add_argument('--downloads', type=int, default=3, help='downloads por sessão')
+    parser.add_argument('--espera', type=float, default=5.0, help='time.sleep do callback antigo (s)')
+    parser.add_argument('--linhas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        vendas = os.path.join(pasta_temporaria, 'vendas.parquet')
+        gerador_sintetico.escrever('vendas', args.linhas, vendas)
+        servidor, url_api = servidor_local.iniciar_servidor(fixture=vendas)
+        try:
+            print(f'{args.sessoes} sessões simultâneas x {args.downloads} downloads, {args.linhas:,} linhas')
+            print(f'{"callback":>10} {"download médio (s)":>19} {"p95 (s)":>8} {"vazão (downloads/s)":>20} '
+                  f'{"MB/s":>7} {"total (s)":>10}')
+            for callback in ['antigo', 'novo']:
+                # Cada lado tem o próprio servidor (caches vazios) e o próprio snapshot temporário
+                script = os.path.join(pasta_temporaria, f'dashboard_9_{callback}.py')
+                with open(script, 'w', encoding='utf-8') as arquivo:
+                    arquivo.write(codigo_pagina(callback, args.espera))
+                snapshot = os.path.join(pasta_temporaria, f'produtos_{callback}.parquet')
+                processo, endereco = iniciar_streamlit(script, url_api, snapshot)
+                try:
+                    tempos, total, tamanho = simular(endereco, args.sessoes, args.downloads)
+                finally:
+                    processo.terminate()
+                    processo.wait()
+                p95 = statistics.quantiles(tempos, n=20)[-1] if len(tempos) > 1 else tempos[0]
+                print(f'{callback:>10} {statistics.mean(tempos):>19.3f} {p95:>8.3f} {len(tempos) / total:>20.2f} '
+                      f'{len(tempos) * tamanho / 1024 ** 2 / total:>7.1f} {total:>10.2f}')
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
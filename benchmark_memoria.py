@@ -0,0 +1,54 @@
+import argparse
+import tracemalloc
+
+from exportacao import exportar
+from gerador_sintetico import gerar
+from motor_filtros import MotorFiltros
+from tabela_paginada import TAMANHO_PAGINA
+
+# Benchmark: pico de memória de uma interação da página de dados brutos (filtrar,
+# escolher colunas, mostrar uma página e exportar) com as cópias de antes
+# (tabela filtrada e depois a projeção) contra a Visao do motor_filtros.py.
+# O arquivo exportado entra nas duas medidas; o tracemalloc conta as alocações
+# do NumPy e do pandas.
+TAMANHOS_PADRAO = [100_000, 1_000_000]
+
+PREDICADOS = [('Avaliação da compra', 'intervalo', (2, 5)), ('Quantidade de parcelas', 'intervalo', (1, 12))]
+COLUNAS = ['Produto', 'Categoria do Produto', 'Preço', 'Frete', 'Data da Compra', 'Vendedor', 'Local da compra']
+
+
+def com_copias(dados, formato):
+    filtrados = MotorFiltros(dados).filtrar(PREDICADOS)[COLUNAS]
+    filtrados.iloc[:TAMANHO_PAGINA]
+    return exportar(filtrados, formato).getbuffer().nbytes
+
+
+def com_visao(dados, formato):
+    visao = MotorFiltros(dados).visao(PREDICADOS).projetar(COLUNAS)
+    visao.fatiar(0, TAMANHO_PAGINA)
+    return exportar(visao, formato).getbuffer().nbytes
+
+
+def pico(funcao, dados, formato):
+    """(pico de memória em MB acima do que já estava alocado, tamanho do arquivo)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    tamanho = funcao(dados, formato)
+    _, maximo = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return maximo / 1024 ** 2, tamanho
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pico de memória da página de dados brutos com e sem a Visao')
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--formato', default='csv')
+    args = parser.parse_args()
+
+    print(f'{"linhas":>12} {"cópias (MB)":>12} {"visão (MB)":>12} {"arquivo (MB)":>13}')
+    for linhas in args.linhas:
+        dados = gerar('vendas', linhas)
+        antes, arquivo = pico(com_copias, dados, args.formato)
+        depois, arquivo_visao = pico(com_visao, dados, args.formato)
+        assert arquivo == arquivo_visao
+        print(f'{linhas:>12,} {antes:>12.1f} {depois:>12.1f} {arquivo / 1024 ** 2:>13.1f}')
@@ -0,0 +1,109 @@
+import io
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+# Todos os caches criados no processo, por nome (lidos pela página de administração)
+_caches = {}
+_trava_registro = threading.Lock()
+
+
+# Função para estimar quanto um valor ocupa em memória
+def tamanho(valor):
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return len(valor)
+    if isinstance(valor, io.BytesIO):
+        with valor.getbuffer() as conteudo:
+            return conteudo.nbytes
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, BaseFigure):
+        return len(valor.to_json())
+    return sys.getsizeof(valor)
+
+
+class CacheLimitado:
+    """Cache LRU com limite em bytes, compartilhado entre as sessões do processo.
+
+    Cada entrada guarda o próprio tamanho; ao passar do limite as menos usadas
+    recentemente saem primeiro. Um valor maior que o limite inteiro é
+    devolvido mas não é guardado. Os contadores de acertos, falhas e remoções
+    aparecem na página de administração do dashboard_9.
+    """
+
+    def __init__(self, nome, max_bytes):
+        self.nome = nome
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self._contadores = {'acertos': 0, 'falhas': 0, 'remocoes': 0, 'rejeitados': 0}
+        with _trava_registro:
+            _caches[nome] = self
+
+    def get(self, chave, padrao=None):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._contadores['falhas'] += 1
+                return padrao
+            self._entradas.move_to_end(chave)
+            self._contadores['acertos'] += 1
+            return entrada[0]
+
+    def put(self, chave, valor):
+        tamanho_valor = tamanho(valor)
+        with self._trava:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            if tamanho_valor > self.max_bytes:
+                self._contadores['rejeitados'] += 1
+                return
+            self._entradas[chave] = (valor, tamanho_valor)
+            self._bytes += tamanho_valor
+            while self._bytes > self.max_bytes:
+                _, (_, tamanho_removido) = self._entradas.popitem(last=False)
+                self._bytes -= tamanho_removido
+                self._contadores['remocoes'] += 1
+
+    def obter(self, chave, calcular):
+        """Valor da chave; na falta, `calcular()` é chamado (fora da trava) e o resultado guardado."""
+        valor = self.get(chave)
+        if valor is None:
+            valor = calcular()
+            self.put(chave, valor)
+        return valor
+
+    def estatisticas(self):
+        with self._trava:
+            return dict(self._contadores, entradas=len(self._entradas), bytes=self._bytes, max_bytes=self.max_bytes)
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+            for nome in self._contadores:
+                self._contadores[nome] = 0
+
+
+def estatisticas_caches():
+    """Tabela com as estatísticas de todos os caches limitados do processo."""
+    with _trava_registro:
+        caches = list(_caches.values())
+    return pd.DataFrame({cache.nome: cache.estatisticas() for cache in caches}).T
+
+
+def limpar_caches():
+    with _trava_registro:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.limpar()
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import re
+
+import pandas as pd
+
+# Arquivos e cache ao lado do módulo, seja qual for a pasta de onde o Streamlit é chamado
+PASTA = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_CSV = os.path.join(PASTA, 'Bike_rent.csv')
+ARQUIVO_DICIONARIO = os.path.join(PASTA, 'Dicionário de Dados [Bike_rent].txt')
+PASTA_CACHE = os.path.join(PASTA, 'snapshots')
+
+# Formato de 'dteday' no CSV (dia-mês-ano)
+FORMATO_DATA = '%d-%m-%Y'
+
+# Tipo de cada coluna do dicionário de dados: códigos pequenos em int8, contagens em int32
+TIPOS = {
+    'dteday': 'datetime64[ns]',
+    'season': 'int8',
+    'yr': 'int8',
+    'mnth': 'int8',
+    'holiday': 'int8',
+    'weekday': 'int8',
+    'workingday': 'int8',
+    'weathersit': 'int8',
+    'temp': 'float32',
+    'atemp': 'float32',
+    'hum': 'float32',
+    'windspeed': 'float32',
+    'casual': 'int32',
+    'registered': 'int32',
+    'cnt': 'int32',
+}
+# Colunas que existem no arquivo mas não no dicionário ('hr' só na versão por hora)
+TIPOS_EXTRAS = {'instant': 'int32', 'hr': 'int8'}
+
+
+def ler_dicionario(caminho=ARQUIVO_DICIONARIO):
+    """Colunas descritas no dicionário de dados: nome -> descrição."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        texto = arquivo.read()
+    bloco = texto.split('Colunas:', 1)[1].split('---', 1)[0]
+    return dict(re.findall(r'^\s*(\w+)\s*:\s*(.+?)\s*$', bloco, flags=re.MULTILINE))
+
+
+def esquema(caminho_dicionario=ARQUIVO_DICIONARIO):
+    """Tipos das colunas, conferidos contra o dicionário de dados."""
+    sem_tipo = set(ler_dicionario(caminho_dicionario)) - set(TIPOS)
+    if sem_tipo:
+        raise ValueError(f'Colunas do dicionário sem tipo definido: {sorted(sem_tipo)}')
+    return dict(TIPOS, **TIPOS_EXTRAS)
+
+
+def ler_csv(caminho=ARQUIVO_CSV):
+    """Lê o CSV já com os tipos estreitos e a data convertida pelo próprio leitor."""
+    tipos = esquema()
+    colunas = pd.read_csv(caminho, nrows=0).columns
+    datas = [coluna for coluna in colunas if tipos.get(coluna, '').startswith('datetime')]
+    numericos = {coluna: tipos[coluna] for coluna in colunas if coluna in tipos and coluna not in datas}
+    # O leitor do pyarrow converte tipos e datas em paralelo, sem passar por objetos Python
+    dados = pd.read_csv(caminho, dtype=numericos, parse_dates=datas, date_format=FORMATO_DATA, engine='pyarrow')
+    return dados.astype({coluna: 'datetime64[ns]' for coluna in datas})
+
+
+def caminho_cache(caminho=ARQUIVO_CSV):
+    """Parquet de `caminho` em PASTA_CACHE; o hash do caminho absoluto separa CSVs de mesmo nome em pastas diferentes."""
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    origem = hashlib.sha1(os.path.abspath(caminho).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(PASTA_CACHE, f'{nome}-{origem}.parquet')
+
+
+def carregar_bike(caminho=ARQUIVO_CSV, usar_cache=True):
+    """Dados de aluguel de bicicletas tipados.
+
+    Na primeira leitura o CSV é convertido e gravado em Parquet na pasta
+    snapshots/; as próximas leem o Parquet enquanto ele for mais novo que o
+    CSV, sem interpretar texto nem datas de novo.
+    """
+    cache = caminho_cache(caminho)
+    if usar_cache and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(caminho):
+        return pd.read_parquet(cache, memory_map=True)
+
+    dados = ler_csv(caminho)
+    if usar_cache:
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        temporario = cache + '.tmp'
+        dados.to_parquet(temporario, index=False)
+        os.replace(temporario, cache)
+    return dados
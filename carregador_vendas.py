@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import requests
+
+import snapshot_vendas
+
+# Endereço da API de produtos (LABDADOS_URL aponta para o servidor_local.py, por exemplo)
+URL = os.environ.get('LABDADOS_URL', 'https://labdados.com/produtos')
+
+# Tempo (em segundos) que um resultado fica "fresco" no cache
+TTL_PADRAO = 300
+
+# Cache compartilhado por todo o processo: (regiao, ano, vendedores) -> (instante da carga, DataFrame)
+_cache = {}
+_atualizando = set()
+_trava = threading.Lock()
+
+_contadores = {'acertos': 0, 'falhas': 0, 'atualizacoes': 0, 'erros_atualizacao': 0}
+
+
+# Função para normalizar a chave do cache (mesmo formato da query string da API)
+def _chave(regiao='', ano='', vendedores=None):
+    regiao = '' if regiao in (None, 'Brasil') else str(regiao).lower()
+    ano = '' if ano in (None, '') else str(ano)
+    vendedores = tuple(sorted(vendedores)) if vendedores else ()
+    return regiao, ano, vendedores
+
+
+# Função que faz a requisição e já entrega as datas convertidas
+def _baixar(regiao, ano, vendedores=()):
+    parametros = {'regiao': regiao, 'ano': ano}
+    if vendedores:
+        parametros['vendedor'] = ','.join(vendedores)
+    response = requests.get(URL, params=parametros, timeout=30)
+    response.raise_for_status()
+    return snapshot_vendas.tipar(pd.DataFrame.from_dict(response.json()))
+
+
+# Função que decide a origem dos dados: snapshot local (Parquet) quando existir, senão a API
+def _obter(regiao, ano, vendedores=(), atualizar=False, ttl=TTL_PADRAO):
+    if snapshot_vendas.existe_snapshot():
+        if atualizar:
+            # Um snapshot para todas as chaves: a primeira chave vencida atualiza, as outras reaproveitam
+            snapshot_vendas.atualizar_snapshot(idade_maxima=ttl)
+        return snapshot_vendas.filtrar(snapshot_vendas.ler_snapshot(), regiao, ano, vendedores)
+
+    dados = _baixar(regiao, ano, vendedores)
+    if not regiao and not ano and not vendedores:
+        snapshot_vendas.salvar_snapshot(dados)
+    return dados
+
+
+# Atualização em segundo plano (stale-while-revalidate)
+def _atualizar(chave, ttl):
+    try:
+        dados = _obter(*chave, atualizar=True, ttl=ttl)
+        with _trava:
+            _cache[chave] = (time.monotonic(), dados)
+            _contadores['atualizacoes'] += 1
+    except Exception:
+        with _trava:
+            _contadores['erros_atualizacao'] += 1
+    finally:
+        with _trava:
+            _atualizando.discard(chave)
+
+
+def carregar_vendas(regiao='', ano='', vendedores=None, ttl=TTL_PADRAO):
+    """Retorna os dados de vendas de (regiao, ano) usando o cache do processo.
+
+    `vendedores` só deve ser passado quando o servidor aceita o filtro de
+    vendedor na query string (veja planejador_consultas.py).
+
+    Dentro do TTL o DataFrame em memória é devolvido direto. Depois do TTL a
+    cópia antiga continua sendo devolvida enquanto uma thread busca a nova
+    versão. Se existir o snapshot local (snapshot_vendas.py) ele é a origem dos
+    dados e a atualização só acrescenta as compras novas, então a página
+    funciona sem rede. O DataFrame devolvido é compartilhado: não altere ele
+    no lugar.
+    """
+    chave = _chave(regiao, ano, vendedores)
+    agora = time.monotonic()
+
+    with _trava:
+        entrada = _cache.get(chave)
+        if entrada is not None:
+            _contadores['acertos'] += 1
+            instante, dados = entrada
+            if agora - instante > ttl and chave not in _atualizando:
+                _atualizando.add(chave)
+                threading.Thread(target=_atualizar, args=(chave, ttl), daemon=True).start()
+            return dados
+        _contadores['falhas'] += 1
+
+    dados = _obter(*chave)
+    with _trava:
+        _cache[chave] = (time.monotonic(), dados)
+    return dados
+
+
+def estatisticas_cache():
+    """Contadores de acertos/falhas do cache e quantidade de entradas."""
+    with _trava:
+        return dict(_contadores, entradas=len(_cache))
+
+
+def limpar_cache():
+    with _trava:
+        _cache.clear()
+        for nome in _contadores:
+            _contadores[nome] = 0
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_limitado import CacheLimitado
+
+# Cenários "e se" da demanda de bicicletas: uma grade de valores de temperatura,
+# umidade, vento, clima e feriado é avaliada de uma vez pelo modelo da
+# previsao_demanda.py (uma multiplicação de matrizes para a grade toda). O
+# resultado fica guardado por (versão do modelo, dia, grade), então trocar o
+# corte mostrado no mapa não avalia nada de novo.
+COLUNAS = ['temp', 'hum', 'windspeed', 'weathersit', 'holiday']
+
+# Grade padrão (todas as combinações destes valores)
+TEMPERATURAS = tuple(range(-5, 41))
+UMIDADES = tuple(range(0, 101, 5))
+VENTOS = (5, 15, 25, 35)
+CLIMAS = (1, 2, 3, 4)
+FERIADOS = (0, 1)
+
+# Memória máxima (em bytes) para as grades avaliadas
+MAX_BYTES = int(os.environ.get('CENARIOS_MAX_BYTES', 32 * 1024 * 1024))
+
+_cache = CacheLimitado('cenarios', MAX_BYTES)
+
+
+def grade(temperaturas=TEMPERATURAS, umidades=UMIDADES, ventos=VENTOS, climas=CLIMAS, feriados=FERIADOS):
+    """DataFrame com todas as combinações dos valores (uma linha por cenário)."""
+    eixos = np.meshgrid(np.asarray(temperaturas, dtype='float64'), np.asarray(umidades, dtype='float64'),
+                        np.asarray(ventos, dtype='float64'), np.asarray(climas), np.asarray(feriados), indexing='ij')
+    return pd.DataFrame({coluna: eixo.ravel() for coluna, eixo in zip(COLUNAS, eixos)})
+
+
+def pontuar(modelo, cenarios, dia=None):
+    """Aluguéis previstos para cada linha de `cenarios` (colunas COLUNAS e, opcionalmente, dteday).
+
+    Sem dteday, todos os cenários são no `dia` informado (por padrão o dia
+    seguinte ao último do treino).
+    """
+    if 'dteday' not in cenarios:
+        dia = pd.Timestamp(dia) if dia is not None else modelo.ultimo_dia + pd.Timedelta(days=1)
+        cenarios = cenarios.assign(dteday=dia)
+    return np.maximum(modelo.prever(cenarios), 0)
+
+
+def avaliar_grade(modelo, dia=None, temperaturas=TEMPERATURAS, umidades=UMIDADES, ventos=VENTOS, climas=CLIMAS,
+                  feriados=FERIADOS):
+    """A grade com a coluna 'previsao', guardada por versão do modelo, dia e valores da grade."""
+    dia = pd.Timestamp(dia) if dia is not None else modelo.ultimo_dia + pd.Timedelta(days=1)
+    valores = tuple(tuple(eixo) for eixo in (temperaturas, umidades, ventos, climas, feriados))
+    chave = (modelo.versao, modelo.regularizacao, dia, valores)
+
+    def calcular():
+        cenarios = grade(*valores)
+        cenarios['previsao'] = pontuar(modelo, cenarios, dia)
+        return cenarios
+
+    return _cache.obter(chave, calcular)
+
+
+def mapa(avaliada, vento, clima, feriado, x='temp', y='hum'):
+    """Tabela y x x das previsões de um corte da grade (para o mapa de calor)."""
+    corte = avaliada[(avaliada['windspeed'] == vento) & (avaliada['weathersit'] == clima) & (avaliada['holiday'] == feriado)]
+    return corte.pivot(index=y, columns=x, values='previsao')
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from agregacao import agregar, mes_da_data, tabela_dimensao
+from indice_datas import obter_indice
+from versao_dados import por_dataframe
+
+# Dimensões do cubo; 'Mes' é o último dia do mês da compra (igual ao pd.Grouper(freq='M'))
+DIMENSOES = ['Local da compra', 'Mes', 'Categoria do Produto', 'Vendedor']
+
+
+class CuboVendas:
+    """Cubo (estado, mês, categoria, vendedor) -> (soma Preço, quantidade, soma Frete).
+
+    Todas as tabelas dos dashboards de vendas saem de somas sobre o cubo, que
+    tem no máximo estados x meses x categorias x vendedores linhas, não importa
+    quantas vendas existam. Vendas com alguma dimensão nula ficam no cubo com
+    NaN nessa dimensão: cada tabela deixa de fora só as vendas com a sua
+    própria dimensão nula, como o groupby dos dashboards sobre os dados. A
+    quantidade total conta linhas (a do cubo conta preços), então os totais
+    vêm dos dados: `totais` é (receita, linhas) e `por_vendedor` tem as mesmas
+    somas por vendedor, para o filtro de vendedores.
+    """
+
+    def __init__(self, fatos, coordenadas, indice=None, totais=None, por_vendedor=None):
+        self.fatos = fatos
+        self.coordenadas = coordenadas
+        # Índice de datas dos dados completos: séries mensais sem filtro saem das somas acumuladas
+        self.indice = indice
+        self.totais = totais
+        self.por_vendedor = por_vendedor
+
+    @classmethod
+    def construir(cls, dados):
+        indice = obter_indice(dados)
+        if indice is not None:
+            mes = pd.Series(pd.Categorical.from_codes(indice.codigos_mes(), categories=indice.fim_dos_meses()), index=dados.index)
+        else:
+            mes = mes_da_data(dados['Data da Compra'])
+        dimensoes = [('Mes', mes) if dimensao == 'Mes' else dimensao for dimensao in DIMENSOES]
+        fatos = agregar(dados, dimensoes, {
+            'Preço': ('Preço', 'sum'),
+            'Quantidade': ('Preço', 'count'),
+            'Frete': ('Frete', 'sum')
+        }, dropna=False)
+        fatos['Mes'] = np.asarray(fatos['Mes'])
+        coordenadas = tabela_dimensao(dados, 'Local da compra', ['lat', 'lon'])
+        totais = (float(dados['Preço'].sum()), len(dados))
+        por_vendedor = dados.groupby('Vendedor', observed=True)['Preço'].agg(['sum', 'size'])
+        return cls(fatos, coordenadas, indice, totais, por_vendedor)
+
+    def filtrar_vendedores(self, vendedores):
+        if not vendedores:
+            return self
+        totais = None
+        if self.por_vendedor is not None:
+            selecionados = self.por_vendedor[self.por_vendedor.index.isin(vendedores)]
+            totais = (float(selecionados['sum'].sum()), int(selecionados['size'].sum()))
+        return CuboVendas(self.fatos[self.fatos['Vendedor'].isin(vendedores)], self.coordenadas, totais=totais)
+
+    # Métricas gerais (dos dados)
+    def receita_total(self):
+        if self.totais is not None:
+            return self.totais[0]
+        return self.fatos['Preço'].sum()
+
+    def quantidade_total(self):
+        if self.totais is not None:
+            return self.totais[1]
+        return int(self.fatos['Quantidade'].sum())
+
+    # Tabelas por estado (com lat/lon para o mapa)
+    def _por_estado(self, medida, nome):
+        tabela = self.fatos.groupby('Local da compra', observed=True)[[medida]].sum().rename(columns={medida: nome})
+        return self.coordenadas.merge(tabela, left_on='Local da compra', right_index=True).sort_values(nome, ascending=False)
+
+    def receita_estados(self):
+        return self._por_estado('Preço', 'Preço')
+
+    def vendas_estados(self, coluna='Preço'):
+        return self._por_estado('Quantidade', coluna)
+
+    # Tabelas mensais (meses sem venda aparecem com zero, como no pd.Grouper)
+    def _mensal(self, medida):
+        if self.indice is not None:
+            return self.indice.mensal(medida)
+        serie = self.fatos.groupby('Mes')[medida].sum()
+        if not serie.empty:
+            serie = serie.reindex(pd.date_range(serie.index.min(), serie.index.max(), freq='ME'), fill_value=0)
+        tabela = serie.rename('Preço').rename_axis('Data da Compra').reset_index()
+        tabela['Ano'] = tabela['Data da Compra'].dt.year
+        tabela['Mes'] = tabela['Data da Compra'].dt.month_name()
+        return tabela
+
+    def receita_mensal(self):
+        return self._mensal('Preço')
+
+    def vendas_mensal(self):
+        return self._mensal('Quantidade')
+
+    # Tabelas por categoria
+    def receita_categorias(self):
+        return self.fatos.groupby('Categoria do Produto', observed=True)[['Preço']].sum().sort_values('Preço', ascending=False)
+
+    def vendas_categorias(self, coluna='Preço'):
+        return self.fatos.groupby('Categoria do Produto', observed=True)[['Quantidade']].sum() \
+            .rename(columns={'Quantidade': coluna}).sort_values(coluna, ascending=False)
+
+    # Tabela de vendedores (mesmo formato do groupby(...).agg(['sum', 'count']))
+    def vendedores(self):
+        return self.fatos.groupby('Vendedor', observed=True)[['Preço', 'Quantidade']].sum() \
+            .rename(columns={'Preço': 'sum', 'Quantidade': 'count'})
+
+
+@por_dataframe
+def obter_cubo(dados):
+    """Retorna o cubo do DataFrame, construindo só na primeira vez (um por versão dos dados)."""
+    return CuboVendas.construir(dados)
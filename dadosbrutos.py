@@ -1,21 +1,20 @@
 import streamlit as st
-import requests
-import pandas as pd
+from carregador_vendas import carregar_vendas
+from motor_colunar import Resultado
+from motor_filtros import obter_motor
+from tabela_paginada import mostrar_tabela
+from exportacao import assinatura
 
 st.title('DADOS BRUTOS')
 
-url = 'https://labdados.com/produtos'
-
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format = '%d/%m/%Y')
-
-st.dataframe(dados)
+dados = carregar_vendas()
 
 with st.expander('Colunas'):
     colunas = st.multiselect('Selecione as colunas', list(dados.columns), list(dados.columns))
 
-st.dataframe(dados)
+# Uma tabela paginada só com as colunas escolhidas (a projeção não copia os dados)
+resultado = Resultado.de_visao(obter_motor(dados).visao([]).projetar(colunas))
+mostrar_tabela(resultado, 'tabela_vendas', assinatura('dadosbrutos', colunas))
 
 st.sidebar.title('Filtros')
 with st.sidebar.expander('Nome do produto'):
@@ -1,16 +1,45 @@
 import streamlit as st
+import perfilador
 import pandas as pd
 import plotly.express as px
+from carregador_bike import carregar_bike
+from exportacao import assinatura, preparar_download
+from versao_dados import versao
+from dispersao_densidade import dispersao
+from estatisticas import IndiceEstatisticas
+from cenarios import FERIADOS, VENTOS, avaliar_grade, mapa
+from fabrica_figuras import figura
+from pipeline_bike_horario import CLIMAS
+from previsao_demanda import HORIZONTE_PADRAO, carregar_modelo, prever_demanda
+from reducao_amostragem import janela_zoom, mostrar_com_zoom, reduzir
 
 # Configuração da página
 st.set_page_config(layout='wide')
 
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 # Função para carregar os dados
+# (tipos estreitos do dicionário de dados e cache em Parquet, veja carregador_bike.py)
 @st.cache_data
 def carregar_dados():
-    df = pd.read_csv('Bike_rent.csv')
-    df['dteday'] = pd.to_datetime(df['dteday'], format='%d-%m-%Y')
-    return df
+    return carregar_bike()
+
+# Hash do conteúdo dos dados, calculado uma vez por processo: o st.cache_data devolve
+# uma cópia nova dos dados a cada execução, e o versao() guarda o hash pelo id do DataFrame
+@st.cache_data
+def carregar_versao():
+    return versao(carregar_dados())
+
+# Índice das estatísticas descritivas por clima e faixa de temperatura (um por processo)
+@st.cache_resource
+def carregar_indice_estatisticas():
+    return IndiceEstatisticas(carregar_dados(), ['temp', 'hum', 'windspeed', 'cnt'], por='temp', grupo='weathersit')
+
+# Modelo de previsão de demanda (salvo em disco e atualizado só com os dias novos)
+@st.cache_resource
+def carregar_modelo_demanda():
+    return carregar_modelo(carregar_dados())
 
 dados = carregar_dados()
 
@@ -29,15 +58,18 @@ dados_filtrados = dados_filtrados[(dados_filtrados['temp'] >= temp_min) & (dados
 # 🔍 ANÁLISE EXPLORATÓRIA
 st.sidebar.subheader("Análise Exploratória 📊")
 
-# Estatísticas descritivas
+# Estatísticas descritivas (todas de uma vez pelo índice, guardadas por clima e faixa de temperatura)
+estatisticas = carregar_indice_estatisticas().consultar(filtro_clima, temp_min, temp_max)
 st.subheader("📌 Estatísticas Descritivas")
-st.write(dados_filtrados[['temp', 'hum', 'windspeed', 'cnt']].describe())
+st.write(estatisticas.drop('sum'))
+if estatisticas.attrs['aproximado']:
+    st.caption('Quartis aproximados (esboço KLL); contagem, média, desvio, mínimo e máximo são exatos.')
 
 # Métricas principais
-media_temp = dados_filtrados['temp'].mean()
-mediana_temp = dados_filtrados['temp'].median()
-desvio_temp = dados_filtrados['temp'].std()
-total_alugueis = dados_filtrados['cnt'].sum()
+media_temp = estatisticas.loc['mean', 'temp']
+mediana_temp = estatisticas.loc['50%', 'temp']
+desvio_temp = estatisticas.loc['std', 'temp']
+total_alugueis = int(round(estatisticas.loc['sum', 'cnt']))
 
 # Exibir métricas no Streamlit
 st.metric('Temperatura Média (°C)', f"{media_temp:.2f}")
@@ -46,20 +78,54 @@ st.metric('Desvio Padrão da Temperatura (°C)', f"{desvio_temp:.2f}")
 st.metric('Total de Aluguéis', total_alugueis)
 
 # Gráficos exploratórios
-fig_alugueis_tempo = px.line(dados_filtrados, x='dteday', y='cnt', title='Evolução do número de aluguéis')
+# A evolução vai para o navegador reduzida à largura do gráfico (LTTB); um trecho
+# selecionado com a caixa é reduzido de novo, com mais detalhe
+serie_alugueis = reduzir(dados_filtrados, 'dteday', 'cnt', janela=janela_zoom('grafico_alugueis_tempo'))
+fig_alugueis_tempo = px.line(serie_alugueis, x='dteday', y='cnt', title='Evolução do número de aluguéis')
 fig_alugueis_clima = px.box(dados_filtrados, x='weathersit', y='cnt', title='Distribuição de aluguéis por condição climática')
-fig_alugueis_temp = px.scatter(dados_filtrados, x='temp', y='cnt', title='Relação entre temperatura e número de aluguéis')
+# Com muitas linhas a dispersão vira um mapa de densidade (guardado pelo estado dos filtros)
+fig_alugueis_temp = dispersao(dados_filtrados, 'temp', 'cnt', (tuple(filtro_clima), temp_min, temp_max),
+                              titulo='Relação entre temperatura e número de aluguéis')
 
 # Exibição dos gráficos
 st.title('Dashboard de Aluguel de Bicicletas 🚴‍♂️')
-st.plotly_chart(fig_alugueis_tempo, use_container_width=True)
+mostrar_com_zoom(fig_alugueis_tempo, 'grafico_alugueis_tempo', use_container_width=True)
 st.plotly_chart(fig_alugueis_clima, use_container_width=True)
 st.plotly_chart(fig_alugueis_temp, use_container_width=True)
 
-# Download dos dados filtrados
-@st.cache_data
-def convert_df(df):
-    return df.to_csv(index=False).encode('utf-8')
+# Previsão de demanda para os próximos dias (clima típico da época, sem os filtros)
+st.subheader('🔮 Previsão de demanda')
+modelo, situacao_modelo = carregar_modelo_demanda()
+horizonte = st.slider('Dias de previsão', 7, 365, HORIZONTE_PADRAO)
+previsao = prever_demanda(modelo, horizonte)
+historico = dados[['dteday', 'cnt']].sort_values('dteday').tail(180)
+fig_previsao = px.line(pd.concat([historico.rename(columns={'cnt': 'Aluguéis'}).assign(Série='Histórico'),
+                                  previsao.rename(columns={'previsao': 'Aluguéis'}).assign(Série='Previsão')]),
+                       x='dteday', y='Aluguéis', color='Série', title=f'Aluguéis previstos para os próximos {horizonte} dias')
+st.plotly_chart(fig_previsao, use_container_width=True)
+st.caption(f'Regressão ridge com {modelo.linhas} dias (modelo {situacao_modelo}); '
+           f'erro médio no treino: {modelo.erro_medio:.0f} aluguéis por dia.')
+
+# Cenários "e se": a grade toda (temperatura x umidade x vento x clima x feriado) é
+# avaliada de uma vez por dia escolhido; os controles só escolhem o corte mostrado
+st.subheader('🧪 Cenários de demanda')
+coluna1, coluna2, coluna3, coluna4 = st.columns(4)
+dia_cenario = coluna1.date_input('Dia', modelo.ultimo_dia + pd.Timedelta(days=1))
+clima_cenario = coluna2.selectbox('Condição climática', list(CLIMAS), format_func=CLIMAS.get)
+vento_cenario = coluna3.select_slider('Vento (km/h)', VENTOS, value=VENTOS[1])
+feriado_cenario = coluna4.checkbox('Feriado', value=False)
+grade_avaliada = avaliar_grade(modelo, dia_cenario)
+fig_cenarios = figura(px.imshow, mapa(grade_avaliada, vento_cenario, clima_cenario, FERIADOS[feriado_cenario]),
+                      origin='lower',
+                      aspect='auto',
+                      color_continuous_scale='Viridis',
+                      labels={'x': 'Temperatura (°C)', 'y': 'Umidade (%)', 'color': 'Aluguéis previstos'},
+                      title=f'Aluguéis previstos em {dia_cenario:%d/%m/%Y} ({len(grade_avaliada):,} cenários avaliados)'.replace(',', '.'))
+st.plotly_chart(fig_cenarios, use_container_width=True)
 
-csv = convert_df(dados_filtrados)
+# Download dos dados filtrados
+# O CSV é gerado em blocos só quando o usuário clica, e fica guardado pela versão dos dados e pelos filtros
+csv = preparar_download(dados_filtrados, 'csv', assinatura('dashbike', carregar_versao(), tuple(filtro_clima), temp_min, temp_max))
 st.download_button('Baixar dados filtrados', csv, 'dados_filtrados.csv', 'text/csv')
+
+perfilador.finalizar()
@@ -1,12 +1,9 @@
 import streamlit as st
-import requests
-import pandas as pd
+from carregador_vendas import carregar_vendas
 import plotly.express as px
 
 st.title('Dashboard de Vendas :shopping_trolley:')
 
-url = 'https://labdados.com/produtos'
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
+dados = carregar_vendas()
 
 st.dataframe(dados)
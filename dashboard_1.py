@@ -1,6 +1,5 @@
 import streamlit as st
-import requests
-import pandas as pd
+from carregador_vendas import carregar_vendas
 import plotly.express as px
 
 def formata_numero(valor, prefixo = ''):
@@ -14,9 +13,7 @@ def formata_numero(valor, prefixo = ''):
 
 st.title('Dashboard de Vendas :shopping_trolley:')
 
-url = 'https://labdados.com/produtos'
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
+dados = carregar_vendas()
 
 coluna1, coluna2 = st.columns(2)
 with coluna1:
@@ -1,11 +1,16 @@
 import streamlit as st
+import perfilador
 import requests
-import pandas as pd
+from carregador_vendas import carregar_vendas
+from cubo_vendas import obter_cubo
 import plotly.express as px
 
 # Configuração do layout do Streamlit
 st.set_page_config(layout='wide')
 
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 def formata_numero(valor, prefixo=''):
     for unidade in ['', ' mil']:
         if valor < 1000:
@@ -15,37 +20,24 @@ def formata_numero(valor, prefixo=''):
 
 st.title('Dashboard de Vendas :shopping_trolley:')
 
-url = 'https://labdados.com/produtos'
-
-# Requisição de dados
-response = requests.get(url)
+# Requisição de dados (com cache compartilhado entre as execuções)
+try:
+    dados = carregar_vendas()
+except requests.RequestException as e:
+    dados = None
+    st.error(f'Erro na requisição: {e}. Verifique a URL ou a API.')
 
-# Verificando se a requisição foi bem-sucedida
-if response.status_code == 200:
+if dados is not None:
     try:
-        dados = pd.DataFrame.from_dict(response.json())
-        
         # Verificar se os dados possuem o formato esperado
         if dados.empty:
             st.error('Dados retornados vazios.')
         else:
-            # Conversão da data
-            dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
-
-            # Tabelas
-            receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
-            receita_estados = dados.drop_duplicates(subset='Local da compra') \
-                [['Local da compra', 'lat', 'lon']] \
-                .merge(receita_estados, left_on='Local da compra', right_index=True) \
-                .sort_values('Preço', ascending=False)
-
-            # Receita mensal
-            receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].sum().reset_index()
-            receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
-            receita_mensal['Mes'] = receita_mensal['Data da Compra'].dt.month_name()
-
-            # Receita por categoria
-            receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
+            # Tabelas (uma passada sobre os dados monta o cubo; as tabelas são somas sobre ele)
+            cubo = obter_cubo(dados)
+            receita_estados = cubo.receita_estados()
+            receita_mensal = cubo.receita_mensal()
+            receita_categorias = cubo.receita_categorias()
 
             # Gráficos
             fig_mapa_receita = px.scatter_geo(
@@ -91,12 +83,12 @@ if response.status_code == 200:
             # Visualização no Streamlit
             coluna1, coluna2 = st.columns(2)
             with coluna1:
-                st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
+                st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
                 st.plotly_chart(fig_mapa_receita, use_container_width=True)
                 st.plotly_chart(fig_receita_estados, use_container_width=True)
 
             with coluna2:
-                st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
+                st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
                 st.plotly_chart(fig_receita_mensal, use_container_width=True)
                 st.plotly_chart(fig_receita_categorias, use_container_width=True)
 
@@ -104,6 +96,5 @@ if response.status_code == 200:
 
     except Exception as e:
         st.error(f'Ocorreu um erro ao processar os dados: {e}')
-else:
-    st.error(f'Erro na requisição: {response.status_code}. Verifique a URL ou a API.')
 
+perfilador.finalizar()
@@ -1,12 +1,16 @@
 import streamlit as st
-import requests
-import pandas as pd
+import perfilador
+from carregador_vendas import carregar_vendas
+from cubo_vendas import obter_cubo
 import plotly.express as px
 
 
 # Configuração do layout do Streamlit
 st.set_page_config(layout='wide')
 
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 def formata_numero(valor, prefixo=''):
     for unidade in ['', ' mil']:
         if valor < 1000:
@@ -16,27 +20,13 @@ def formata_numero(valor, prefixo=''):
 
 st.title('Dashboard de Vendas :shopping_trolley:')
 
-url = 'https://labdados.com/produtos'
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
-
-# Conversão da data
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
-
-# Tabelas
-receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
-receita_estados = dados.drop_duplicates(subset='Local da compra') \
-    [['Local da compra', 'lat', 'lon']] \
-    .merge(receita_estados, left_on='Local da compra', right_index=True) \
-    .sort_values('Preço', ascending=False)
-
-# Receita mensal
-receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].sum().reset_index()
-receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
-receita_mensal['Mes'] = receita_mensal['Data da Compra'].dt.month_name()
+dados = carregar_vendas()
 
-# Receita por categoria
-receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
+# Tabelas (uma passada sobre os dados monta o cubo; as tabelas são somas sobre ele)
+cubo = obter_cubo(dados)
+receita_estados = cubo.receita_estados()
+receita_mensal = cubo.receita_mensal()
+receita_categorias = cubo.receita_categorias()
 
 # Gráficos
 fig_mapa_receita = px.scatter_geo(
@@ -82,14 +72,15 @@ fig_receita_categorias.update_layout(yaxis_title='Receita')
 # Visualização no Streamlit
 coluna1, coluna2 = st.columns(2)
 with coluna1:
-    st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
+    st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
     st.plotly_chart(fig_mapa_receita, use_container_width=True)
     st.plotly_chart(fig_receita_estados, use_container_width=True)
 
 with coluna2:
-    st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
+    st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
     st.plotly_chart(fig_receita_mensal, use_container_width=True)
     st.plotly_chart(fig_receita_categorias, use_container_width=True)
 
 st.dataframe(dados)
 
+perfilador.finalizar()
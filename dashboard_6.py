@@ -1,11 +1,17 @@
 import streamlit as st
-import requests
-import pandas as pd
+import perfilador
+from carregador_vendas import carregar_vendas
+from cubo_vendas import obter_cubo
 import plotly.express as px
+from abas_preguicosas import Aba, mostrar_abas
+from fabrica_figuras import figura
 
 # Configuração do layout do Streamlit
 st.set_page_config(layout='wide')
 
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 def formata_numero(valor, prefixo=''):
     for unidade in ['', ' mil']:
         if valor < 1000:
@@ -29,141 +35,120 @@ if todos_anos:
 else:
     ano = st.sidebar.slider('Ano', 2020, 2023)
 
-# URL da API com query string para filtros
-url = 'https://labdados.com/produtos'
-query_string = {'regiao': regiao.lower(), 'ano': ano}
-response = requests.get(url, params=query_string)
-dados = pd.DataFrame.from_dict(response.json())
-
-# Conversão da data
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+# Dados da API filtrados por região e ano (com cache compartilhado)
+dados = carregar_vendas(regiao.lower(), ano)
 
 # Filtro por vendedores
 filtro_vendedores = st.sidebar.multiselect('Vendedores', dados['Vendedor'].unique())
-if filtro_vendedores:
-    dados = dados[dados['Vendedor'].isin(filtro_vendedores)]
-
-# Tabelas de Receita
-receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
-receita_estados = dados.drop_duplicates(subset='Local da compra') \
-    [['Local da compra', 'lat', 'lon']] \
-    .merge(receita_estados, left_on='Local da compra', right_index=True) \
-    .sort_values('Preço', ascending=False)
-
-receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].sum().reset_index()
-receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
-receita_mensal['Mes'] = receita_mensal['Data da Compra'].dt.month_name()
-
-receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
-
-# Tabelas de Quantidade de Vendas
-vendas_estados = dados.groupby('Local da compra')[['Preço']].count().rename(columns={'Preço': 'Quantidade de Vendas'})
-vendas_estados = dados.drop_duplicates(subset='Local da compra') \
-    [['Local da compra', 'lat', 'lon']] \
-    .merge(vendas_estados, left_on='Local da compra', right_index=True) \
-    .sort_values('Quantidade de Vendas', ascending=False)
-
-vendas_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].count().reset_index()
-vendas_mensal['Ano'] = vendas_mensal['Data da Compra'].dt.year
-vendas_mensal['Mes'] = vendas_mensal['Data da Compra'].dt.month_name()
-
-vendas_categorias = dados.groupby('Categoria do Produto')[['Preço']].count().rename(columns={'Preço': 'Quantidade de Vendas'}) \
-    .sort_values('Quantidade de Vendas', ascending=False)
-
-# Tabelas de Vendedores
-vendedores = pd.DataFrame(dados.groupby('Vendedor')['Preço'].agg(['sum', 'count']))
-
-# Gráficos de Receita
-fig_mapa_receita = px.scatter_geo(
-    receita_estados,
-    lat='lat',
-    lon='lon',
-    scope='south america',
-    size='Preço',
-    template='seaborn',
-    hover_name='Local da compra',
-    hover_data={'lat': False, 'lon': False},
-    title='Receita por estado'
-)
-
-fig_receita_mensal = px.line(
-    receita_mensal,
-    x='Mes',
-    y='Preço',
-    markers=True,
-    range_y=(0, receita_mensal['Preço'].max()),
-    color='Ano',
-    line_dash='Ano',
-    title='Receita mensal'
-)
-fig_receita_mensal.update_layout(yaxis_title='Receita')
-
-fig_receita_estados = px.bar(
-    receita_estados.head(),
-    x='Local da compra',
-    y='Preço',
-    text_auto=True,
-    title='Top estados'
-)
-fig_receita_estados.update_layout(yaxis_title='Receita')
-
-fig_receita_categorias = px.bar(
-    receita_categorias,
-    text_auto=True,
-    title='Receita por categoria'
-)
-fig_receita_categorias.update_layout(yaxis_title='Receita')
-
-# Gráficos de Quantidade de Vendas
-fig_vendas_estados = px.bar(
-    vendas_estados.head(),
-    x='Local da compra',
-    y='Quantidade de Vendas',
-    text_auto=True,
-    title='Top estados (Vendas)'
-)
-fig_vendas_estados.update_layout(yaxis_title='Quantidade de Vendas')
-
-fig_vendas_mensal = px.line(
-    vendas_mensal,
-    x='Mes',
-    y='Preço',
-    markers=True,
-    range_y=(0, vendas_mensal['Preço'].max()),
-    color='Ano',
-    line_dash='Ano',
-    title='Vendas mensais'
-)
-fig_vendas_mensal.update_layout(yaxis_title='Quantidade de Vendas')
-
-fig_vendas_categorias = px.bar(
-    vendas_categorias,
-    text_auto=True,
-    title='Vendas por categoria'
-)
-fig_vendas_categorias.update_layout(yaxis_title='Quantidade de Vendas')
-
-# Visualização no Streamlit
-aba1, aba2, aba3 = st.tabs(['Receita', 'Quantidade de vendas', 'Vendedores'])
-
-# Aba Receita
-with aba1:
+cubo = obter_cubo(dados).filtrar_vendedores(filtro_vendedores)
+
+# Aba Receita: tabelas e gráficos só são calculados quando a aba está aberta
+def preparar_receita():
+    receita_estados = cubo.receita_estados()
+    receita_mensal = cubo.receita_mensal()
+    receita_categorias = cubo.receita_categorias()
+
+    fig_mapa_receita = figura(
+        px.scatter_geo,
+        receita_estados,
+        lat='lat',
+        lon='lon',
+        scope='south america',
+        size='Preço',
+        template='seaborn',
+        hover_name='Local da compra',
+        hover_data={'lat': False, 'lon': False},
+        title='Receita por estado'
+    )
+
+    fig_receita_mensal = figura(
+        px.line,
+        receita_mensal,
+        x='Mes',
+        y='Preço',
+        markers=True,
+        range_y=(0, receita_mensal['Preço'].max()),
+        color='Ano',
+        line_dash='Ano',
+        title='Receita mensal',
+        layout=dict(yaxis_title='Receita')
+    )
+
+    fig_receita_estados = figura(
+        px.bar,
+        receita_estados.head(),
+        x='Local da compra',
+        y='Preço',
+        text_auto=True,
+        title='Top estados',
+        layout=dict(yaxis_title='Receita')
+    )
+
+    fig_receita_categorias = figura(
+        px.bar,
+        receita_categorias,
+        text_auto=True,
+        title='Receita por categoria',
+        layout=dict(yaxis_title='Receita')
+    )
+    return fig_mapa_receita, fig_receita_mensal, fig_receita_estados, fig_receita_categorias
+
+def mostrar_receita(figuras):
+    fig_mapa_receita, fig_receita_mensal, fig_receita_estados, fig_receita_categorias = figuras
     coluna1, coluna2 = st.columns(2)
     with coluna1:
-        st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
+        st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
         st.plotly_chart(fig_mapa_receita, use_container_width=True)
         st.plotly_chart(fig_receita_estados, use_container_width=True)
 
     with coluna2:
-        st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
+        st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
         st.plotly_chart(fig_receita_mensal, use_container_width=True)
         st.plotly_chart(fig_receita_categorias, use_container_width=True)
 
 # Aba Quantidade de vendas
-with aba2:
+def preparar_vendas():
+    vendas_estados = cubo.vendas_estados('Quantidade de Vendas')
+    vendas_mensal = cubo.vendas_mensal()
+    vendas_categorias = cubo.vendas_categorias('Quantidade de Vendas')
+
+    fig_vendas_estados = figura(
+        px.bar,
+        vendas_estados.head(),
+        x='Local da compra',
+        y='Quantidade de Vendas',
+        text_auto=True,
+        title='Top estados (Vendas)',
+        layout=dict(yaxis_title='Quantidade de Vendas')
+    )
+
+    fig_vendas_mensal = figura(
+        px.line,
+        vendas_mensal,
+        x='Mes',
+        y='Preço',
+        markers=True,
+        range_y=(0, vendas_mensal['Preço'].max()),
+        color='Ano',
+        line_dash='Ano',
+        title='Vendas mensais',
+        layout=dict(yaxis_title='Quantidade de Vendas')
+    )
+
+    fig_vendas_categorias = figura(
+        px.bar,
+        vendas_categorias,
+        text_auto=True,
+        title='Vendas por categoria',
+        layout=dict(yaxis_title='Quantidade de Vendas')
+    )
+    return vendas_categorias, fig_vendas_estados, fig_vendas_mensal, fig_vendas_categorias
+
+def mostrar_vendas(preparado):
+    vendas_categorias, fig_vendas_estados, fig_vendas_mensal, fig_vendas_categorias = preparado
     coluna1, coluna2 = st.columns(2)
     with coluna1:
-        st.metric('Total de Vendas', formata_numero(dados.shape[0]))
+        st.metric('Total de Vendas', formata_numero(cubo.quantidade_total()))
         st.plotly_chart(fig_vendas_estados, use_container_width=True)
 
     with coluna2:
@@ -171,27 +156,48 @@ with aba2:
         st.plotly_chart(fig_vendas_mensal, use_container_width=True)
         st.plotly_chart(fig_vendas_categorias, use_container_width=True)
 
-# Aba Vendedores
-with aba3:
-    qtd_vendedores = st.number_input('Quantidade de vendedores', 2, 10, 5)
+# Aba Vendedores (a quantidade escolhida fica guardada enquanto a aba está fechada)
+def preparar_vendedores(qtd_vendedores):
+    vendedores = cubo.vendedores()
+
+    fig_receita_vendedores = figura(
+        px.bar,
+        vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores),
+        x='sum',
+        y=vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores).index,
+        text_auto=True,
+        title=f'Top {qtd_vendedores} vendedores (receita)'
+    )
+
+    fig_vendas_vendedores = figura(
+        px.bar,
+        vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores),
+        x='count',
+        y=vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores).index,
+        text_auto=True,
+        title=f'Top {qtd_vendedores} vendedores (quantidade de vendas)'
+    )
+    return fig_receita_vendedores, fig_vendas_vendedores
+
+def mostrar_vendedores(figuras):
+    # O valor do campo chega ao preparar_vendedores pelo st.session_state (qtd_vendedores abaixo),
+    # então as figuras preparadas já são as da quantidade escolhida
+    st.number_input('Quantidade de vendedores', 2, 10, 5, key='qtd_vendedores', persist_state='page')
+    fig_receita_vendedores, fig_vendas_vendedores = figuras
     coluna1, coluna2 = st.columns(2)
 
     with coluna1:
-        fig_receita_vendedores = px.bar(
-            vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores),
-            x='sum',
-            y=vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores).index,
-            text_auto=True,
-            title=f'Top {qtd_vendedores} vendedores (receita)'
-        )
         st.plotly_chart(fig_receita_vendedores)
 
     with coluna2:
-        fig_vendas_vendedores = px.bar(
-            vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores),
-            x='count',
-            y=vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores).index,
-            text_auto=True,
-            title=f'Top {qtd_vendedores} vendedores (quantidade de vendas)'
-        )
         st.plotly_chart(fig_vendas_vendedores)
+
+# Visualização no Streamlit: só a aba aberta é calculada, as outras são adiantadas em segundo plano
+qtd_vendedores = st.session_state.get('qtd_vendedores', 5)
+mostrar_abas([
+    Aba('Receita', preparar_receita, mostrar_receita),
+    Aba('Quantidade de vendas', preparar_vendas, mostrar_vendas),
+    Aba('Vendedores', lambda: preparar_vendedores(qtd_vendedores), mostrar_vendedores),
+], key='abas_vendas')
+
+perfilador.finalizar()
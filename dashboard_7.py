@@ -1,13 +1,7 @@
-import streamlist as st
-import requests
-import pandas as pd
+import streamlit as st
+from carregador_vendas import carregar_vendas
 
 st.title('DADOS BRUTOS')
 
-url = 'https://labdados.com/produtos'
-
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format = '%d/%m/%Y')
-
+dados = carregar_vendas()
 st.dataframe(dados)
\ No newline at end of file
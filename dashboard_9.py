@@ -1,12 +1,26 @@
 import streamlit as st
-import requests
+import perfilador
+from carregador_vendas import carregar_vendas, estatisticas_cache
+from cache_limitado import estatisticas_caches, limpar_caches
+from planejador_consultas import consultar_visiveis
+from exportacao import FORMATOS, assinatura, preparar_download
+from tabela_paginada import mostrar_tabela
+from notificacoes import exibir_notificacoes, notificar
 import pandas as pd
+from cubo_vendas import obter_cubo
 import plotly.express as px
-import time
+from abas_preguicosas import Aba, mostrar_abas
+from fabrica_figuras import figura
 
 # Configuração da página
 st.set_page_config(layout='wide')
 
+# Avisos deixados pelos callbacks (ex.: confirmação de download)
+exibir_notificacoes()
+
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
 # Função para formatar números
 def formata_numero(valor, prefixo=''):
     for unidade in ['', 'mil']:
@@ -15,25 +29,15 @@ def formata_numero(valor, prefixo=''):
         valor /= 1000
     return f'{prefixo} {valor:.2f} milhões'
 
-# Função para converter DataFrame em CSV
-@st.cache_data
-def converte_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Função para exibir mensagem de sucesso
+# Função para exibir mensagem de sucesso (toast que some sozinho, sem travar a sessão)
 def mensagem_sucesso():
-    sucesso = st.success('Arquivo baixado com sucesso!', icon="✅")
-    time.sleep(5)
-    sucesso.empty()
+    notificar('Arquivo baixado com sucesso!', icone='✅')
 
 # Página 1: Dados Brutos
 def pagina_dados_brutos():
     st.title('DADOS BRUTOS')
 
-    url = 'https://labdados.com/produtos'
-    response = requests.get(url)
-    dados = pd.DataFrame.from_dict(response.json())
-    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+    dados = carregar_vendas()
 
     with st.expander('Colunas'):
         colunas = st.multiselect('Selecione as colunas', list(dados.columns), list(dados.columns))
@@ -60,37 +64,40 @@ def pagina_dados_brutos():
     with st.sidebar.expander('Quantidade de parcelas'):
         qtd_parcelas = st.slider('Selecione a quantidade de parcelas', 1, 24, (1, 24))
 
-    query = '''
-    Produto in @produtos and \
-    `Categoria do Produto` in @categoria and \
-    @preco[0] <= Preço <= @preco[1] and \
-    @frete[0] <= Frete <= @frete[1] and \
-    @data_compra[0] <= `Data da Compra` <= @data_compra[1] and \
-    Vendedor in @vendedores and \
-    `Local da compra` in @local_compra and \
-    @avaliacao[0] <= `Avaliação da compra` <= @avaliacao[1] and \
-    `Tipo de pagamento` in @tipo_pagamento and \
-    @qtd_parcelas[0] <= `Quantidade de parcelas` <= @qtd_parcelas[1]
-    '''
-
-    dados_filtrados = dados.query(query)
-    dados_filtrados = dados_filtrados[colunas]
-
-    st.dataframe(dados_filtrados)
-
-    st.markdown(f'A tabela possui :blue[{dados_filtrados.shape[0]}] linhas e :blue[{dados_filtrados.shape[1]}] colunas')
+    # O planejador manda para a API o que ela sabe filtrar e aplica o resto localmente
+    filtros = {
+        'produtos': produtos,
+        'categoria': categoria,
+        'preco': preco,
+        'frete': frete,
+        'data_compra': data_compra,
+        'vendedores': vendedores,
+        'local_compra': local_compra,
+        'avaliacao': avaliacao,
+        'tipo_pagamento': tipo_pagamento,
+        'qtd_parcelas': qtd_parcelas
+    }
+    # Só a página aberta sai do motor de consultas; o download busca todas as linhas no clique
+    resultado = consultar_visiveis(filtros, colunas)
+    chave_dados = assinatura(resultado.versao, filtros, colunas)
+
+    mostrar_tabela(resultado, 'tabela_dados_brutos', chave_dados)
+    st.markdown(f'A tabela possui :blue[{resultado.total}] linhas e :blue[{len(colunas)}] colunas')
 
     st.markdown('Escreva um nome para o arquivo')
     coluna1, coluna2 = st.columns(2)
     with coluna1:
         nome_arquivo = st.text_input('', label_visibility='collapsed', value='dados')
-        nome_arquivo += '.csv'
+        formato = st.selectbox('Formato do arquivo', list(FORMATOS))
+        mime, extensao = FORMATOS[formato]
+        nome_arquivo += extensao
     with coluna2:
+        # O arquivo é gerado em blocos só no clique, e guardado pela versão dos dados e pelos filtros
         st.download_button(
-            'Fazer o download da tabela em csv',
-            data=converte_csv(dados_filtrados),
+            f'Fazer o download da tabela em {formato}',
+            data=preparar_download(resultado.tudo, formato, chave_dados),
             file_name=nome_arquivo,
-            mime='text/csv',
+            mime=mime,
             on_click=mensagem_sucesso
         )
 
@@ -98,7 +105,6 @@ def pagina_dados_brutos():
 def pagina_dashboard():
     st.title('DASHBOARD DE VENDAS :shopping_trolley:')
 
-    url = 'https://labdados.com/produtos'
     regioes = ['Brasil', 'Centro-Oeste', 'Nordeste', 'Norte', 'Sudeste', 'Sul']
 
     st.sidebar.title('Filtros')
@@ -113,156 +119,176 @@ def pagina_dashboard():
     else:
         ano = st.sidebar.slider('Ano', 2020, 2023)
 
-    query_string = {'regiao': regiao.lower(), 'ano': ano}
-    response = requests.get(url, params=query_string)
-    dados = pd.DataFrame.from_dict(response.json())
-    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+    dados = carregar_vendas(regiao.lower(), ano)
 
     filtro_vendedores = st.sidebar.multiselect('Vendedores', dados['Vendedor'].unique())
-    if filtro_vendedores:
-        dados = dados[dados['Vendedor'].isin(filtro_vendedores)]
-
-    # Tabelas e gráficos
-    receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
-    receita_estados = dados.drop_duplicates(subset='Local da compra')[['Local da compra', 'lat', 'lon']].merge(receita_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
-
-    receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].sum().reset_index()
-    receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
-    receita_mensal['Mes'] = receita_mensal['Data da Compra'].dt.month_name()
-
-    receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
-
-    vendas_estados = pd.DataFrame(dados.groupby('Local da compra')['Preço'].count())
-    vendas_estados = dados.drop_duplicates(subset='Local da compra')[['Local da compra', 'lat', 'lon']].merge(vendas_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
-
-    vendas_mensal = pd.DataFrame(dados.set_index('Data da Compra').groupby(pd.Grouper(freq='M'))['Preço'].count()).reset_index()
-    vendas_mensal['Ano'] = vendas_mensal['Data da Compra'].dt.year
-    vendas_mensal['Mes'] = vendas_mensal['Data da Compra'].dt.month_name()
-
-    vendas_categorias = pd.DataFrame(dados.groupby('Categoria do Produto')['Preço'].count().sort_values(ascending=False))
-
-    vendedores = pd.DataFrame(dados.groupby('Vendedor')['Preço'].agg(['sum', 'count']))
-
-    # Gráficos
-    fig_mapa_receita = px.scatter_geo(receita_estados,
-                                      lat='lat',
-                                      lon='lon',
-                                      scope='south america',
-                                      size='Preço',
-                                      template='seaborn',
-                                      hover_name='Local da compra',
-                                      hover_data={'lat': False, 'lon': False},
-                                      title='Receita por estado')
-
-    fig_receita_mensal = px.line(receita_mensal,
-                                 x='Mes',
-                                 y='Preço',
-                                 markers=True,
-                                 range_y=(0, receita_mensal.max()),
-                                 color='Ano',
-                                 line_dash='Ano',
-                                 title='Receita mensal')
-
-    fig_receita_mensal.update_layout(yaxis_title='Receita')
-
-    fig_receita_estados = px.bar(receita_estados.head(),
-                                 x='Local da compra',
-                                 y='Preço',
-                                 text_auto=True,
-                                 title='Top estados (receita)')
-
-    fig_receita_estados.update_layout(yaxis_title='Receita')
-
-    fig_receita_categorias = px.bar(receita_categorias,
-                                    text_auto=True,
-                                    title='Receita por categoria')
-
-    fig_receita_categorias.update_layout(yaxis_title='Receita')
-
-    fig_mapa_vendas = px.scatter_geo(vendas_estados,
-                                     lat='lat',
-                                     lon='lon',
-                                     scope='south america',
-                                     template='seaborn',
-                                     size='Preço',
-                                     hover_name='Local da compra',
-                                     hover_data={'lat': False, 'lon': False},
-                                     title='Vendas por estado')
-
-    fig_vendas_estados = px.bar(vendas_estados.head(),
-                                x='Local da compra',
-                                y='Preço',
-                                text_auto=True,
-                                title='Top 5 estados')
-
-    fig_vendas_estados.update_layout(yaxis_title='Quantidade de vendas')
-
-    fig_vendas_mensal = px.line(vendas_mensal,
-                                x='Mes',
-                                y='Preço',
-                                markers=True,
-                                range_y=(0, vendas_mensal.max()),
-                                color='Ano',
-                                line_dash='Ano',
-                                title='Quantidade de vendas mensal')
-
-    fig_vendas_mensal.update_layout(yaxis_title='Quantidade de vendas')
-
-    fig_vendas_categorias = px.bar(vendas_categorias,
-                                   text_auto=True,
-                                   title='Vendas por categoria')
-
-    fig_vendas_categorias.update_layout(showlegend=False, yaxis_title='Quantidade de vendas')
-
-    # Visualização no Streamlit
-    aba1, aba2, aba3 = st.tabs(['Receita', 'Quantidade de vendas', 'Vendedores'])
-
-    with aba1:
+    cubo = obter_cubo(dados).filtrar_vendedores(filtro_vendedores)
+
+    # Cada aba calcula suas tabelas e gráficos só quando está aberta (somas sobre o cubo)
+    def preparar_receita():
+        receita_estados = cubo.receita_estados()
+        receita_mensal = cubo.receita_mensal()
+        receita_categorias = cubo.receita_categorias()
+
+        fig_mapa_receita = figura(px.scatter_geo, receita_estados,
+                                  lat='lat',
+                                  lon='lon',
+                                  scope='south america',
+                                  size='Preço',
+                                  template='seaborn',
+                                  hover_name='Local da compra',
+                                  hover_data={'lat': False, 'lon': False},
+                                  title='Receita por estado')
+
+        fig_receita_mensal = figura(px.line, receita_mensal,
+                                    x='Mes',
+                                    y='Preço',
+                                    markers=True,
+                                    range_y=(0, receita_mensal.max()),
+                                    color='Ano',
+                                    line_dash='Ano',
+                                    title='Receita mensal',
+                                    layout=dict(yaxis_title='Receita'))
+
+        fig_receita_estados = figura(px.bar, receita_estados.head(),
+                                     x='Local da compra',
+                                     y='Preço',
+                                     text_auto=True,
+                                     title='Top estados (receita)',
+                                     layout=dict(yaxis_title='Receita'))
+
+        fig_receita_categorias = figura(px.bar, receita_categorias,
+                                        text_auto=True,
+                                        title='Receita por categoria',
+                                        layout=dict(yaxis_title='Receita'))
+        return fig_mapa_receita, fig_receita_mensal, fig_receita_estados, fig_receita_categorias
+
+    def mostrar_receita(figuras):
+        fig_mapa_receita, fig_receita_mensal, fig_receita_estados, fig_receita_categorias = figuras
         coluna1, coluna2 = st.columns(2)
         with coluna1:
-            st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
+            st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
             st.plotly_chart(fig_mapa_receita, use_container_width=True)
             st.plotly_chart(fig_receita_estados, use_container_width=True)
         with coluna2:
-            st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
+            st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
             st.plotly_chart(fig_receita_mensal, use_container_width=True)
             st.plotly_chart(fig_receita_categorias, use_container_width=True)
 
-    with aba2:
+    def preparar_vendas():
+        vendas_estados = cubo.vendas_estados()
+        vendas_mensal = cubo.vendas_mensal()
+        vendas_categorias = cubo.vendas_categorias()
+
+        fig_mapa_vendas = figura(px.scatter_geo, vendas_estados,
+                                 lat='lat',
+                                 lon='lon',
+                                 scope='south america',
+                                 template='seaborn',
+                                 size='Preço',
+                                 hover_name='Local da compra',
+                                 hover_data={'lat': False, 'lon': False},
+                                 title='Vendas por estado')
+
+        fig_vendas_estados = figura(px.bar, vendas_estados.head(),
+                                    x='Local da compra',
+                                    y='Preço',
+                                    text_auto=True,
+                                    title='Top 5 estados',
+                                    layout=dict(yaxis_title='Quantidade de vendas'))
+
+        fig_vendas_mensal = figura(px.line, vendas_mensal,
+                                   x='Mes',
+                                   y='Preço',
+                                   markers=True,
+                                   range_y=(0, vendas_mensal.max()),
+                                   color='Ano',
+                                   line_dash='Ano',
+                                   title='Quantidade de vendas mensal',
+                                   layout=dict(yaxis_title='Quantidade de vendas'))
+
+        fig_vendas_categorias = figura(px.bar, vendas_categorias,
+                                       text_auto=True,
+                                       title='Vendas por categoria',
+                                       layout=dict(showlegend=False, yaxis_title='Quantidade de vendas'))
+        return fig_mapa_vendas, fig_vendas_estados, fig_vendas_mensal, fig_vendas_categorias
+
+    def mostrar_vendas(figuras):
+        fig_mapa_vendas, fig_vendas_estados, fig_vendas_mensal, fig_vendas_categorias = figuras
         coluna1, coluna2 = st.columns(2)
         with coluna1:
-            st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
+            st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
             st.plotly_chart(fig_mapa_vendas, use_container_width=True)
             st.plotly_chart(fig_vendas_estados, use_container_width=True)
         with coluna2:
-            st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
+            st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
             st.plotly_chart(fig_vendas_mensal, use_container_width=True)
             st.plotly_chart(fig_vendas_categorias, use_container_width=True)
 
-    with aba3:
-        qtd_vendedores = st.number_input('Quantidade de vendedores', 2, 10, 5)
+    def preparar_vendedores(qtd_vendedores):
+        vendedores = cubo.vendedores()
+
+        fig_receita_vendedores = figura(px.bar, vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores),
+                                        x='sum',
+                                        y=vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores).index,
+                                        text_auto=True,
+                                        title=f'Top {qtd_vendedores} vendedores (receita)')
+
+        fig_vendas_vendedores = figura(px.bar, vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores),
+                                       x='count',
+                                       y=vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores).index,
+                                       text_auto=True,
+                                       title=f'Top {qtd_vendedores} vendedores (quantidade de vendas)')
+        return fig_receita_vendedores, fig_vendas_vendedores
+
+    def mostrar_vendedores(figuras):
+        # A quantidade escolhida fica guardada enquanto a aba está fechada
+        # O valor do campo chega ao preparar_vendedores pelo st.session_state (qtd_vendedores abaixo),
+        # então as figuras preparadas já são as da quantidade escolhida
+        st.number_input('Quantidade de vendedores', 2, 10, 5, key='qtd_vendedores', persist_state='page')
+        fig_receita_vendedores, fig_vendas_vendedores = figuras
         coluna1, coluna2 = st.columns(2)
         with coluna1:
-            st.metric('Receita', formata_numero(dados['Preço'].sum(), 'R$'))
-            fig_receita_vendedores = px.bar(vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores),
-                                            x='sum',
-                                            y=vendedores[['sum']].sort_values('sum', ascending=False).head(qtd_vendedores).index,
-                                            text_auto=True,
-                                            title=f'Top {qtd_vendedores} vendedores (receita)')
+            st.metric('Receita', formata_numero(cubo.receita_total(), 'R$'))
             st.plotly_chart(fig_receita_vendedores, use_container_width=True)
         with coluna2:
-            st.metric('Quantidade de vendas', formata_numero(dados.shape[0]))
-            fig_vendas_vendedores = px.bar(vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores),
-                                           x='count',
-                                           y=vendedores[['count']].sort_values('count', ascending=False).head(qtd_vendedores).index,
-                                           text_auto=True,
-                                           title=f'Top {qtd_vendedores} vendedores (quantidade de vendas)')
+            st.metric('Quantidade de vendas', formata_numero(cubo.quantidade_total()))
             st.plotly_chart(fig_vendas_vendedores, use_container_width=True)
 
+    # Visualização no Streamlit: as abas fechadas são adiantadas em segundo plano
+    qtd_vendedores = st.session_state.get('qtd_vendedores', 5)
+    mostrar_abas([Aba('Receita', preparar_receita, mostrar_receita),
+                  Aba('Quantidade de vendas', preparar_vendas, mostrar_vendas),
+                  Aba('Vendedores', lambda: preparar_vendedores(qtd_vendedores), mostrar_vendedores)],
+                 key='abas_dashboard')
+
+# Página 3: Administração (uso de memória dos caches do processo)
+def pagina_administracao():
+    st.title('ADMINISTRAÇÃO')
+
+    st.subheader('Caches limitados')
+    caches = estatisticas_caches()
+    if caches.empty:
+        st.info('Nenhum cache foi usado ainda.')
+    else:
+        caches['MB'] = (caches['bytes'] / 1024 ** 2).round(2)
+        caches['Limite (MB)'] = (caches['max_bytes'] / 1024 ** 2).round(2)
+        st.dataframe(caches.drop(columns=['bytes', 'max_bytes']), use_container_width=True)
+    if st.button('Limpar caches'):
+        limpar_caches()
+        st.rerun()
+
+    st.subheader('Cache de dados de vendas')
+    st.dataframe(pd.DataFrame([estatisticas_cache()]), use_container_width=True, hide_index=True)
+
 # Menu de navegação
-pagina = st.sidebar.selectbox('Selecione a página', ['Dados Brutos', 'Dashboard'])
+pagina = st.sidebar.selectbox('Selecione a página', ['Dados Brutos', 'Dashboard', 'Administração'])
 
 if pagina == 'Dados Brutos':
     pagina_dados_brutos()
+elif pagina == 'Dashboard':
+    pagina_dashboard()
 else:
-    pagina_dashboard()
\ No newline at end of file
+    pagina_administracao()
+
+perfilador.finalizar()
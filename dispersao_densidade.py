@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from cache_limitado import CacheLimitado
+
+# Dispersão que vira mapa de densidade quando há linhas demais.
+#
+# Até LIMITE_PONTOS linhas o gráfico é o px.scatter de sempre; acima disso x e y
+# são contados numa grade de FAIXAS (histograma 2D com NumPy) e o navegador
+# recebe só a grade. A figura e a reta de tendência ficam guardadas pelo estado
+# dos filtros que a página informa.
+LIMITE_PONTOS = int(os.environ.get('DISPERSAO_LIMITE_PONTOS', 5_000))
+FAIXAS = (60, 40)  # (x, y)
+
+# Memória máxima (em bytes) para as figuras e retas guardadas
+MAX_BYTES = int(os.environ.get('DISPERSAO_MAX_BYTES', 32 * 1024 * 1024))
+
+_cache = CacheLimitado('dispersao', MAX_BYTES)
+
+
+def _valores(tabela, x, y):
+    valores_x = tabela[x].to_numpy(dtype='float64')
+    valores_y = tabela[y].to_numpy(dtype='float64')
+    validos = np.isfinite(valores_x) & np.isfinite(valores_y)
+    if not validos.all():
+        valores_x, valores_y = valores_x[validos], valores_y[validos]
+    return valores_x, valores_y
+
+
+def ajustar_reta(valores_x, valores_y):
+    """(inclinação, intercepto) da reta de mínimos quadrados, ou None sem dois valores diferentes de x."""
+    if len(valores_x) < 2 or valores_x.min() == valores_x.max():
+        return None
+    inclinacao, intercepto = np.polyfit(valores_x, valores_y, 1)
+    return float(inclinacao), float(intercepto)
+
+
+def densidade(valores_x, valores_y, faixas=FAIXAS):
+    """Contagem de linhas por célula da grade: (contagens[y, x], centros de x, centros de y)."""
+    contagens, bordas_x, bordas_y = np.histogram2d(valores_x, valores_y, bins=faixas)
+    centros_x = (bordas_x[:-1] + bordas_x[1:]) / 2
+    centros_y = (bordas_y[:-1] + bordas_y[1:]) / 2
+    return contagens.T, centros_x, centros_y
+
+
+def _figura(tabela, x, y, titulo, limite, com_tendencia, faixas):
+    valores_x, valores_y = _valores(tabela, x, y)
+    if len(tabela) <= limite:
+        fig = px.scatter(tabela, x=x, y=y, title=titulo)
+    else:
+        contagens, centros_x, centros_y = densidade(valores_x, valores_y, faixas)
+        # Células vazias ficam transparentes
+        fig = go.Figure(go.Heatmap(x=centros_x, y=centros_y, z=np.where(contagens > 0, contagens, np.nan),
+                                   colorscale='Blues', colorbar={'title': 'Linhas'},
+                                   hovertemplate=f'{x}: %{{x:.3g}}<br>{y}: %{{y:.3g}}<br>linhas: %{{z}}<extra></extra>'))
+        fig.update_layout(title=f'{titulo} (densidade de {len(valores_x):,} linhas)'.replace(',', '.'),
+                          xaxis_title=x, yaxis_title=y)
+
+    reta = ajustar_reta(valores_x, valores_y) if com_tendencia else None
+    if reta is not None:
+        inclinacao, intercepto = reta
+        extremos = np.array([valores_x.min(), valores_x.max()])
+        fig.add_trace(go.Scatter(x=extremos, y=inclinacao * extremos + intercepto, mode='lines', name='Tendência',
+                                 line={'color': 'firebrick'},
+                                 hovertemplate=f'{y} = {inclinacao:.3g}·{x} + {intercepto:.3g}<extra></extra>'))
+    return fig
+
+
+def dispersao(tabela, x, y, chave, titulo=None, limite=LIMITE_PONTOS, tendencia=False, faixas=FAIXAS):
+    """Figura de y por x: px.scatter até `limite` linhas, histograma 2D acima disso.
+
+    `chave` identifica o estado dos filtros que gerou `tabela` (a mesma tupla
+    usada na assinatura do download, por exemplo); a figura, com a reta de
+    tendência quando pedida, fica guardada por ela, pelo número de linhas e
+    pelas somas de x e y.
+    """
+    impressao = (len(tabela), float(tabela[x].sum()), float(tabela[y].sum()))
+    chave_cache = (chave, x, y, titulo, limite, tendencia, faixas, impressao)
+    return _cache.obter(chave_cache, lambda: _figura(tabela, x, y, titulo, limite, tendencia, faixas))
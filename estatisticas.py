@@ -0,0 +1,238 @@
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_limitado import CacheLimitado
+
+# Estatísticas descritivas por faixa de uma coluna (painel "Estatísticas Descritivas").
+#
+# O IndiceEstatisticas ordena as linhas de cada grupo (weathersit) pela coluna da
+# faixa (temp) e guarda somas acumuladas e esboços KLL por bloco. Uma consulta
+# (grupos, início, fim) vira duas buscas binárias por grupo: contagem, média,
+# desvio e soma saem exatos das somas acumuladas e os quartis saem dos esboços.
+# Faixas com até LIMITE_EXATO linhas são resumidas exatamente, numa passada só.
+LIMITE_EXATO = int(os.environ.get('ESTATISTICAS_LIMITE_EXATO', 100_000))
+TAMANHO_BLOCO = 65_536
+PRECISAO_KLL = 200
+
+# Memória máxima (em bytes) para os resumos guardados por filtro
+MAX_BYTES = int(os.environ.get('ESTATISTICAS_MAX_BYTES', 8 * 1024 * 1024))
+
+# Um cache para todos os índices; cada índice tem um número próprio na chave, então
+# os resumos de um índice descartado (dados recarregados) só saem pelo LRU
+_cache = CacheLimitado('estatisticas', MAX_BYTES)
+_numeros = itertools.count()
+
+# Linhas do resumo (as do DataFrame.describe() e a soma)
+ESTATISTICAS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'sum']
+QUANTIS = [0.25, 0.5, 0.75]
+
+
+class KLL:
+    """Esboço KLL de quantis: guarda O(k) valores e erra o posto em cerca de 1,7/k.
+
+    Os valores do nível h valem 2**h linhas. Quando um nível passa da
+    capacidade, ele é ordenado e metade dos valores (os pares ou os ímpares,
+    por sorteio) sobe para o nível seguinte. Esboços podem ser somados (merge).
+    """
+
+    def __init__(self, k=PRECISAO_KLL, semente=0):
+        self.k = k
+        self.n = 0
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(semente)
+
+    def _capacidade(self, nivel):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.niveis) - 1 - nivel))))
+
+    def _compactar(self):
+        while True:
+            cheio = next((nivel for nivel, itens in enumerate(self.niveis) if len(itens) > self._capacidade(nivel)), None)
+            if cheio is None:
+                return
+            if cheio + 1 == len(self.niveis):
+                self.niveis.append(np.empty(0))
+            itens = np.sort(self.niveis[cheio])
+            sobra = len(itens) % 2
+            self.niveis[cheio] = itens[:sobra]
+            promovidos = itens[sobra + self._rng.integers(2)::2]
+            self.niveis[cheio + 1] = np.concatenate([self.niveis[cheio + 1], promovidos])
+
+    def atualizar(self, valores):
+        valores = np.asarray(valores, dtype='float64')
+        valores = valores[~np.isnan(valores)]
+        self.n += len(valores)
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self._compactar()
+        return self
+
+    def juntar(self, outro):
+        """Novo esboço com as linhas dos dois."""
+        juntos = KLL(self.k, semente=self._rng.integers(2 ** 32))
+        juntos.n = self.n + outro.n
+        altura = max(len(self.niveis), len(outro.niveis))
+        juntos.niveis = [np.concatenate([esboco.niveis[nivel] for esboco in (self, outro) if nivel < len(esboco.niveis)])
+                         for nivel in range(altura)]
+        juntos._compactar()
+        return juntos
+
+    def quantis(self, qs):
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        itens = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(len(itens_nivel), 2.0 ** nivel) for nivel, itens_nivel in enumerate(self.niveis)])
+        ordem = np.argsort(itens, kind='stable')
+        acumulado = np.cumsum(pesos[ordem])
+        posicoes = np.searchsorted(acumulado, np.asarray(qs) * acumulado[-1], side='left')
+        return itens[ordem][np.minimum(posicoes, len(itens) - 1)]
+
+
+def resumo(valores, colunas):
+    """Resumo exato (linhas ESTATISTICAS) de uma matriz linhas x colunas, numa passada por estatística.
+
+    Mínimo, quartis e máximo saem de um único np.partition (sem ordenar tudo);
+    os quartis usam a interpolação linear do describe().
+    """
+    valores = np.asarray(valores, dtype='float64')
+    resultado = pd.DataFrame(np.nan, index=ESTATISTICAS, columns=colunas)
+    for posicao, coluna in enumerate(colunas):
+        serie = valores[:, posicao]
+        serie = serie[~np.isnan(serie)]
+        n = len(serie)
+        resultado.loc['count', coluna] = n
+        resultado.loc['sum', coluna] = serie.sum()
+        if n == 0:
+            continue
+        media = serie.mean()
+        resultado.loc['mean', coluna] = media
+        resultado.loc['std', coluna] = np.sqrt(((serie - media) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+        posicoes = np.array(QUANTIS) * (n - 1)
+        inferiores, superiores = np.floor(posicoes).astype('int64'), np.ceil(posicoes).astype('int64')
+        particao = np.partition(serie, np.unique(np.r_[0, inferiores, superiores, n - 1]))
+        fracoes = posicoes - inferiores
+        resultado.loc[['25%', '50%', '75%'], coluna] = particao[inferiores] * (1 - fracoes) + particao[superiores] * fracoes
+        resultado.loc['min', coluna] = particao[0]
+        resultado.loc['max', coluna] = particao[n - 1]
+    return resultado
+
+
+class _Grupo:
+    """Linhas de um grupo ordenadas pela coluna da faixa, com somas acumuladas e esboços por bloco."""
+
+    def __init__(self, chaves, valores, centro):
+        self.chaves = chaves
+        self.valores = valores
+        # Somas acumuladas dos valores centrados (menos erro de arredondamento no desvio)
+        centrados = valores - centro
+        validos = ~np.isnan(valores)
+        self.contagens = np.vstack([np.zeros(valores.shape[1]), np.cumsum(validos, axis=0)])
+        self.somas = np.vstack([np.zeros(valores.shape[1]), np.nancumsum(centrados, axis=0)])
+        self.quadrados = np.vstack([np.zeros(valores.shape[1]), np.nancumsum(centrados ** 2, axis=0)])
+
+        # Mínimo, máximo e esboço de cada bloco; os esboços formam uma árvore de segmentos
+        blocos = range(0, len(chaves), TAMANHO_BLOCO)
+        self.minimos = np.array([np.nanmin(valores[inicio:inicio + TAMANHO_BLOCO], axis=0) for inicio in blocos])
+        self.maximos = np.array([np.nanmax(valores[inicio:inicio + TAMANHO_BLOCO], axis=0) for inicio in blocos])
+        self.folhas = 1
+        while self.folhas < len(blocos):
+            self.folhas *= 2
+        self.arvore = [[KLL() for _ in range(valores.shape[1])] for _ in range(2 * self.folhas)]
+        for bloco, inicio in enumerate(blocos):
+            self.arvore[self.folhas + bloco] = [KLL(semente=bloco).atualizar(valores[inicio:inicio + TAMANHO_BLOCO, coluna])
+                                               for coluna in range(valores.shape[1])]
+        for no in range(self.folhas - 1, 0, -1):
+            self.arvore[no] = [esquerdo.juntar(direito) for esquerdo, direito in zip(self.arvore[2 * no], self.arvore[2 * no + 1])]
+
+    def faixa(self, inicio, fim):
+        """Posições [i, j) das linhas com inicio <= chave <= fim."""
+        return (np.searchsorted(self.chaves, np.asarray(inicio, dtype=self.chaves.dtype), side='left'),
+                np.searchsorted(self.chaves, np.asarray(fim, dtype=self.chaves.dtype), side='right'))
+
+    def esbocos(self, primeiro, ultimo):
+        """Esboços que cobrem os blocos [primeiro, ultimo) (O(log) nós da árvore)."""
+        nos = []
+        esquerda, direita = primeiro + self.folhas, ultimo + self.folhas
+        while esquerda < direita:
+            if esquerda % 2:
+                nos.append(self.arvore[esquerda])
+                esquerda += 1
+            if direita % 2:
+                direita -= 1
+                nos.append(self.arvore[direita])
+            esquerda //= 2
+            direita //= 2
+        return nos
+
+
+class IndiceEstatisticas:
+    """Resumo de `colunas` para qualquer conjunto de grupos e faixa [início, fim] de `por`."""
+
+    def __init__(self, tabela, colunas, por, grupo):
+        self.colunas = list(colunas)
+        valores = tabela[self.colunas].to_numpy(dtype='float64')
+        self.centro = np.nan_to_num(np.nanmean(valores, axis=0)) if len(valores) else np.zeros(len(self.colunas))
+        self.grupos = {}
+        for valor, posicoes in tabela.groupby(grupo, observed=True, sort=False).indices.items():
+            ordem = posicoes[np.argsort(tabela[por].to_numpy()[posicoes], kind='stable')]
+            self.grupos[valor] = _Grupo(tabela[por].to_numpy()[ordem], valores[ordem], self.centro)
+        self._numero = next(_numeros)
+
+    def consultar(self, grupos, inicio, fim):
+        """DataFrame com as linhas ESTATISTICAS e uma coluna por coluna do índice.
+
+        Quando a faixa tem mais de LIMITE_EXATO linhas os quartis são
+        aproximados (attrs['aproximado'] fica True); o resto é sempre exato.
+        """
+        grupos = tuple(sorted(grupos, key=repr))
+        return _cache.obter((self._numero, grupos, inicio, fim), lambda: self._calcular(grupos, inicio, fim))
+
+    def _calcular(self, grupos, inicio, fim):
+        faixas = [(self.grupos[valor], *self.grupos[valor].faixa(inicio, fim)) for valor in grupos if valor in self.grupos]
+        total = sum(j - i for _, i, j in faixas)
+        if total <= LIMITE_EXATO:
+            linhas = [grupo.valores[i:j] for grupo, i, j in faixas]
+            resultado = resumo(np.concatenate(linhas) if linhas else np.empty((0, len(self.colunas))), self.colunas)
+            resultado.attrs['aproximado'] = False
+            return resultado
+
+        # Contagem, soma, média e desvio exatos pelas somas acumuladas
+        contagem = sum(grupo.contagens[j] - grupo.contagens[i] for grupo, i, j in faixas)
+        soma = sum(grupo.somas[j] - grupo.somas[i] for grupo, i, j in faixas)
+        quadrados = sum(grupo.quadrados[j] - grupo.quadrados[i] for grupo, i, j in faixas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_centrada = soma / contagem
+            desvio = np.sqrt(np.maximum(quadrados - contagem * media_centrada ** 2, 0) / (contagem - 1))
+
+        # Quartis, mínimo e máximo: blocos inteiros pelos esboços, pontas bloco a bloco
+        esbocos = [KLL() for _ in self.colunas]
+        minimos, maximos = [], []
+        for grupo, i, j in faixas:
+            if i >= j:
+                continue
+            primeiro, ultimo = -(-i // TAMANHO_BLOCO), j // TAMANHO_BLOCO
+            if primeiro < ultimo:
+                for no in grupo.esbocos(primeiro, ultimo):
+                    esbocos = [esboco.juntar(parte) for esboco, parte in zip(esbocos, no)]
+                minimos.append(np.nanmin(grupo.minimos[primeiro:ultimo], axis=0))
+                maximos.append(np.nanmax(grupo.maximos[primeiro:ultimo], axis=0))
+                pontas = [grupo.valores[i:primeiro * TAMANHO_BLOCO], grupo.valores[ultimo * TAMANHO_BLOCO:j]]
+            else:
+                pontas = [grupo.valores[i:j]]
+            for ponta in pontas:
+                if len(ponta):
+                    esbocos = [esboco.atualizar(ponta[:, coluna]) for coluna, esboco in enumerate(esbocos)]
+                    minimos.append(np.nanmin(ponta, axis=0))
+                    maximos.append(np.nanmax(ponta, axis=0))
+
+        resultado = pd.DataFrame(index=ESTATISTICAS, columns=self.colunas, dtype='float64')
+        resultado.loc['count'] = contagem
+        resultado.loc['mean'] = media_centrada + self.centro
+        resultado.loc['std'] = desvio
+        resultado.loc['min'] = np.nanmin(minimos, axis=0)
+        resultado.loc[['25%', '50%', '75%']] = np.column_stack([esboco.quantis(QUANTIS) for esboco in esbocos])
+        resultado.loc['max'] = np.nanmax(maximos, axis=0)
+        resultado.loc['sum'] = soma + contagem * self.centro
+        resultado.attrs['aproximado'] = True
+        return resultado
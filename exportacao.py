@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import importlib.util
+import io
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache_limitado import CacheLimitado
+
+# Linhas convertidas por vez: só um bloco de texto existe em memória durante a exportação
+TAMANHO_BLOCO = 50_000
+
+# Formatos de download: nome -> (mime, extensão)
+FORMATOS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+# Excel só aparece se o openpyxl estiver instalado
+if importlib.util.find_spec('openpyxl') is not None:
+    FORMATOS['xlsx'] = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx')
+
+# Memória máxima (em bytes) para os arquivos exportados guardados (chave = assinatura dos filtros)
+MAX_BYTES = int(os.environ.get('EXPORTACAO_MAX_BYTES', 256 * 1024 * 1024))
+
+_cache = CacheLimitado('exportacao', MAX_BYTES)
+
+
+# Linhas [inicio, inicio + quantidade) de um DataFrame, de uma Visao do motor_filtros.py ou das
+# Linhas de uma consulta do motor_colunar.py (copiadas só aqui)
+def _linhas(dados, inicio, quantidade):
+    if isinstance(dados, pd.DataFrame):
+        return dados.iloc[inicio:inicio + quantidade]
+    return dados.fatiar(inicio, quantidade)
+
+
+# Todas as linhas em blocos de até `tamanho_bloco`, na ordem dos dados
+def _blocos(dados, tamanho_bloco):
+    if isinstance(dados, pd.DataFrame):
+        return (dados.iloc[inicio:inicio + tamanho_bloco] for inicio in range(0, len(dados), tamanho_bloco))
+    return dados.blocos(tamanho_bloco)
+
+
+def blocos_csv(dados, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o CSV (UTF-8) em blocos de bytes, começando pelo cabeçalho."""
+    yield _linhas(dados, 0, 0).to_csv(index=False).encode('utf-8')
+    for bloco in _blocos(dados, tamanho_bloco):
+        yield bloco.to_csv(index=False, header=False).encode('utf-8')
+
+
+def escrever(dados, formato, destino, tamanho_bloco=TAMANHO_BLOCO):
+    """Escreve os dados (DataFrame ou Visao) no arquivo binário `destino`, bloco a bloco."""
+    if formato == 'csv':
+        for bloco in blocos_csv(dados, tamanho_bloco):
+            destino.write(bloco)
+    elif formato == 'csv.gz':
+        with gzip.GzipFile(fileobj=destino, mode='wb') as arquivo_gz:
+            for bloco in blocos_csv(dados, tamanho_bloco):
+                arquivo_gz.write(bloco)
+    elif formato == 'parquet':
+        # Esquema tirado do primeiro bloco (colunas object vazias não têm tipo)
+        esquema = pa.Table.from_pandas(_linhas(dados, 0, tamanho_bloco), preserve_index=False).schema
+        with pq.ParquetWriter(destino, esquema) as escritor:
+            for bloco in _blocos(dados, tamanho_bloco):
+                escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+    elif formato == 'xlsx':
+        from openpyxl import Workbook
+        # Planilha em modo write-only: cada linha vai para o arquivo ao ser acrescentada,
+        # então só um bloco de linhas existe em memória (a planilha inteira nunca é montada)
+        livro = Workbook(write_only=True)
+        planilha = livro.create_sheet('Sheet1')
+        planilha.append([str(coluna) for coluna in _linhas(dados, 0, 0).columns])
+        for bloco in _blocos(dados, tamanho_bloco):
+            # O Excel não tem NaN/NaT: valores nulos viram células vazias, como no to_excel
+            bloco = bloco.astype(object).where(bloco.notna(), None)
+            for linha in bloco.itertuples(index=False, name=None):
+                planilha.append(linha)
+        livro.save(destino)
+    else:
+        raise ValueError(f'Formato de exportação desconhecido: {formato}')
+
+
+def exportar(dados, formato='csv'):
+    """Arquivo exportado num io.BytesIO (um buffer só, preenchido em blocos), que o st.download_button aceita direto."""
+    destino = io.BytesIO()
+    escrever(dados, formato, destino)
+    destino.seek(0)
+    return destino
+
+
+def assinatura(*partes):
+    """Chave curta para os filtros/colunas que definem uma exportação."""
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def exportar_em_cache(chave, dados, formato='csv'):
+    """`dados` pode ser o DataFrame ou uma função que o devolve (chamada só se o arquivo não estiver guardado)."""
+    return _cache.obter((chave, formato), lambda: exportar(dados() if callable(dados) else dados, formato))
+
+
+def preparar_download(dados, formato, chave):
+    """Função para o `data` do st.download_button: o arquivo só é gerado quando o usuário clica."""
+    return lambda: exportar_em_cache(chave, dados, formato)
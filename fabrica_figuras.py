@@ -0,0 +1,48 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from cache_limitado import CacheLimitado
+
+# Memória máxima (em bytes) para as figuras guardadas
+MAX_BYTES = int(os.environ.get('FIGURAS_MAX_BYTES', 64 * 1024 * 1024))
+
+_cache = CacheLimitado('figuras', MAX_BYTES)
+
+
+def impressao(valor):
+    """Impressão digital de um valor usado para montar uma figura (tabelas pelo conteúdo)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series, pd.Index)):
+        resumo = hashlib.sha1()
+        resumo.update(pd.util.hash_pandas_object(valor, index=not isinstance(valor, pd.Index)).to_numpy().tobytes())
+        if isinstance(valor, pd.DataFrame):
+            resumo.update(repr((list(valor.columns), [str(tipo) for tipo in valor.dtypes], valor.index.names)).encode('utf-8'))
+        else:
+            resumo.update(repr((valor.name, str(valor.dtype))).encode('utf-8'))
+        return resumo.hexdigest()
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, impressao(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(impressao(item) for item in valor)
+    return repr(valor)
+
+
+def figura(funcao, tabela, layout=None, **parametros):
+    """`funcao(tabela, **parametros)` (px.bar, px.line, px.scatter_geo...) com `layout` aplicado.
+
+    A figura é guardada pela impressão digital da tabela e dos parâmetros:
+    enquanto os agregados não mudam, um rerun devolve a mesma figura sem
+    passar pelo Plotly Express. A figura devolvida é compartilhada entre as
+    sessões, então o layout vai por `layout=` e não por update_layout depois.
+    """
+    nome = f'{funcao.__module__}.{funcao.__qualname__}'
+    chave = (nome, impressao(tabela), impressao(parametros), impressao(layout or {}))
+
+    def construir():
+        fig = funcao(tabela, **parametros)
+        if layout:
+            fig.update_layout(**layout)
+        return fig
+
+    return _cache.obter(chave, construir)
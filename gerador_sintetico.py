@@ -0,0 +1,198 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from servidor_local import FIXTURE_PADRAO
+
+# Gerador de dados sintéticos para benchmarks: aluguel de bicicletas (diário ou por
+# hora, no formato do Bike_rent.csv) e vendas no formato da API labdados.
+#
+# Os dados saem em blocos de TAMANHO_BLOCO linhas e o bloco i usa o gerador
+# aleatório semeado com (semente, i), então o mesmo (tipo, linhas, semente) gera
+# sempre os mesmos dados, em memória ou gravado em arquivo.
+TAMANHO_BLOCO = 500_000
+
+INICIO_BIKE = pd.Timestamp('2018-01-01')
+# O calendário das bicicletas se repete a cada ANOS_BIKE anos: qualquer número de
+# linhas cabe nas datas (e em 'yr'); 'instant' continua único
+ANOS_BIKE = 10
+DIAS_BIKE = (INICIO_BIKE + pd.DateOffset(years=ANOS_BIKE) - INICIO_BIKE).days
+INICIO_VENDAS = pd.Timestamp('2020-01-01')
+DIAS_VENDAS = 4 * 365
+
+# Formato das datas quando o destino é CSV (o mesmo dos arquivos de origem)
+FORMATOS_DATA = {'bike_diario': '%d-%m-%Y', 'bike_horario': '%d-%m-%Y', 'vendas': '%d/%m/%Y'}
+
+# Perfil de uso ao longo do dia: picos de deslocamento para registrados, tarde para casuais
+_HORAS = np.arange(24)
+PERFIL_REGISTRADOS = 0.3 + 2.5 * np.exp(-0.5 * ((_HORAS - 8) / 1.2) ** 2) + 2.2 * np.exp(-0.5 * ((_HORAS - 17.5) / 1.5) ** 2) \
+    + 0.8 * np.exp(-0.5 * ((_HORAS - 13) / 3) ** 2)
+PERFIL_CASUAIS = 0.1 + np.exp(-0.5 * ((_HORAS - 14) / 3.5) ** 2)
+
+
+def _bloco_bike(rng, inicio, fim, por_hora):
+    passos = np.arange(inicio, fim)
+    if por_hora:
+        datas_hora = INICIO_BIKE + pd.to_timedelta(passos % (DIAS_BIKE * 24), unit='h')
+        hora = datas_hora.hour.to_numpy()
+        datas = datas_hora.normalize()
+    else:
+        datas = INICIO_BIKE + pd.to_timedelta(passos % DIAS_BIKE, unit='D')
+    n = len(passos)
+
+    mes = datas.month.to_numpy()
+    dia_semana = (datas.dayofweek.to_numpy() + 1) % 7  # 0 = domingo, como no Bike_rent.csv
+    feriado = rng.random(n) < 0.03
+    dia_util = (dia_semana >= 1) & (dia_semana <= 5) & ~feriado
+    estacao = (mes % 12) // 3 + 1
+    clima = rng.choice([1, 2, 3, 4], size=n, p=[0.63, 0.30, 0.065, 0.005])
+
+    temp = 20 - 9 * np.cos(2 * np.pi * (datas.dayofyear.to_numpy() - 15) / 365.25) + rng.normal(0, 2.5, n)
+    if por_hora:
+        temp += 3 * np.sin(2 * np.pi * (hora - 9) / 24)
+    umidade = np.clip(60 + 12 * (clima - 1) + rng.normal(0, 12, n), 0, 100)
+    vento = np.abs(rng.normal(12, 5, n))
+
+    efeito = np.clip(1 - 0.25 * (clima - 1), 0.1, 1) * np.clip((temp + 5) / 30, 0.1, 1.2)
+    taxa_registrados = np.where(dia_util, 3600, 2600) * efeito
+    taxa_casuais = np.where(dia_util, 600, 1500) * efeito
+    if por_hora:
+        taxa_registrados = taxa_registrados * PERFIL_REGISTRADOS[hora] / PERFIL_REGISTRADOS.sum()
+        taxa_casuais = taxa_casuais * PERFIL_CASUAIS[hora] / PERFIL_CASUAIS.sum()
+    casuais = rng.poisson(taxa_casuais).astype('int32')
+    registrados = rng.poisson(taxa_registrados).astype('int32')
+
+    colunas = {
+        'instant': (passos + 1).astype('int32'),
+        'dteday': datas,
+        'season': estacao.astype('int8'),
+        'yr': (datas.year.to_numpy() - INICIO_BIKE.year).astype('int16'),
+        'mnth': mes.astype('int8'),
+    }
+    if por_hora:
+        colunas['hr'] = hora.astype('int8')
+    colunas.update({
+        'holiday': feriado.astype('int8'),
+        'weekday': dia_semana.astype('int8'),
+        'workingday': dia_util.astype('int8'),
+        'weathersit': clima.astype('int8'),
+        'temp': temp.astype('float32'),
+        'atemp': (temp + rng.normal(1.5, 1.5, n)).astype('float32'),
+        'hum': umidade.astype('float32'),
+        'windspeed': vento.astype('float32'),
+        'casual': casuais,
+        'registered': registrados,
+        'cnt': casuais + registrados,
+    })
+    return pd.DataFrame(colunas)
+
+
+# Catálogo (produtos, vendedores, estados e formas de pagamento) tirado da fixture da API
+_catalogo = None
+
+
+def catalogo_vendas(caminho=FIXTURE_PADRAO):
+    global _catalogo
+    if _catalogo is None:
+        base = pd.read_json(caminho, orient='records', dtype=False)
+        produtos = base.groupby('Produto')[['Categoria do Produto']].first() \
+            .join(base.groupby('Produto')['Preço'].agg(['min', 'max']))
+        estados = base.groupby('Local da compra')[['lat', 'lon']].first()
+        pagamentos = base['Tipo de pagamento'].value_counts(normalize=True)
+        _catalogo = {
+            'produtos': produtos,
+            'categorias': pd.Index(sorted(produtos['Categoria do Produto'].unique())),
+            'vendedores': pd.Index(sorted(base['Vendedor'].unique())),
+            'estados': estados,
+            'pagamentos': pagamentos,
+        }
+    return _catalogo
+
+
+def _bloco_vendas(rng, inicio, fim):
+    catalogo = catalogo_vendas()
+    produtos, estados, pagamentos = catalogo['produtos'], catalogo['estados'], catalogo['pagamentos']
+    n = fim - inicio
+
+    produto = rng.integers(0, len(produtos), n)
+    preco = rng.uniform(produtos['min'].to_numpy()[produto], produtos['max'].to_numpy()[produto]).round(2)
+    estado = rng.integers(0, len(estados), n)
+    pagamento = rng.choice(len(pagamentos), size=n, p=pagamentos.to_numpy())
+    parcelado = pagamentos.index[pagamento] == 'cartao_credito'
+
+    return pd.DataFrame({
+        'Produto': pd.Categorical.from_codes(produto, produtos.index),
+        'Categoria do Produto': pd.Categorical(produtos['Categoria do Produto'].to_numpy()[produto], categories=catalogo['categorias']),
+        'Preço': preco,
+        'Frete': (preco * rng.uniform(0.01, 0.07, n)).round(2),
+        'Data da Compra': INICIO_VENDAS + pd.to_timedelta(rng.integers(0, DIAS_VENDAS, n), unit='D'),
+        'Vendedor': pd.Categorical.from_codes(rng.integers(0, len(catalogo['vendedores']), n), catalogo['vendedores']),
+        'Local da compra': pd.Categorical.from_codes(estado, estados.index),
+        'Avaliação da compra': rng.choice(np.arange(1, 6), size=n, p=[0.06, 0.06, 0.13, 0.3, 0.45]),
+        'Tipo de pagamento': pd.Categorical.from_codes(pagamento, pagamentos.index),
+        'Quantidade de parcelas': np.where(parcelado, rng.integers(1, 25, n), 1),
+        'lat': estados['lat'].to_numpy()[estado],
+        'lon': estados['lon'].to_numpy()[estado],
+    })
+
+
+GERADORES = {
+    'bike_diario': lambda rng, inicio, fim: _bloco_bike(rng, inicio, fim, por_hora=False),
+    'bike_horario': lambda rng, inicio, fim: _bloco_bike(rng, inicio, fim, por_hora=True),
+    'vendas': _bloco_vendas,
+}
+
+
+def blocos(tipo, linhas, semente=0):
+    """Gera os dados em DataFrames de até TAMANHO_BLOCO linhas."""
+    gerador = GERADORES[tipo]
+    for numero, inicio in enumerate(range(0, linhas, TAMANHO_BLOCO)):
+        rng = np.random.default_rng([semente, numero])
+        yield gerador(rng, inicio, min(inicio + TAMANHO_BLOCO, linhas))
+
+
+def gerar(tipo, linhas, semente=0):
+    """Os dados inteiros em memória (para tamanhos que cabem nela)."""
+    return pd.concat(blocos(tipo, linhas, semente), ignore_index=True)
+
+
+def escrever(tipo, linhas, destino, semente=0):
+    """Grava os dados em `destino` bloco a bloco (.parquet, .csv ou .csv.gz). Retorna o número de linhas."""
+    if destino.endswith('.parquet'):
+        escritor = None
+        try:
+            for bloco in blocos(tipo, linhas, semente):
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(destino, tabela.schema)
+                escritor.write_table(tabela.cast(escritor.schema))
+        finally:
+            if escritor is not None:
+                escritor.close()
+    elif destino.endswith(('.csv', '.csv.gz')):
+        modo = 'w'
+        for bloco in blocos(tipo, linhas, semente):
+            bloco.to_csv(destino, mode=modo, header=modo == 'w', index=False, date_format=FORMATOS_DATA[tipo])
+            modo = 'a'
+    else:
+        raise ValueError(f'Extensão não suportada: {destino}')
+    return linhas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos de bicicletas ou de vendas')
+    parser.add_argument('tipo', choices=list(GERADORES))
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('destino', help='arquivo .parquet, .csv ou .csv.gz')
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    pasta = os.path.dirname(args.destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    escrever(args.tipo, args.linhas, args.destino, args.semente)
+    print(f'{args.linhas:,} linhas de {args.tipo} gravadas em {args.destino}')
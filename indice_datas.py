@@ -0,0 +1,86 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from versao_dados import por_dataframe
+
+
+class IndiceDatas:
+    """Índice de meses sobre vendas ordenadas por 'Data da Compra'.
+
+    Guarda em que linha começa cada mês e as somas acumuladas de Preço, então
+    uma janela de datas são duas buscas binárias e um fatiamento, e a receita
+    ou a quantidade de vendas de cada mês sai da diferença das somas
+    acumuladas, sem percorrer as linhas.
+    """
+
+    def __init__(self, dados):
+        # Referência fraca: o índice fica no cache do versao_dados.py e não pode segurar os dados vivos
+        self._dados = weakref.ref(dados)
+        self.linhas = len(dados)
+        datas = dados['Data da Compra'].to_numpy()
+        # sort_values deixa NaT no fim; o índice cobre só as datas válidas
+        self.n = int(len(datas) - np.isnat(datas).sum())
+        self.datas = datas[:self.n]
+
+        if self.n:
+            self.meses = np.arange(self.datas[0].astype('datetime64[M]'), self.datas[-1].astype('datetime64[M]') + 1)
+        else:
+            self.meses = np.array([], dtype='datetime64[M]')
+        self.inicio_mes = np.append(np.searchsorted(self.datas, self.meses.astype(self.datas.dtype), side='left'), self.n)
+
+        preco = dados['Preço'].to_numpy()[:self.n]
+        presentes = ~np.isnan(preco)
+        self.soma_preco = np.concatenate([[0.0], np.cumsum(np.where(presentes, preco, 0.0))])
+        self.soma_vendas = np.concatenate([[0], np.cumsum(presentes)])
+
+    @property
+    def dados(self):
+        dados = self._dados()
+        if dados is None:
+            raise ReferenceError('Os dados deste índice já foram descartados')
+        return dados
+
+    @staticmethod
+    def ordenado(dados):
+        datas = dados['Data da Compra']
+        n = len(datas) - int(datas.isna().sum())
+        return datas.iloc[:n].is_monotonic_increasing and datas.iloc[n:].isna().all()
+
+    def limites(self, inicio, fim):
+        """Posições [esquerda, direita) das vendas com inicio <= data <= fim."""
+        inicio = np.datetime64(pd.Timestamp(inicio), 'ns')
+        fim = np.datetime64(pd.Timestamp(fim), 'ns')
+        return np.searchsorted(self.datas, inicio, side='left'), np.searchsorted(self.datas, fim, side='right')
+
+    def janela(self, inicio, fim):
+        """Vendas entre as duas datas (inclusive), como fatia do DataFrame original."""
+        esquerda, direita = self.limites(inicio, fim)
+        return self.dados.iloc[esquerda:direita]
+
+    def codigos_mes(self):
+        """Código do mês (posição em self.meses) de cada linha; -1 para data nula."""
+        codigos = np.full(self.linhas, -1, dtype=np.int64)
+        codigos[:self.n] = np.repeat(np.arange(len(self.meses)), np.diff(self.inicio_mes))
+        return codigos
+
+    def fim_dos_meses(self):
+        return pd.DatetimeIndex(((self.meses + 1).astype('datetime64[D]') - 1).astype('datetime64[ns]'))
+
+    def mensal(self, medida='Preço'):
+        """Tabela mensal no formato do pd.Grouper(freq='M'): receita ('Preço') ou quantidade ('Quantidade')."""
+        acumulada = self.soma_preco if medida == 'Preço' else self.soma_vendas
+        valores = acumulada[self.inicio_mes[1:]] - acumulada[self.inicio_mes[:-1]]
+        tabela = pd.DataFrame({'Data da Compra': self.fim_dos_meses(), 'Preço': valores})
+        tabela['Ano'] = tabela['Data da Compra'].dt.year
+        tabela['Mes'] = tabela['Data da Compra'].dt.month_name()
+        return tabela
+
+
+@por_dataframe
+def obter_indice(dados):
+    """Índice de datas do DataFrame, ou None se ele não estiver ordenado por data."""
+    if not IndiceDatas.ordenado(dados):
+        return None
+    return IndiceDatas(dados)
@@ -0,0 +1,226 @@
+import datetime
+import importlib.util
+import numbers
+import os
+import threading
+
+import pandas as pd
+
+from motor_filtros import obter_motor as obter_motor_filtros
+from versao_dados import versao as versao_conteudo
+
+# Motor de consultas colunar (DuckDB, opcional) para as páginas de dados brutos.
+#
+# As tabelas ficam num banco DuckDB em memória: um DataFrame (as vendas, as
+# bicicletas) é lido direto da memória do pandas, sem cópia, e um arquivo Parquet
+# vira uma tabela do banco, recarregada quando o arquivo muda. Os filtros dos widgets viram SQL
+# com parâmetros; a contagem e os filtros rodam em várias threads e só a página
+# mostrada na tela (já ordenada no banco) sai dele; o resto só no download.
+#
+# MOTOR_CONSULTAS escolhe o motor: 'pandas' (o padrão, com o motor_filtros.py),
+# 'duckdb' ou 'auto' (DuckDB se estiver instalado). O DuckDB é opcional e fica fora
+# do requirements.txt: nas vendas da API o pandas é mais rápido (benchmark_consultas.py),
+# e ele só compensa com tabelas grandes.
+DISPONIVEL = importlib.util.find_spec('duckdb') is not None
+MOTOR = os.environ.get('MOTOR_CONSULTAS', 'pandas')
+
+# Linhas por vetor do DuckDB (a unidade dos lotes lidos na exportação)
+VETOR_DUCKDB = 2048
+
+
+def ativo():
+    """Se as consultas passam pelo DuckDB."""
+    return MOTOR == 'duckdb' or (MOTOR == 'auto' and DISPONIVEL)
+
+
+class Resultado:
+    """Resultado de uma consulta: o total de linhas, páginas dele (para a tela) e tudo sob demanda.
+
+    `fatiar(inicio, quantidade, ordenar_por, crescente)` devolve só as linhas
+    pedidas, na ordem pedida; `materializar()` devolve todas sem copiá-las (a
+    Visao do motor_filtros.py ou as Linhas de uma consulta do DuckDB), e o
+    exportacao.py as lê em blocos.
+    """
+
+    def __init__(self, total, colunas, fatiar, materializar, versao=None):
+        self.total = total
+        self.colunas = list(colunas)
+        # Versão dos dados consultados (para as chaves de cache de páginas e downloads)
+        self.versao = versao
+        self._fatiar = fatiar
+        self._materializar = materializar
+
+    @classmethod
+    def de_visao(cls, visao):
+        """Resultado de uma Visao do motor_filtros.py (o caminho do pandas): nada é copiado antes da tela ou do download."""
+        return cls(len(visao), visao.colunas, visao.fatiar, lambda: visao, versao_conteudo(visao.dados))
+
+    @classmethod
+    def de_dataframe(cls, dados):
+        """Resultado com todas as linhas de um DataFrame que já está em memória."""
+        return cls.de_visao(obter_motor_filtros(dados).visao([]))
+
+    def janela(self, inicio, quantidade, ordenar_por=None, crescente=True):
+        """As linhas [inicio, inicio + quantidade) do resultado, ordenado por `ordenar_por` se informado."""
+        return self._fatiar(inicio, quantidade, ordenar_por, crescente)
+
+    def tudo(self):
+        return self._materializar()
+
+
+class Linhas:
+    """Todas as linhas de uma consulta do DuckDB, lidas só na exportação (como a Visao do motor_filtros.py).
+
+    `blocos` roda a consulta uma vez e entrega lotes de registros do banco,
+    então só um bloco existe no Python de cada vez.
+    """
+
+    def __init__(self, total, colunas, fatiar, blocos):
+        self.total = total
+        self.colunas = list(colunas)
+        self.fatiar = fatiar
+        self.blocos = blocos
+
+    def __len__(self):
+        return self.total
+
+
+def _identificador(nome):
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _parametro(valor):
+    if isinstance(valor, datetime.date) and not isinstance(valor, datetime.datetime):
+        return pd.Timestamp(valor).to_pydatetime()
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if isinstance(valor, numbers.Integral):
+        return int(valor)
+    if isinstance(valor, numbers.Real):
+        return float(valor)
+    return valor
+
+
+def compilar(predicados):
+    """(where, parametros) para uma lista de (coluna, tipo, valor) como a do motor_filtros.py.
+
+    tipo 'lista' vira IN (lista vazia não deixa passar nada), 'intervalo' vira
+    BETWEEN e 'ano' compara o ano de uma coluna de data.
+    """
+    condicoes, parametros = [], []
+    for coluna, tipo, valor in predicados:
+        if tipo == 'lista':
+            valores = list(valor)
+            if not valores:
+                condicoes.append('FALSE')
+                continue
+            condicoes.append(f'{_identificador(coluna)} IN ({", ".join("?" * len(valores))})')
+            parametros += [_parametro(item) for item in valores]
+        elif tipo == 'intervalo':
+            condicoes.append(f'{_identificador(coluna)} BETWEEN ? AND ?')
+            parametros += [_parametro(valor[0]), _parametro(valor[1])]
+        elif tipo == 'ano':
+            condicoes.append(f'year({_identificador(coluna)}) = ?')
+            parametros.append(int(valor))
+        else:
+            raise ValueError(f'Tipo de filtro desconhecido: {tipo}')
+    return (' AND '.join(condicoes) or 'TRUE'), parametros
+
+
+class MotorColunar:
+    """Banco DuckDB em memória com as tabelas registradas pelas páginas."""
+
+    def __init__(self):
+        import duckdb
+        self._conexao = duckdb.connect()
+        self._versoes = {}
+        self._dataframes = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, origem):
+        """Registra `origem` (caminho de um Parquet ou DataFrame) como a tabela `nome`."""
+        with self._trava:
+            if isinstance(origem, pd.DataFrame):
+                self._dataframes[nome] = origem
+                self._versoes[nome] = versao_conteudo(origem)
+                return
+            versao = (origem, os.path.getmtime(origem))
+            if self._versoes.get(nome) != versao:
+                self._conexao.execute(f'CREATE OR REPLACE TABLE {_identificador(nome)} AS SELECT * FROM read_parquet(?)',
+                                      [origem])
+                self._versoes[nome] = versao
+                self._dataframes.pop(nome, None)
+
+    def _cursor(self):
+        # Cada consulta usa o seu cursor (conexões DuckDB não são compartilhadas entre threads)
+        with self._trava:
+            cursor = self._conexao.cursor()
+            for nome, dados in self._dataframes.items():
+                cursor.register(nome, dados)
+        return cursor
+
+    def consultar(self, nome, predicados, colunas):
+        """Resultado das linhas de `nome` que passam nos predicados, só com `colunas` (na ordem da tabela).
+
+        Só a contagem roda aqui; cada página é uma consulta com LIMIT/OFFSET
+        (e ORDER BY quando a tabela é ordenada), feita quando é pedida.
+        """
+        where, parametros = compilar(predicados)
+        selecao = ', '.join(_identificador(coluna) for coluna in colunas) or 'NULL AS sem_colunas'
+        # As linhas são numeradas antes do filtro: _linha é a posição na tabela inteira, e vira o
+        # rótulo do índice original (DataFrame) ou a posição no arquivo (Parquet), como no pandas
+        numeradas = f'(SELECT *, row_number() OVER () - 1 AS _linha FROM {_identificador(nome)}) AS numeradas'
+        consulta = f'SELECT {selecao}, _linha FROM {numeradas} WHERE {where}'
+        versao = self._versoes.get(nome)
+        origem = self._dataframes.get(nome)
+        rotulos = origem.index if origem is not None else None
+        total = self._cursor().execute(f'SELECT count(*) FROM {_identificador(nome)} WHERE {where}',
+                                       parametros).fetchone()[0]
+
+        def com_rotulos(linhas):
+            posicoes = linhas.pop('_linha').to_numpy()
+            linhas.index = rotulos[posicoes] if rotulos is not None else pd.Index(posicoes)
+            return linhas[list(colunas)]
+
+        def fatiar(inicio, quantidade, ordenar_por=None, crescente=True):
+            # A posição da linha desempata a ordenação (páginas estáveis, como no pandas)
+            ordem = '_linha'
+            if ordenar_por is not None:
+                ordem = f'{_identificador(ordenar_por)} {"ASC" if crescente else "DESC"} NULLS LAST, _linha'
+            return com_rotulos(self._cursor().execute(
+                f'{consulta} ORDER BY {ordem} LIMIT {int(quantidade)} OFFSET {int(inicio)}', parametros).df())
+
+        def blocos(tamanho_bloco):
+            # Sem ORDER BY: o DuckDB mantém a ordem da tabela (preserve_insertion_order) e nada é ordenado de uma vez.
+            # fetch_df_chunk converte como o .df() das páginas, em lotes de vetores de VETOR_DUCKDB linhas
+            cursor = self._cursor().execute(consulta, parametros)
+            while True:
+                lote = cursor.fetch_df_chunk(max(1, tamanho_bloco // VETOR_DUCKDB))
+                if lote.empty:
+                    return
+                yield com_rotulos(lote)
+
+        return Resultado(total, colunas, fatiar, lambda: Linhas(total, colunas, fatiar, blocos), versao)
+
+    def agregar(self, nome, predicados, grupos, medidas):
+        """SELECT grupos, medidas ... GROUP BY grupos; `medidas` é {nome: expressão SQL}."""
+        where, parametros = compilar(predicados)
+        selecao = [_identificador(grupo) for grupo in grupos] + [f'{expressao} AS {_identificador(medida)}'
+                                                                  for medida, expressao in medidas.items()]
+        consulta = f'SELECT {", ".join(selecao)} FROM {_identificador(nome)} WHERE {where}'
+        if grupos:
+            consulta += f' GROUP BY ALL ORDER BY {", ".join(_identificador(grupo) for grupo in grupos)}'
+        return self._cursor().execute(consulta, parametros).df()
+
+
+_motor = None
+_trava_motor = threading.Lock()
+
+
+def obter_motor():
+    """O motor do processo (criado na primeira consulta)."""
+    global _motor
+    with _trava_motor:
+        if _motor is None:
+            _motor = MotorColunar()
+        return _motor
@@ -0,0 +1,202 @@
+import numbers
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from indice_datas import obter_indice
+from versao_dados import por_dataframe
+
+# Colunas com filtro de intervalo que usam índice ordenado + busca binária
+COLUNAS_ORDENADAS = ['Preço', 'Frete', 'Data da Compra']
+
+# Quantas máscaras guardar por filtro (valores diferentes do mesmo widget)
+MASCARAS_POR_FILTRO = 2
+
+
+# Normaliza o valor do widget para servir de chave do cache de máscaras
+def _chave_valor(tipo, valor):
+    if tipo == 'lista':
+        return frozenset(valor)
+    return tuple(pd.Timestamp(v) if not isinstance(v, numbers.Number) else v for v in valor)
+
+
+class Visao:
+    """Linhas (máscara) e colunas de um DataFrame, sem copiar os dados.
+
+    Filtrar e escolher colunas só guardam a máscara e a lista; as linhas saem
+    do DataFrame original quando alguém pede uma página (`fatiar`), um bloco
+    (`blocos`, usados na exportação) ou tudo (`materializar`), e sempre só com
+    as colunas escolhidas.
+    """
+
+    def __init__(self, motor, mascara=None, colunas=None):
+        self.motor = motor
+        # A visão segura os dados (o motor não): ela vive só enquanto a página ou o download a usa
+        self.dados = motor.dados
+        self.mascara = mascara
+        self.colunas = list(self.dados.columns) if colunas is None else list(colunas)
+        self._posicoes = None
+        self._ordens = {}
+
+    # Posições das linhas que passaram nos filtros (calculadas uma vez)
+    def posicoes(self):
+        if self._posicoes is None and self.mascara is not None:
+            self._posicoes = np.flatnonzero(self.mascara)
+        return self._posicoes
+
+    def __len__(self):
+        return len(self.dados) if self.mascara is None else len(self.posicoes())
+
+    def projetar(self, colunas):
+        """A mesma seleção de linhas só com `colunas` (nada é copiado)."""
+        visao = Visao(self.motor, self.mascara, colunas)
+        visao._posicoes = self._posicoes
+        return visao
+
+    def _ordem(self, coluna, crescente):
+        ordem = self._ordens.get((coluna, crescente))
+        if ordem is None:
+            # A ordem de todas as linhas fica no motor; aqui só ficam as que passaram nos filtros
+            ordem = self.motor.ordem(coluna, crescente)
+            if self.mascara is not None:
+                ordem = ordem[self.mascara[ordem]]
+            self._ordens[(coluna, crescente)] = ordem
+        return ordem
+
+    def fatiar(self, inicio, quantidade, ordenar_por=None, crescente=True):
+        """DataFrame com as linhas [inicio, inicio + quantidade), ordenadas por `ordenar_por` se informado."""
+        if ordenar_por is not None:
+            linhas = self._ordem(ordenar_por, crescente)[inicio:inicio + quantidade]
+        elif self.mascara is None:
+            linhas = slice(inicio, inicio + quantidade)
+        else:
+            linhas = self.posicoes()[inicio:inicio + quantidade]
+        return self.dados.iloc[linhas, self.dados.columns.get_indexer(self.colunas)]
+
+    def blocos(self, tamanho_bloco):
+        """DataFrames de até `tamanho_bloco` linhas, na ordem dos dados (só um existe de cada vez)."""
+        for inicio in range(0, len(self), tamanho_bloco):
+            yield self.fatiar(inicio, tamanho_bloco)
+
+    def materializar(self):
+        """Todas as linhas como DataFrame (o próprio DataFrame quando não há filtro nem projeção)."""
+        if self.mascara is None and self.colunas == list(self.dados.columns):
+            return self.dados
+        return self.fatiar(0, len(self))
+
+
+class MotorFiltros:
+    """Filtros da página de dados brutos com uma máscara booleana em cache por predicado.
+
+    Quando um widget muda só a máscara daquele filtro é recalculada; as
+    outras vêm do cache e o resultado é o AND de todas. Filtros de lista
+    usam os códigos inteiros das colunas categóricas e os de intervalo em
+    Preço, Frete e Data da Compra usam um índice ordenado com busca binária.
+    """
+
+    def __init__(self, dados):
+        # Referência fraca: o motor fica no cache do versao_dados.py e não pode segurar os dados vivos
+        self._dados = weakref.ref(dados)
+        self._mascaras = {}
+        self._indices = {}
+        self._ordens = {}
+        self._trava = threading.Lock()
+
+    @property
+    def dados(self):
+        dados = self._dados()
+        if dados is None:
+            raise ReferenceError('Os dados deste motor de filtros já foram descartados')
+        return dados
+
+    # Índice ordenado da coluna (calculado na primeira vez que o filtro é usado)
+    def _indice(self, coluna):
+        indice = self._indices.get(coluna)
+        if indice is None:
+            valores = self.dados[coluna].to_numpy()
+            ordem = np.argsort(valores, kind='stable')
+            indice = (ordem, valores[ordem])
+            self._indices[coluna] = indice
+        return indice
+
+    def _mascara_lista(self, coluna, selecionados):
+        serie = self.dados[coluna]
+        if not isinstance(serie.dtype, pd.CategoricalDtype):
+            return serie.isin(selecionados).to_numpy()
+        # Tabela de consulta por código; a última posição atende o código -1 (nulo)
+        tabela = np.zeros(len(serie.cat.categories) + 1, dtype=bool)
+        codigos = serie.cat.categories.get_indexer(list(selecionados))
+        tabela[codigos[codigos >= 0]] = True
+        return tabela[serie.cat.codes.to_numpy()]
+
+    def _mascara_intervalo(self, coluna, inicio, fim):
+        if coluna not in COLUNAS_ORDENADAS:
+            valores = self.dados[coluna].to_numpy()
+            return (valores >= inicio) & (valores <= fim)
+        if coluna == 'Data da Compra':
+            # Dados já ordenados por data (padrão do carregador): a janela é uma fatia contínua
+            indice_datas = obter_indice(self.dados)
+            if indice_datas is not None:
+                esquerda, direita = indice_datas.limites(inicio, fim)
+                mascara = np.zeros(len(self.dados), dtype=bool)
+                mascara[esquerda:direita] = True
+                return mascara
+        ordem, ordenados = self._indice(coluna)
+        if coluna == 'Data da Compra':
+            inicio, fim = np.datetime64(inicio, 'ns'), np.datetime64(fim, 'ns')
+        esquerda = np.searchsorted(ordenados, inicio, side='left')
+        direita = np.searchsorted(ordenados, fim, side='right')
+        mascara = np.zeros(len(ordenados), dtype=bool)
+        mascara[ordem[esquerda:direita]] = True
+        return mascara
+
+    def _calcular(self, coluna, tipo, chave):
+        if tipo == 'lista':
+            return self._mascara_lista(coluna, chave)
+        return self._mascara_intervalo(coluna, chave[0], chave[1])
+
+    def mascara(self, coluna, tipo, valor):
+        """Máscara de um predicado, do cache quando o valor do widget não mudou."""
+        chave = _chave_valor(tipo, valor)
+        with self._trava:
+            cache = self._mascaras.setdefault(coluna, {})
+            mascara = cache.pop(chave, None)
+            if mascara is not None:
+                cache[chave] = mascara
+        if mascara is None:
+            mascara = self._calcular(coluna, tipo, chave)
+            with self._trava:
+                cache[chave] = mascara
+                while len(cache) > MASCARAS_POR_FILTRO:
+                    del cache[next(iter(cache))]
+        return mascara
+
+    def ordem(self, coluna, crescente=True):
+        """Posições de todas as linhas ordenadas por `coluna` (estável, nulos no fim), guardadas por coluna."""
+        ordem = self._ordens.get((coluna, crescente))
+        if ordem is None:
+            ordem = self.dados[coluna].reset_index(drop=True) \
+                .sort_values(ascending=crescente, kind='stable', na_position='last').index.to_numpy()
+            with self._trava:
+                self._ordens[(coluna, crescente)] = ordem
+        return ordem
+
+    def visao(self, predicados):
+        """Visao das linhas que passam em todos os (coluna, tipo, valor): só o AND das máscaras."""
+        resultado = None
+        for coluna, tipo, valor in predicados:
+            mascara = self.mascara(coluna, tipo, valor)
+            resultado = mascara.copy() if resultado is None else np.logical_and(resultado, mascara, out=resultado)
+        return Visao(self, resultado)
+
+    def filtrar(self, predicados):
+        """Aplica uma lista de (coluna, tipo, valor) e devolve as linhas que passam em todos."""
+        return self.visao(predicados).materializar()
+
+
+@por_dataframe
+def obter_motor(dados):
+    """Motor de filtros do DataFrame (um por versão dos dados)."""
+    return MotorFiltros(dados)
@@ -0,0 +1,27 @@
+import streamlit as st
+
+# Chave da fila de avisos no st.session_state
+CHAVE_FILA = '_notificacoes'
+
+# Segundos que o aviso fica na tela (o navegador some com ele sozinho)
+DURACAO_PADRAO = 5
+
+
+def notificar(mensagem, icone=None, duracao=DURACAO_PADRAO, sessao=None):
+    """Coloca um aviso na fila da sessão e retorna na hora.
+
+    Pode ser usada como callback (on_click) de botões: nada de time.sleep, então
+    a thread do script fica livre. O aviso é mostrado por exibir_notificacoes()
+    no próximo rerun.
+    """
+    sessao = st.session_state if sessao is None else sessao
+    sessao.setdefault(CHAVE_FILA, []).append((mensagem, icone, duracao))
+
+
+def exibir_notificacoes(sessao=None):
+    """Mostra os avisos pendentes como toast; chamar uma vez por execução da página."""
+    sessao = st.session_state if sessao is None else sessao
+    fila = sessao.get(CHAVE_FILA)
+    while fila:
+        mensagem, icone, duracao = fila.pop(0)
+        st.toast(mensagem, icon=icone, duration=duracao)
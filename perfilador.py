@@ -0,0 +1,263 @@
+import cProfile
+import functools
+import importlib.util
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import requests
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+import carregador_bike
+import carregador_vendas
+import cubo_vendas
+import motor_colunar
+import pipeline_bike_horario
+import planejador_consultas
+import snapshot_vendas
+
+# Perfil por execução (rerun) das páginas: tempo e memória de cada etapa.
+#
+# Ligado para todas as execuções com a variável de ambiente PERFILADOR=1. Com
+# PERFILADOR=url cada sessão pode ligar o próprio perfil com ?perfil=1 na URL;
+# sem a variável o parâmetro da URL é ignorado (o perfil custa tempo e memória
+# para o processo inteiro e não deve ficar ao alcance de qualquer visitante). As
+# páginas chamam iniciar() no começo e finalizar() no fim; as funções de ETAPAS
+# são embrulhadas uma vez no processo e só medem quando a execução atual está
+# sendo perfilada. Com PERFILADOR_LOG=arquivo.jsonl cada execução vira uma linha
+# nesse arquivo.
+MODO = os.environ.get('PERFILADOR', '')
+ATIVO_POR_PADRAO = MODO in ('1', 'true')
+ATIVAVEL_PELA_URL = MODO == 'url'
+ARQUIVO_LOG = os.environ.get('PERFILADOR_LOG', '')
+
+# Etapa -> funções medidas (objeto, nome do atributo)
+ETAPAS = {
+    'rede': [(requests, 'get')],
+    'carga': [(carregador_vendas, 'carregar_vendas'), (planejador_consultas, 'carregar_vendas'),
+              (carregador_bike, 'carregar_bike'), (pipeline_bike_horario, 'ler_agregado'), (pipeline_bike_horario, 'ler_detalhe')],
+    'transformacao': [(snapshot_vendas, 'tipar')],
+    'filtro': [(planejador_consultas, 'consultar_visao'), (motor_colunar.MotorColunar, 'consultar')],
+    'agregacao': [(cubo_vendas, 'obter_cubo')] + [
+        (cubo_vendas.CuboVendas, nome) for nome in ['filtrar_vendedores', 'receita_estados', 'vendas_estados', 'receita_mensal',
+                                                    'vendas_mensal', 'receita_categorias', 'vendas_categorias', 'vendedores']],
+    'figuras': [(px, nome) for nome in ['scatter_geo', 'line', 'bar', 'pie', 'box', 'scatter', 'histogram']],
+    'render': [(st, 'plotly_chart'), (st, 'dataframe'), (DeltaGenerator, 'plotly_chart'), (DeltaGenerator, 'dataframe')],
+}
+
+# Perfiladores completos que podem ser pedidos para uma execução
+CAPTURAS = ['cProfile'] + (['pyinstrument'] if importlib.util.find_spec('pyinstrument') is not None else [])
+CHAVE_CAPTURA = '_perfilador_captura'
+
+_local = threading.local()
+_medidor_global = None
+_instalado = False
+_trava = threading.Lock()
+# Medidores das execuções perfiladas em andamento; execuções interrompidas somem com a thread
+_medidores_ativos = weakref.WeakSet()
+_tracemalloc_proprio = False
+
+
+class Medidor:
+    """Soma o tempo e a memória de cada etapa.
+
+    O tempo é exclusivo: quando uma etapa chama outra (consultar chama
+    carregar_vendas), o tempo da interna não entra na externa; o mesmo vale
+    para a memória alocada (diferença do tracemalloc entre o início e o fim).
+    O pico é o maior uso de memória acima do início da etapa. Sem o
+    tracemalloc ligado as medidas de memória ficam em zero.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+        self._pilha = []
+
+    def coletar(self):
+        """Devolve as medidas acumuladas e recomeça do zero."""
+        etapas, self.etapas = self.etapas, {}
+        return etapas
+
+    def entrar(self, etapa):
+        atual, pico = tracemalloc.get_traced_memory()
+        if self._pilha:
+            self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+        self._pilha.append({'etapa': etapa, 'inicio': time.perf_counter(), 'memoria': atual, 'pico': atual,
+                            'filhos': 0.0, 'filhos_memoria': 0})
+
+    def sair(self):
+        quadro = self._pilha.pop()
+        duracao = time.perf_counter() - quadro['inicio']
+        atual, pico = tracemalloc.get_traced_memory()
+        quadro['pico'] = max(quadro['pico'], pico)
+        alocado = atual - quadro['memoria']
+        total = self.etapas.setdefault(quadro['etapa'], {'segundos': 0.0, 'chamadas': 0, 'pico_mb': 0.0, 'alocado_mb': 0.0})
+        total['segundos'] += duracao - quadro['filhos']
+        total['chamadas'] += 1
+        total['pico_mb'] = max(total['pico_mb'], (quadro['pico'] - quadro['memoria']) / 1024 ** 2)
+        total['alocado_mb'] += (alocado - quadro['filhos_memoria']) / 1024 ** 2
+        if self._pilha:
+            self._pilha[-1]['filhos'] += duracao
+            self._pilha[-1]['filhos_memoria'] += alocado
+            self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], quadro['pico'])
+
+    def embrulhar(self, etapa, funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            self.entrar(etapa)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.sair()
+        return medida
+
+
+# Medidor da execução atual: o da thread do script ou o global (benchmark_dashboards.py)
+def _atual():
+    if getattr(_local, 'ignorada', False):
+        return None
+    return getattr(_local, 'medidor', None) or _medidor_global
+
+
+def ignorar_thread():
+    """Deixa a thread atual fora das medidas (threads de fundo, como a pré-carga das abas)."""
+    _local.ignorada = True
+
+
+def _gancho(etapa, funcao):
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        medidor = _atual()
+        if medidor is None:
+            return funcao(*args, **kwargs)
+        medidor.entrar(etapa)
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            medidor.sair()
+    return medida
+
+
+def instalar():
+    """Embrulha as funções de ETAPAS (uma vez por processo)."""
+    global _instalado
+    with _trava:
+        if _instalado:
+            return
+        for etapa, alvos in ETAPAS.items():
+            for objeto, nome in alvos:
+                setattr(objeto, nome, _gancho(etapa, getattr(objeto, nome)))
+        _instalado = True
+
+
+def medir_processo(medidor):
+    """Mede todas as execuções do processo com `medidor` (None desliga); usado nos benchmarks."""
+    global _medidor_global
+    instalar()
+    _medidor_global = medidor
+
+
+# Com PERFILADOR=1 os ganchos entram já no import, antes das páginas importarem as funções
+if ATIVO_POR_PADRAO:
+    instalar()
+
+
+def ativo():
+    return ATIVO_POR_PADRAO or (ATIVAVEL_PELA_URL and st.query_params.get('perfil') == '1')
+
+
+def iniciar():
+    """Começa o perfil desta execução da página (se o perfilador estiver ligado)."""
+    global _tracemalloc_proprio
+    _local.medidor = None
+    if not ativo():
+        return
+    # Ligado só pela URL: funções importadas pela página antes daqui ficam de fora nesta execução
+    instalar()
+    medidor = Medidor()
+    with _trava:
+        _medidores_ativos.add(medidor)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_proprio = True
+
+    _local.captura = None
+    captura = st.session_state.pop(CHAVE_CAPTURA, None)
+    if captura == 'pyinstrument':
+        from pyinstrument import Profiler
+        _local.captura = (captura, Profiler())
+        _local.captura[1].start()
+    elif captura == 'cProfile':
+        _local.captura = (captura, cProfile.Profile())
+        _local.captura[1].enable()
+
+    _local.medidor = medidor
+    _local.inicio = time.perf_counter()
+    _local.memoria = tracemalloc.get_traced_memory()[0]
+
+
+def _parar_captura():
+    if _local.captura is None:
+        return None
+    tipo, perfilador = _local.captura
+    if tipo == 'pyinstrument':
+        perfilador.stop()
+        return perfilador.output_text(unicode=True)
+    perfilador.disable()
+    saida = io.StringIO()
+    pstats.Stats(perfilador, stream=saida).sort_stats('cumulative').print_stats(30)
+    return saida.getvalue()
+
+
+def _parar_tracemalloc(medidor):
+    """Desliga o tracemalloc ligado por iniciar() quando não sobra execução perfilada."""
+    global _tracemalloc_proprio
+    with _trava:
+        _medidores_ativos.discard(medidor)
+        if _tracemalloc_proprio and not _medidores_ativos:
+            tracemalloc.stop()
+            _tracemalloc_proprio = False
+
+
+def finalizar():
+    """Fecha o perfil da execução: grava no log (se configurado) e mostra o painel de depuração."""
+    medidor = getattr(_local, 'medidor', None)
+    if medidor is None:
+        return
+    _local.medidor = None
+    texto_captura = _parar_captura()
+
+    registro = {
+        'instante': datetime.now().isoformat(timespec='seconds'),
+        'pagina': os.path.basename(getattr(sys.modules.get('__main__'), '__file__', '') or ''),
+        'total_segundos': time.perf_counter() - _local.inicio,
+        'alocado_mb': (tracemalloc.get_traced_memory()[0] - _local.memoria) / 1024 ** 2,
+        'etapas': medidor.coletar(),
+    }
+    _parar_tracemalloc(medidor)
+    if ARQUIVO_LOG:
+        with _trava, open(ARQUIVO_LOG, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    with st.expander(f'⏱️ Perfil desta execução ({registro["total_segundos"]:.3f} s)'):
+        tabela = pd.DataFrame.from_dict(registro['etapas'], orient='index')
+        outros = registro['total_segundos'] - (tabela['segundos'].sum() if not tabela.empty else 0.0)
+        tabela.loc['outros (código da página)', 'segundos'] = outros
+        st.dataframe(tabela.round(4), use_container_width=True)
+        st.caption(f'Memória alocada na execução: {registro["alocado_mb"]:.1f} MB')
+        captura = st.selectbox('Perfil completo', CAPTURAS, key='_perfilador_tipo')
+        if st.button('Capturar na próxima execução', key='_perfilador_botao'):
+            st.session_state[CHAVE_CAPTURA] = captura
+            st.rerun()
+        if texto_captura:
+            st.code(texto_captura)
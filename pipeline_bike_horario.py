@@ -0,0 +1,205 @@
+import argparse
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import carregador_bike
+
+# Base por hora usada pelo test2.py. A entrada pode ser o arquivo por hora
+# (dteday, hr, weathersit, temp, casual, registered, ...) ou as viagens do feed
+# de aluguéis (uma linha por viagem); as viagens são contadas por hora cheia e
+# tipo de usuário e juntadas ao clima por hora, que o feed de viagens não tem.
+# A base fica em snapshots/ ao lado do módulo, seja qual for a pasta de onde o Streamlit é chamado.
+PASTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots', 'bike_horario')
+
+# Linhas do arquivo de entrada lidas por vez
+TAMANHO_BLOCO = 500_000
+
+COLUNAS_ENTRADA = ['dteday', 'hr', 'weekday', 'weathersit', 'temp', 'casual', 'registered']
+
+# Viagens no formato do feed do Capital Bikeshare: início da viagem e tipo de usuário
+COLUNAS_VIAGEM = ['started_at', 'member_casual']
+TIPOS_VIAGEM = {'casual': 'casual', 'member': 'registered'}
+
+# Clima por hora que acompanha as viagens
+COLUNAS_CLIMA = ['dteday', 'hr', 'weathersit', 'temp']
+
+# Códigos de 'weathersit' -> rótulo mostrado no filtro de clima
+CLIMAS = {1: 'Céu limpo', 2: 'Nublado', 3: 'Chuva ou neve fraca', 4: 'Chuva forte'}
+TIPOS_USUARIO = ['casual', 'registered']
+
+# Chaves da tabela pré-agregada: tudo o que o test2.py filtra ou agrupa
+CHAVES_AGREGADO = ['ano', 'weather', 'user_type', 'weekday', 'hour']
+
+
+def desempilhar(horario):
+    """Uma linha por hora -> uma linha por (hora, tipo de usuário) no esquema do test2.py."""
+    longo = horario.melt(id_vars=['datetime', 'hour', 'weekday', 'weather', 'temp'],
+                         value_vars=TIPOS_USUARIO, var_name='user_type', value_name='count')
+    longo['user_type'] = pd.Categorical(longo['user_type'], categories=TIPOS_USUARIO)
+    longo['ano'] = longo['datetime'].dt.year.astype('int16')
+    longo['mes'] = longo['datetime'].dt.month.astype('int8')
+    return longo
+
+
+def transformar(bloco):
+    """Registros por hora -> uma linha por (hora, tipo de usuário) no esquema do test2.py."""
+    datas = pd.to_datetime(bloco['dteday'], format=carregador_bike.FORMATO_DATA)
+    return desempilhar(pd.DataFrame({
+        'datetime': datas + pd.to_timedelta(bloco['hr'], unit='h'),
+        'hour': bloco['hr'],
+        'weekday': bloco['weekday'],
+        'weather': pd.Categorical(bloco['weathersit'].map(CLIMAS), categories=list(CLIMAS.values())),
+        'temp': bloco['temp'],
+        'casual': bloco['casual'],
+        'registered': bloco['registered'],
+    }))
+
+
+def contar_viagens(bloco):
+    """Viagens -> número de aluguéis por (hora cheia, tipo de usuário)."""
+    return pd.DataFrame({
+        'datetime': pd.to_datetime(bloco['started_at']).dt.floor('h'),
+        'user_type': bloco['member_casual'].str.lower().map(TIPOS_VIAGEM),
+    }).value_counts()
+
+
+def viagens_por_hora(contagens, clima):
+    """Contagens por (hora cheia, tipo de usuário) + clima por hora -> uma linha por hora.
+
+    As horas do arquivo de clima sem viagens ficam com contagem zero, como no
+    arquivo por hora; viagens numa hora sem clima são um erro.
+    """
+    datas = pd.to_datetime(clima['dteday'], format=carregador_bike.FORMATO_DATA) + pd.to_timedelta(clima['hr'], unit='h')
+    clima = clima.set_index(datas.rename('datetime'))
+    horas = contagens.unstack('user_type', fill_value=0).reindex(columns=TIPOS_USUARIO, fill_value=0)
+    sem_clima = horas.index.difference(clima.index)
+    if len(sem_clima):
+        raise ValueError(f'{len(sem_clima)} horas com viagens não estão no arquivo de clima (primeira: {sem_clima[0]})')
+    horas = horas.reindex(clima.index, fill_value=0).astype('int32')
+    datetime = clima.index.to_series(index=pd.RangeIndex(len(clima)))
+    return pd.DataFrame({
+        'datetime': datetime,
+        'hour': datetime.dt.hour.astype('int8'),
+        # 0 = domingo, como 'weekday' no dicionário de dados
+        'weekday': ((datetime.dt.dayofweek + 1) % 7).astype('int8'),
+        'weather': pd.Categorical(clima['weathersit'].map(CLIMAS).to_numpy(), categories=list(CLIMAS.values())),
+        'temp': clima['temp'].to_numpy(),
+        'casual': horas['casual'].to_numpy(),
+        'registered': horas['registered'].to_numpy(),
+    })
+
+
+def _blocos_horarios(origem, tipos, tamanho_bloco):
+    blocos = pd.read_csv(origem, usecols=COLUNAS_ENTRADA, chunksize=tamanho_bloco,
+                         dtype={coluna: tipos[coluna] for coluna in COLUNAS_ENTRADA if coluna != 'dteday'})
+    for bloco in blocos:
+        yield transformar(bloco)
+
+
+def _blocos_viagens(origem, clima, tipos, tamanho_bloco):
+    colunas = pd.read_csv(clima, nrows=0).columns
+    faltando = [coluna for coluna in COLUNAS_CLIMA if coluna not in colunas]
+    if faltando:
+        raise ValueError(f'{clima} não tem as colunas de clima {faltando}')
+    # Só as contagens por hora ficam em memória (duas por hora do período), não as viagens
+    contagens = None
+    for bloco in pd.read_csv(origem, usecols=COLUNAS_VIAGEM, chunksize=tamanho_bloco):
+        parcial = contar_viagens(bloco)
+        contagens = parcial if contagens is None else contagens.add(parcial, fill_value=0)
+    if contagens is None:
+        raise ValueError(f'{origem} não tem viagens')
+    clima = pd.read_csv(clima, usecols=COLUNAS_CLIMA,
+                        dtype={coluna: tipos[coluna] for coluna in COLUNAS_CLIMA if coluna != 'dteday'})
+    horario = viagens_por_hora(contagens, clima)
+    for inicio in range(0, len(horario), tamanho_bloco):
+        yield desempilhar(horario.iloc[inicio:inicio + tamanho_bloco])
+
+
+def agregar(longo):
+    return longo.groupby(CHAVES_AGREGADO, observed=True)['count'].sum().reset_index()
+
+
+def processar(origem, destino=PASTA_BASE, tamanho_bloco=TAMANHO_BLOCO, clima=None):
+    """Lê `origem` em blocos e grava a base particionada por ano/mês em `destino`.
+
+    `origem` é o CSV por hora (COLUNAS_ENTRADA) ou o CSV de viagens
+    (COLUNAS_VIAGEM); para viagens, `clima` é o CSV com o clima por hora
+    (COLUNAS_CLIMA). Cada bloco vira linhas (hora, tipo de usuário) em
+    destino/detalhe/ano=.../mes=... e uma agregação parcial por CHAVES_AGREGADO;
+    as parciais são somadas no fim em destino/agregado.parquet. Só um bloco fica
+    em memória por vez, e a base antiga só é substituída quando a nova está
+    completa. Retorna o número de linhas gravadas no detalhe.
+    """
+    colunas = pd.read_csv(origem, nrows=0).columns
+    tipos = carregador_bike.esquema()
+    if all(coluna in colunas for coluna in COLUNAS_VIAGEM):
+        if clima is None:
+            raise ValueError(f'{origem} tem viagens: informe também o CSV de clima por hora ({COLUNAS_CLIMA})')
+        blocos = _blocos_viagens(origem, clima, tipos, tamanho_bloco)
+    else:
+        faltando = [coluna for coluna in COLUNAS_ENTRADA if coluna not in colunas]
+        if faltando:
+            raise ValueError(f'{origem} não tem as colunas por hora {faltando} nem as de viagem {COLUNAS_VIAGEM}')
+        blocos = _blocos_horarios(origem, tipos, tamanho_bloco)
+
+    temporario = destino + '.tmp'
+    shutil.rmtree(temporario, ignore_errors=True)
+    parciais = []
+    linhas = 0
+    for numero, longo in enumerate(blocos):
+        pq.write_to_dataset(pa.Table.from_pandas(longo, preserve_index=False), os.path.join(temporario, 'detalhe'),
+                            partition_cols=['ano', 'mes'], basename_template=f'parte-{numero:05d}-{{i}}.parquet')
+        parciais.append(agregar(longo))
+        linhas += len(longo)
+
+    agregado = pd.concat(parciais, ignore_index=True).groupby(CHAVES_AGREGADO, observed=True)['count'].sum().reset_index()
+    agregado.to_parquet(os.path.join(temporario, 'agregado.parquet'), index=False)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    return linhas
+
+
+def existe_base(pasta=PASTA_BASE):
+    return os.path.exists(os.path.join(pasta, 'agregado.parquet'))
+
+
+def versao_base(pasta=PASTA_BASE):
+    """Muda a cada vez que a base é montada de novo (o agregado é o último arquivo gravado)."""
+    return os.stat(os.path.join(pasta, 'agregado.parquet')).st_mtime_ns
+
+
+def ler_agregado(pasta=PASTA_BASE):
+    """Soma de 'count' por ano, clima, tipo de usuário, dia da semana e hora."""
+    return pd.read_parquet(os.path.join(pasta, 'agregado.parquet'))
+
+
+def ler_detalhe(pasta=PASTA_BASE, colunas=None, filtros=None):
+    """Linhas (hora, tipo de usuário); `filtros` segue o formato de filtros do pyarrow."""
+    caminho = os.path.join(pasta, 'detalhe')
+    if any(operador == 'in' and not len(valores) for _, operador, valores in filtros or []):
+        # Multiselect vazio: nenhuma linha passa (o pyarrow não aceita 'in' com lista vazia)
+        dados = ds.dataset(caminho, partitioning='hive').schema.empty_table().to_pandas()
+        dados = dados[colunas] if colunas is not None else dados
+    else:
+        dados = pd.read_parquet(caminho, columns=colunas, filters=filtros)
+    if colunas is None:
+        # ano/mes são só as pastas das partições
+        dados = dados.drop(columns=['ano', 'mes'])
+    return dados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monta a base por hora do test2.py')
+    parser.add_argument('origem', help=f'CSV por hora (colunas {", ".join(COLUNAS_ENTRADA)}) '
+                                       f'ou de viagens (colunas {", ".join(COLUNAS_VIAGEM)})')
+    parser.add_argument('--clima', help=f'CSV de clima por hora para as viagens (colunas {", ".join(COLUNAS_CLIMA)})')
+    parser.add_argument('--destino', default=PASTA_BASE)
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO)
+    args = parser.parse_args()
+    print(f'{processar(args.origem, args.destino, args.bloco, args.clima):,} linhas gravadas em {args.destino}')
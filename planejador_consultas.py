@@ -0,0 +1,129 @@
+import os
+
+import pandas as pd
+
+import motor_colunar
+from carregador_vendas import carregar_vendas
+from motor_colunar import Resultado
+from motor_filtros import obter_motor
+from snapshot_vendas import REGIOES_ESTADOS
+
+# Filtros da página de dados brutos: nome do filtro -> (coluna, tipo)
+FILTROS = {
+    'produtos': ('Produto', 'lista'),
+    'categoria': ('Categoria do Produto', 'lista'),
+    'preco': ('Preço', 'intervalo'),
+    'frete': ('Frete', 'intervalo'),
+    'data_compra': ('Data da Compra', 'intervalo'),
+    'vendedores': ('Vendedor', 'lista'),
+    'local_compra': ('Local da compra', 'lista'),
+    'avaliacao': ('Avaliação da compra', 'intervalo'),
+    'tipo_pagamento': ('Tipo de pagamento', 'lista'),
+    'qtd_parcelas': ('Quantidade de parcelas', 'intervalo'),
+}
+
+# Filtros que a API da labdados aceita na query string. O servidor_local.py
+# também aceita 'vendedores'; para usar, rode com LABDADOS_FILTROS_EXTRAS=vendedores
+CAPACIDADES_LABDADOS = {'regiao', 'ano'}
+CAPACIDADES_API = CAPACIDADES_LABDADOS | {
+    nome for nome in os.environ.get('LABDADOS_FILTROS_EXTRAS', '').split(',') if nome
+}
+
+
+# Descobre a região que contém todos os estados selecionados (ou '' se não houver)
+def _regiao_dos_estados(estados):
+    estados = set(estados)
+    for regiao, estados_regiao in REGIOES_ESTADOS.items():
+        if estados and estados <= set(estados_regiao):
+            return regiao
+    return ''
+
+
+def planejar(filtros, capacidades=CAPACIDADES_API):
+    """Separa os filtros entre parâmetros da API e predicados locais.
+
+    `filtros` usa os nomes de FILTROS mais 'regiao' e 'ano'. Valor None quer
+    dizer "sem filtro"; uma lista vazia filtra tudo. Retorna
+    (parametros, filtros_locais): os parâmetros vão para carregar_vendas e
+    os filtros locais são aplicados depois com aplicar_filtros.
+    """
+    parametros = {'regiao': '', 'ano': '', 'vendedores': None}
+    locais = {}
+
+    for nome, valor in filtros.items():
+        if valor is None:
+            continue
+        if nome in ('regiao', 'ano'):
+            parametros[nome] = valor
+        elif nome == 'vendedores' and 'vendedores' in capacidades and len(valor) > 0:
+            parametros['vendedores'] = list(valor)
+        else:
+            locais[nome] = valor
+
+    # Estados todos dentro de uma região: a região vai para a API e o filtro
+    # de estado só continua local se não cobrir a região inteira
+    if not parametros['regiao'] and locais.get('local_compra') is not None:
+        regiao = _regiao_dos_estados(locais['local_compra'])
+        if regiao:
+            parametros['regiao'] = regiao
+            if set(locais['local_compra']) == set(REGIOES_ESTADOS[regiao]):
+                del locais['local_compra']
+
+    # Intervalo de datas dentro de um único ano: o ano vai para a API
+    if not parametros['ano'] and locais.get('data_compra') is not None and len(locais['data_compra']) == 2:
+        inicio, fim = (pd.Timestamp(data) for data in locais['data_compra'])
+        if inicio.year == fim.year:
+            parametros['ano'] = inicio.year
+
+    return parametros, locais
+
+
+# Filtros (nomes de FILTROS) como predicados (coluna, tipo, valor)
+def _predicados(filtros):
+    predicados = []
+    for nome, valor in filtros.items():
+        coluna, tipo = FILTROS[nome]
+        if coluna == 'Data da Compra' and len(valor) != 2:
+            continue
+        predicados.append((coluna, tipo, valor))
+    return predicados
+
+
+def aplicar_filtros(dados, filtros):
+    """Aplica os predicados locais com o motor de filtros (máscaras em cache por predicado)."""
+    return obter_motor(dados).filtrar(_predicados(filtros))
+
+
+def consultar_visao(filtros, capacidades=CAPACIDADES_API):
+    """Como o consultar(), mas devolve a Visao (máscara das linhas) sem copiar os dados filtrados."""
+    parametros, locais = planejar(filtros, capacidades)
+    dados = carregar_vendas(parametros['regiao'], parametros['ano'], vendedores=parametros['vendedores'])
+    return obter_motor(dados).visao(_predicados(locais))
+
+
+def consultar(filtros, capacidades=CAPACIDADES_API):
+    """Planeja, busca o que der no servidor (com cache) e filtra o resto localmente."""
+    return consultar_visao(filtros, capacidades).materializar()
+
+
+def consultar_visiveis(filtros, colunas):
+    """Resultado (total, páginas e todas as linhas sob demanda) só com `colunas`.
+
+    Com o motor colunar ligado (motor_colunar.py) os filtros viram SQL sobre as
+    vendas completas (o snapshot em memória, lido sem cópia) e só as páginas
+    mostradas saem do banco; sem ele é a Visao do consultar_visao(), e as
+    linhas só são copiadas na página mostrada e, em blocos, no download.
+    """
+    if not motor_colunar.ativo():
+        return Resultado.de_visao(consultar_visao(filtros).projetar(colunas))
+
+    motor = motor_colunar.obter_motor()
+    motor.registrar('vendas', carregar_vendas())
+
+    locais = {nome: valor for nome, valor in filtros.items() if valor is not None and nome not in ('regiao', 'ano')}
+    predicados = _predicados(locais)
+    if filtros.get('regiao'):
+        predicados.append(('Local da compra', 'lista', REGIOES_ESTADOS.get(filtros['regiao'].lower(), [])))
+    if filtros.get('ano'):
+        predicados.append(('Data da Compra', 'ano', filtros['ano']))
+    return motor.consultar('vendas', predicados, colunas)
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import carregador_bike
+
+# Previsão da demanda diária de bicicletas (cnt) a partir da data, feriado e clima.
+#
+# O modelo é uma regressão ridge sobre características de calendário e clima. Ele
+# guarda só as somas XᵀX e Xᵀy, então linhas novas no fim dos dados entram somando
+# a parte delas (sem refazer o treino) e o resultado é o mesmo de treinar do zero.
+# O modelo fica em PASTA_CACHE junto com a versão (hash) dos dados usados no treino.
+NOME_ARQUIVO = 'modelo_demanda.pkl'
+REGULARIZACAO = 1.0
+HORIZONTE_PADRAO = 90
+
+# Colunas usadas: as de entrada e o alvo (a versão dos dados é o hash delas)
+COLUNAS_ENTRADA = ['dteday', 'holiday', 'weathersit', 'temp', 'hum', 'windspeed']
+ALVO = 'cnt'
+
+# Escalas fixas, para as somas continuarem valendo quando chegam linhas novas
+ESCALAS = {'temp': 40.0, 'hum': 100.0, 'windspeed': 50.0}
+CLIMAS = [1, 2, 3, 4]
+
+NOMES_CARACTERISTICAS = (
+    ['intercepto', 'tendencia', 'ano_sen', 'ano_cos', 'ano_sen2', 'ano_cos2', 'feriado', 'dia_util']
+    + [f'dia_semana_{dia}' for dia in range(1, 7)]
+    + [f'clima_{clima}' for clima in CLIMAS[1:]]
+    + ['temp', 'temp2', 'hum', 'windspeed']
+)
+
+
+def caminho_modelo():
+    return os.path.join(carregador_bike.PASTA_CACHE, NOME_ARQUIVO)
+
+
+def versao(tabela):
+    """Hash das colunas usadas no treino (muda se qualquer linha mudar)."""
+    colunas = [coluna for coluna in COLUNAS_ENTRADA + [ALVO] if coluna in tabela]
+    return hashlib.sha1(pd.util.hash_pandas_object(tabela[colunas], index=False).to_numpy().tobytes()).hexdigest()
+
+
+def caracteristicas(tabela, origem):
+    """Matriz linhas x NOMES_CARACTERISTICAS (tudo vetorizado).
+
+    `weathersit` pode vir como número (1 a 4) ou já como a proporção de cada
+    clima (colunas clima_2, clima_3 e clima_4), como na previsão do futuro.
+    """
+    datas = pd.DatetimeIndex(tabela['dteday'])
+    n = len(datas)
+    dias = ((datas - origem) / pd.Timedelta(days=1)).to_numpy(dtype='float64')
+    angulo = 2 * np.pi * (datas.dayofyear.to_numpy() - 1) / 365.25
+    dia_semana = datas.dayofweek.to_numpy()  # 0 = segunda
+    feriado = tabela['holiday'].to_numpy(dtype='float64')
+    dia_util = ((dia_semana < 5) & (feriado == 0)).astype('float64')
+    if 'weathersit' in tabela:
+        climas = np.column_stack([(tabela['weathersit'].to_numpy() == clima).astype('float64') for clima in CLIMAS[1:]])
+    else:
+        climas = tabela[[f'clima_{clima}' for clima in CLIMAS[1:]]].to_numpy(dtype='float64')
+    temp = tabela['temp'].to_numpy(dtype='float64') / ESCALAS['temp']
+
+    return np.column_stack([
+        np.ones(n),
+        dias / 365.25,
+        np.sin(angulo), np.cos(angulo), np.sin(2 * angulo), np.cos(2 * angulo),
+        feriado,
+        dia_util,
+        (dia_semana[:, None] == np.arange(6)[None, :]).astype('float64'),
+        climas,
+        temp,
+        temp ** 2,
+        tabela['hum'].to_numpy(dtype='float64') / ESCALAS['hum'],
+        tabela['windspeed'].to_numpy(dtype='float64') / ESCALAS['windspeed'],
+    ])
+
+
+class ModeloDemanda:
+    """Regressão ridge treinada pelas somas XᵀX e Xᵀy."""
+
+    def __init__(self, origem, regularizacao=REGULARIZACAO):
+        self.origem = pd.Timestamp(origem)
+        self.regularizacao = regularizacao
+        tamanho = len(NOMES_CARACTERISTICAS)
+        self.xtx = np.zeros((tamanho, tamanho))
+        self.xty = np.zeros(tamanho)
+        self.linhas = 0
+        self.versao = None
+        self.coeficientes = np.zeros(tamanho)
+        self.erro_medio = np.nan
+        # Para prever o futuro sem voltar aos dados
+        self.ultimo_dia = None
+        self.clima = None
+
+    def atualizar(self, novas, dados):
+        """Soma as linhas `novas` ao treino; `dados` são todas as linhas treinadas (para a versão e o erro)."""
+        x = caracteristicas(novas, self.origem)
+        y = novas[ALVO].to_numpy(dtype='float64')
+        self.xtx += x.T @ x
+        self.xty += x.T @ y
+        self.linhas += len(novas)
+        penalidade = self.regularizacao * np.eye(len(NOMES_CARACTERISTICAS))
+        penalidade[0, 0] = 0  # o intercepto não é penalizado
+        self.coeficientes = np.linalg.solve(self.xtx + penalidade, self.xty)
+        self.versao = versao(dados)
+        self.erro_medio = float(np.abs(self.prever(dados) - dados[ALVO].to_numpy(dtype='float64')).mean())
+        self.ultimo_dia = pd.Timestamp(dados['dteday'].max())
+        self.clima = clima_tipico(dados)
+        return self
+
+    def prever(self, tabela):
+        return caracteristicas(tabela, self.origem) @ self.coeficientes
+
+
+def salvar_modelo(modelo, caminho=None):
+    caminho = caminho or caminho_modelo()
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        pickle.dump(modelo, arquivo)
+    os.replace(temporario, caminho)
+
+
+def ler_modelo(caminho=None):
+    caminho = caminho or caminho_modelo()
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'rb') as arquivo:
+            modelo = pickle.load(arquivo)
+    except (pickle.UnpicklingError, EOFError, AttributeError):
+        return None  # arquivo de outra versão do modelo: treina de novo
+    return modelo if isinstance(modelo, ModeloDemanda) else None
+
+
+def carregar_modelo(dados, caminho=None):
+    """Modelo treinado com `dados`: o salvo, o salvo mais as linhas novas do fim, ou um novo.
+
+    Retorna (modelo, situacao) com situacao 'salvo', 'incremental' ou 'novo'.
+    """
+    dados = dados.sort_values('dteday', kind='stable').reset_index(drop=True)
+    modelo = ler_modelo(caminho)
+    if modelo is not None and modelo.linhas == len(dados) and modelo.versao == versao(dados):
+        return modelo, 'salvo'
+    if modelo is not None and 0 < modelo.linhas < len(dados) and modelo.versao == versao(dados.iloc[:modelo.linhas]):
+        modelo.atualizar(dados.iloc[modelo.linhas:], dados)
+        situacao = 'incremental'
+    else:
+        modelo = ModeloDemanda(dados['dteday'].min()).atualizar(dados, dados)
+        situacao = 'novo'
+    salvar_modelo(modelo, caminho)
+    return modelo, situacao
+
+
+def clima_tipico(dados):
+    """Média de temperatura, umidade e vento e proporção de cada clima por dia do ano (±15 dias)."""
+    dia = pd.DatetimeIndex(dados['dteday']).dayofyear.to_numpy()
+    colunas = {'temp': dados['temp'].to_numpy(dtype='float64'), 'hum': dados['hum'].to_numpy(dtype='float64'),
+               'windspeed': dados['windspeed'].to_numpy(dtype='float64')}
+    colunas.update({f'clima_{clima}': (dados['weathersit'].to_numpy() == clima).astype('float64') for clima in CLIMAS[1:]})
+    # Somas circulares por dia do ano com uma janela de 31 dias
+    janela = np.zeros((366, 366))
+    for deslocamento in range(-15, 16):
+        janela[np.arange(366), (np.arange(366) + deslocamento) % 366] = 1
+    contagem = janela @ np.bincount(dia - 1, minlength=366)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tipico = pd.DataFrame({nome: (janela @ np.bincount(dia - 1, weights=valores, minlength=366)) / contagem
+                               for nome, valores in colunas.items()}, index=pd.RangeIndex(1, 367, name='dia_do_ano'))
+    # Épocas sem nenhum dado ficam com a média geral
+    return tipico.fillna(pd.Series({nome: valores.mean() for nome, valores in colunas.items()}))
+
+
+def futuro(modelo, dias=HORIZONTE_PADRAO):
+    """Os `dias` seguintes ao último dia do treino, com o clima típico da época e sem feriados."""
+    datas = pd.date_range(modelo.ultimo_dia + pd.Timedelta(days=1), periods=dias, freq='D')
+    tabela = modelo.clima.loc[datas.dayofyear].reset_index(drop=True)
+    tabela.insert(0, 'dteday', datas)
+    tabela.insert(1, 'holiday', 0)
+    return tabela
+
+
+def prever_demanda(modelo, dias=HORIZONTE_PADRAO):
+    """DataFrame com dteday e a previsão de cnt para os próximos `dias`."""
+    tabela = futuro(modelo, dias)
+    return pd.DataFrame({'dteday': tabela['dteday'], 'previsao': np.maximum(modelo.prever(tabela), 0)})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Treina (ou atualiza) o modelo de demanda e mostra a previsão')
+    parser.add_argument('--dias', type=int, default=HORIZONTE_PADRAO)
+    args = parser.parse_args()
+
+    dados = carregador_bike.carregar_bike()
+    modelo, situacao = carregar_modelo(dados)
+    print(f'Modelo {situacao}: {modelo.linhas} linhas, erro médio {modelo.erro_medio:.0f} aluguéis/dia')
+    print(prever_demanda(modelo, args.dias).to_string(index=False))
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Redução de séries longas antes de irem para o navegador.
+#
+# Um gráfico de linha não mostra mais detalhe que os pixels da sua largura, então
+# a série é reduzida para até PONTOS_POR_PIXEL pontos por pixel, escolhidos pelo
+# LTTB (Largest-Triangle-Three-Buckets, que preserva o formato da curva) ou pelo
+# mínimo e máximo de cada faixa (que preserva os picos). Ao selecionar um trecho
+# do gráfico com a caixa, a página reduz de novo só o trecho (veja mostrar_com_zoom).
+LARGURA_PADRAO = 1200  # px de um gráfico na largura toda da página (layout wide)
+PONTOS_POR_PIXEL = 2
+
+
+def pontos_para(largura=LARGURA_PADRAO):
+    """Quantos pontos um gráfico de `largura` pixels consegue mostrar."""
+    return int(largura * PONTOS_POR_PIXEL)
+
+
+def _numerico(valores):
+    valores = pd.Series(valores)
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores.to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+    return valores.to_numpy(dtype='float64')
+
+
+def lttb(x, y, pontos):
+    """Índices (ordenados) dos `pontos` pontos escolhidos pelo LTTB; x precisa estar em ordem."""
+    n = len(x)
+    if pontos >= n or pontos < 3:
+        return np.arange(n)
+    # O primeiro e o último ficam; o resto é dividido em pontos - 2 faixas
+    limites = np.linspace(1, n - 1, pontos - 1).astype('int64')
+    escolhidos = np.empty(pontos, dtype='int64')
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+    for faixa in range(pontos - 2):
+        inicio, fim = limites[faixa], limites[faixa + 1]
+        # Média da próxima faixa (na última, o ponto final)
+        proximo_fim = limites[faixa + 2] if faixa + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        # Ponto da faixa que forma o maior triângulo com o anterior escolhido e a média seguinte
+        area = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                      - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(area.argmax())
+        escolhidos[faixa + 1] = anterior
+    return escolhidos
+
+
+def min_max(y, pontos):
+    """Índices (ordenados) do mínimo e do máximo de cada uma das pontos // 2 faixas."""
+    n = len(y)
+    if pontos >= n or pontos < 2:
+        return np.arange(n)
+    inicios = np.linspace(0, n, pontos // 2 + 1).astype('int64')[:-1]
+    tamanhos = np.diff(np.r_[inicios, n])
+    escolhidos = []
+    for extremo in [np.minimum, np.maximum]:
+        # Primeira posição de cada faixa em que o valor é o extremo dela
+        posicoes = np.flatnonzero(y == np.repeat(extremo.reduceat(y, inicios), tamanhos))
+        escolhidos.append(posicoes[np.searchsorted(posicoes, inicios)])
+    return np.unique(np.concatenate(escolhidos))
+
+
+METODOS = {
+    'lttb': lambda x, y, pontos: lttb(x, y, pontos),
+    'min_max': lambda x, y, pontos: min_max(y, pontos),
+}
+
+
+def reduzir(tabela, x, y, largura=LARGURA_PADRAO, metodo='lttb', grupo=None, janela=None):
+    """As linhas de `tabela` que bastam para desenhar y por x num gráfico de `largura` pixels.
+
+    Com `grupo`, cada linha do gráfico (color=grupo) é reduzida separadamente;
+    com `janela` = (início, fim), só o trecho de x nesse intervalo entra.
+    Tabelas que já cabem na largura voltam sem cópia.
+    """
+    if janela is not None:
+        inicio, fim = sorted(pd.Series(janela).astype(tabela[x].dtype))
+        tabela = tabela[(tabela[x] >= inicio) & (tabela[x] <= fim)]
+    pontos = pontos_para(largura)
+    if len(tabela) <= pontos:
+        return tabela
+    if not tabela[x].is_monotonic_increasing:
+        tabela = tabela.sort_values(x, kind='stable')
+    if tabela[y].hasnans:
+        tabela = tabela[tabela[y].notna()]
+
+    escolher = METODOS[metodo]
+    posicoes = np.arange(len(tabela))
+    partes = [posicoes] if grupo is None else \
+        [posicoes[indices] for indices in tabela.groupby(grupo, sort=False, observed=True).indices.values()]
+    escolhidos = [parte[escolher(_numerico(tabela[x].iloc[parte]), _numerico(tabela[y].iloc[parte]), pontos)]
+                  for parte in partes]
+    return tabela.iloc[np.sort(np.concatenate(escolhidos))]
+
+
+# Zoom: a seleção em caixa vira a janela da próxima redução
+def _guardar_janela(chave):
+    evento = st.session_state.get(chave)
+    caixas = evento.selection.box if evento is not None else []
+    if caixas and caixas[0].get('x'):
+        st.session_state[f'{chave}_janela'] = tuple(caixas[0]['x'])
+
+
+def janela_zoom(chave):
+    """Intervalo de x selecionado no gráfico `chave` (ou None para a série inteira)."""
+    return st.session_state.get(f'{chave}_janela')
+
+
+def mostrar_com_zoom(figura, chave, **opcoes):
+    """st.plotly_chart em que selecionar um trecho com a caixa mostra esse trecho com mais detalhe.
+
+    A janela fica em st.session_state (o gráfico muda ao ser redesenhado, e com
+    ele o estado da seleção); o botão volta para a série inteira.
+    """
+    st.plotly_chart(figura, key=chave, on_select=lambda: _guardar_janela(chave), selection_mode='box', **opcoes)
+    if janela_zoom(chave) is not None and st.button('Mostrar todo o período', key=f'{chave}_todo'):
+        del st.session_state[f'{chave}_janela']
+        st.rerun()
@@ -0,0 +1,72 @@
+import argparse
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import snapshot_vendas
+
+# Servidor local que imita https://labdados.com/produtos para testes e benchmarks sem rede.
+# Aceita os mesmos parâmetros da API (regiao e ano) e também vendedor=Nome1,Nome2.
+FIXTURE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_exemplo', 'produtos.json')
+
+
+# Função para carregar a base que o servidor vai devolver (JSON da API ou Parquet do snapshot)
+def carregar_base(caminho=FIXTURE_PADRAO):
+    if caminho.endswith('.parquet'):
+        return snapshot_vendas.ler_snapshot(caminho)
+    return snapshot_vendas.tipar(pd.read_json(caminho, orient='records', dtype=False))
+
+
+# Converte de volta para o formato da API (data como texto dd/mm/aaaa)
+def para_json(dados):
+    dados = dados.assign(**{'Data da Compra': dados['Data da Compra'].dt.strftime('%d/%m/%Y')})
+    return dados.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+
+class ManipuladorProdutos(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/produtos':
+            self.send_error(404)
+            return
+
+        parametros = parse_qs(url.query)
+        regiao = parametros.get('regiao', [''])[0]
+        ano = parametros.get('ano', [''])[0]
+        vendedores = [nome for nome in parametros.get('vendedor', [''])[0].split(',') if nome]
+
+        dados = snapshot_vendas.filtrar(self.server.base, regiao, ano, vendedores)
+        corpo = para_json(dados)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor(porta=0, fixture=FIXTURE_PADRAO):
+    """Sobe o servidor numa thread e devolve (servidor, url). Porta 0 escolhe uma porta livre."""
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), ManipuladorProdutos)
+    servidor.base = carregar_base(fixture)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_address[1]}/produtos'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor local da API de produtos')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--fixture', default=FIXTURE_PADRAO, help='arquivo .json (formato da API) ou .parquet (snapshot)')
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', args.porta), ManipuladorProdutos)
+    servidor.base = carregar_base(args.fixture)
+    print(f'Servindo {len(servidor.base)} vendas em http://127.0.0.1:{args.porta}/produtos')
+    print(f'Use: LABDADOS_URL=http://127.0.0.1:{args.porta}/produtos LABDADOS_FILTROS_EXTRAS=vendedores streamlit run dashboard_9.py')
+    servidor.serve_forever()
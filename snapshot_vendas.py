@@ -0,0 +1,131 @@
+import datetime
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+# Arquivo local com a última cópia da API de produtos (lido a cada chamada: os
+# benchmarks apontam ARQUIVO_SNAPSHOT, ou SNAPSHOT_VENDAS num servidor à parte,
+# para uma pasta temporária)
+PASTA_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+ARQUIVO_SNAPSHOT = os.environ.get('SNAPSHOT_VENDAS', os.path.join(PASTA_SNAPSHOT, 'produtos.parquet'))
+
+URL = os.environ.get('LABDADOS_URL', 'https://labdados.com/produtos')
+
+# Uma atualização por vez no processo: quem chega durante uma atualização espera por
+# ela e, se ela acabou há menos de `idade_maxima`, usa o snapshot gravado sem ir à API
+_trava_atualizacao = threading.Lock()
+# Caminho do snapshot -> time.monotonic() do fim da última atualização
+_atualizado_em = {}
+
+COLUNAS_CATEGORICAS = ['Produto', 'Categoria do Produto', 'Vendedor', 'Local da compra', 'Tipo de pagamento']
+
+# Estados de cada região (mesmo filtro que a API aplica com ?regiao=)
+REGIOES_ESTADOS = {
+    'centro-oeste': ['DF', 'GO', 'MS', 'MT'],
+    'nordeste': ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+    'norte': ['AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'],
+    'sudeste': ['ES', 'MG', 'RJ', 'SP'],
+    'sul': ['PR', 'RS', 'SC'],
+}
+
+
+# Função para deixar os tipos prontos para uso (datas convertidas, colunas categóricas
+# e linhas ordenadas por data, que é o que o indice_datas.py espera)
+def tipar(dados):
+    dados = dados.copy()
+    if 'Data da Compra' in dados.columns:
+        if not pd.api.types.is_datetime64_any_dtype(dados['Data da Compra']):
+            dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format='%d/%m/%Y')
+        dados = dados.sort_values('Data da Compra', kind='stable', ignore_index=True)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in dados.columns:
+            dados[coluna] = dados[coluna].astype('category')
+    return dados
+
+
+def existe_snapshot(caminho=None):
+    return os.path.exists(caminho or ARQUIVO_SNAPSHOT)
+
+
+def salvar_snapshot(dados, caminho=None):
+    """Grava o DataFrame tipado em Parquet (escrita atômica via arquivo temporário).
+
+    Cada escrita usa o próprio arquivo temporário: várias sessões podem gravar
+    o primeiro snapshot ao mesmo tempo, e a última a terminar fica no lugar.
+    """
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tabela = pa.Table.from_pandas(tipar(dados), preserve_index=False)
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+def ler_snapshot(caminho=None):
+    """Lê o snapshot mapeando o arquivo em memória. Retorna None se ele não existir."""
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    if not existe_snapshot(caminho):
+        return None
+    tabela = pq.read_table(caminho, memory_map=True)
+    return tabela.to_pandas()
+
+
+# Aplica localmente os mesmos filtros de região, ano e vendedor da API
+def filtrar(dados, regiao='', ano='', vendedores=()):
+    if regiao:
+        dados = dados[dados['Local da compra'].isin(REGIOES_ESTADOS.get(regiao.lower(), []))]
+    if ano:
+        dados = dados[dados['Data da Compra'].dt.year == int(ano)]
+    if vendedores:
+        dados = dados[dados['Vendedor'].isin(vendedores)]
+    return dados
+
+
+# Função que busca a API inteira ou só os anos pedidos (a API filtra por ano no servidor)
+def _baixar(anos=None):
+    partes = []
+    for ano in anos if anos is not None else ['']:
+        response = requests.get(URL, params={'ano': ano} if ano else None, timeout=30)
+        response.raise_for_status()
+        partes.append(pd.DataFrame.from_dict(response.json()))
+    return tipar(pd.concat(partes, ignore_index=True))
+
+
+def atualizar_snapshot(caminho=None, idade_maxima=0):
+    """Busca na API só os anos a partir da última data gravada e acrescenta essas compras ao snapshot.
+
+    As linhas do último dia gravado são substituídas pelas da API, porque esse
+    dia pode ter recebido vendas depois da última atualização. Sem snapshot a
+    API inteira é baixada. Se o snapshot foi atualizado há menos de
+    `idade_maxima` segundos (por outra chave do carregador_vendas.py, por
+    exemplo) nada é buscado. Retorna a quantidade de linhas novas.
+    """
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    with _trava_atualizacao:
+        instante = _atualizado_em.get(caminho)
+        if instante is not None and time.monotonic() - instante < idade_maxima:
+            return 0
+
+        antigos = ler_snapshot(caminho)
+        if antigos is None or antigos.empty:
+            novos = _baixar()
+            salvar_snapshot(novos, caminho)
+        else:
+            ultima_data = antigos['Data da Compra'].max()
+            novos = _baixar(range(ultima_data.year, max(ultima_data.year, datetime.date.today().year) + 1))
+            if not novos.empty:
+                antigos = antigos[antigos['Data da Compra'] < ultima_data]
+                novos = novos[novos['Data da Compra'] >= ultima_data]
+                salvar_snapshot(pd.concat([antigos, novos], ignore_index=True), caminho)
+        _atualizado_em[caminho] = time.monotonic()
+        return len(novos)
+
+
+if __name__ == '__main__':
+    linhas = atualizar_snapshot()
+    print(f'Snapshot atualizado em {ARQUIVO_SNAPSHOT}: {linhas} linhas gravadas a partir da última data de compra')
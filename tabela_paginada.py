@@ -0,0 +1,76 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import perfilador
+from cache_limitado import CacheLimitado
+from motor_colunar import Resultado
+
+# Tabela paginada para resultados grandes: o navegador recebe só a página aberta.
+#
+# A ordenação e o corte da página são feitos no servidor (ORDER BY/LIMIT no
+# DuckDB, ou a ordem estável guardada por coluna no pandas), então a tabela
+# filtrada inteira não é montada nem enviada. Com uma assinatura dos filtros as
+# páginas ficam em cache e a seguinte é adiantada numa thread, para o "próxima"
+# não esperar a consulta. Resultados de até uma página vão inteiros para o
+# st.dataframe, que aí ordena pelo cabeçalho como sempre.
+TAMANHO_PAGINA = int(os.environ.get('TABELA_TAMANHO_PAGINA', 500))
+
+# Memória máxima (em bytes) para as páginas guardadas
+MAX_BYTES = int(os.environ.get('TABELA_MAX_BYTES', 64 * 1024 * 1024))
+
+_cache = CacheLimitado('tabela_paginada', MAX_BYTES)
+
+_pre_carga = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pre-carga-paginas', initializer=perfilador.ignorar_thread)
+
+SEM_ORDEM = '(ordem original)'
+
+
+def _pagina(resultado, assinatura, inicio, quantidade, ordenar_por, crescente):
+    calcular = lambda: resultado.janela(inicio, quantidade, ordenar_por, crescente)
+    if assinatura is None:
+        return calcular()
+    # A versão dos dados entra na chave: a assinatura só descreve filtros e colunas
+    return _cache.obter((resultado.versao, assinatura, inicio, quantidade, ordenar_por, crescente), calcular)
+
+
+def mostrar_tabela(fonte, chave, assinatura=None, tamanho_pagina=TAMANHO_PAGINA):
+    """Desenha `fonte` (DataFrame ou Resultado do motor_colunar) uma página por vez.
+
+    `chave` prefixa as chaves dos widgets de ordenação e página; `assinatura`
+    identifica os filtros e colunas (a mesma do download) e liga o cache e a
+    pré-carga das páginas, guardadas também pela versão dos dados do resultado.
+    """
+    resultado = fonte if isinstance(fonte, Resultado) else Resultado.de_dataframe(fonte)
+    if resultado.total <= tamanho_pagina:
+        st.dataframe(resultado.janela(0, tamanho_pagina))
+        return
+
+    chave_ordem, chave_pagina = f'{chave}_ordem', f'{chave}_pagina'
+    opcoes = [SEM_ORDEM] + resultado.colunas
+    paginas = math.ceil(resultado.total / tamanho_pagina)
+    # Colunas ou filtros mudaram: a ordem e a página guardadas podem não existir mais
+    if st.session_state.get(chave_ordem, SEM_ORDEM) not in opcoes:
+        del st.session_state[chave_ordem]
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+
+    coluna1, coluna2, coluna3 = st.columns([3, 1, 2])
+    with coluna1:
+        ordem = st.selectbox('Ordenar por', opcoes, key=chave_ordem)
+    with coluna2:
+        decrescente = st.checkbox('Decrescente', key=f'{chave}_decrescente', disabled=ordem == SEM_ORDEM)
+    with coluna3:
+        pagina = st.number_input(f'Página (de {paginas})', 1, paginas, 1, key=chave_pagina)
+
+    ordenar_por = None if ordem == SEM_ORDEM else ordem
+    crescente = not decrescente
+    inicio = (pagina - 1) * tamanho_pagina
+    linhas = _pagina(resultado, assinatura, inicio, tamanho_pagina, ordenar_por, crescente)
+    st.dataframe(linhas)
+    st.caption(f'Linhas {inicio + 1} a {inicio + len(linhas)} de {resultado.total}')
+
+    if assinatura is not None and pagina < paginas:
+        _pre_carga.submit(_pagina, resultado, assinatura, inicio + tamanho_pagina, tamanho_pagina, ordenar_por, crescente)
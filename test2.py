@@ -1,17 +1,36 @@
 import streamlit as st
-import pandas as pd
+import perfilador
 import plotly.express as px
+from exportacao import assinatura, preparar_download
+from dispersao_densidade import dispersao
+import pipeline_bike_horario
 
 st.set_page_config(layout='wide')
 
-# Carregar dados
+# Perfil da execução (PERFILADOR=1, ou ?perfil=1 na URL com PERFILADOR=url)
+perfilador.iniciar()
+
+# Carregar dados: base por hora montada pelo pipeline_bike_horario.py
+if not pipeline_bike_horario.existe_base():
+    st.error('Base por hora não encontrada. Rode: python pipeline_bike_horario.py <arquivo por hora>.csv '
+             '(ou <viagens>.csv --clima <clima por hora>.csv)')
+    st.stop()
+
+# Muda quando o pipeline monta a base de novo: entra na chave dos caches abaixo
+versao_base = pipeline_bike_horario.versao_base()
+
+# Tabela pequena com a soma de aluguéis por ano, clima, tipo de usuário, dia da semana e hora
 @st.cache_data
-def carregar_dados():
-    df = pd.read_csv('Bike_rent.csv')  # Substituir pelo caminho real
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    return df
+def carregar_agregado(versao_base):
+    return pipeline_bike_horario.ler_agregado()
+
+# Linhas por hora só dos anos escolhidos (partições) e das linhas que passam nos filtros,
+# com as colunas pedidas; compartilhadas, não alterar
+@st.cache_resource(max_entries=8)
+def carregar_dados(versao_base, filtros, colunas=None):
+    return pipeline_bike_horario.ler_detalhe(colunas=colunas, filtros=filtros)
 
-dados = carregar_dados()
+agregado = carregar_agregado(versao_base)
 
 def formata_numero(valor):
     return f'{valor:,.0f}'.replace(',', '.')
@@ -20,26 +39,36 @@ st.title('DASHBOARD DE ALUGUEL DE BICICLETAS 🚴‍♂️')
 
 # Filtros
 st.sidebar.title('Filtros')
-clima = st.sidebar.multiselect('Condições Climáticas', dados['weather'].unique(), default=dados['weather'].unique())
-usuario = st.sidebar.multiselect('Tipo de Usuário', dados['user_type'].unique(), default=dados['user_type'].unique())
+anos = st.sidebar.multiselect('Ano', sorted(agregado['ano'].unique()), default=sorted(agregado['ano'].unique()))
+clima = st.sidebar.multiselect('Condições Climáticas', agregado['weather'].unique(), default=agregado['weather'].unique())
+usuario = st.sidebar.multiselect('Tipo de Usuário', agregado['user_type'].unique(), default=agregado['user_type'].unique())
 intervalo_horas = st.sidebar.slider('Horário do Dia', 0, 23, (0, 23))
 
-dados_filtrados = dados[
-    (dados['weather'].isin(clima)) &
-    (dados['user_type'].isin(usuario)) &
-    (dados['hour'].between(intervalo_horas[0], intervalo_horas[1]))
+# Os filtros vão para a leitura do Parquet: 'ano' escolhe as pastas, os outros descartam linhas na leitura
+filtros = [('ano', 'in', [int(ano) for ano in anos]), ('weather', 'in', list(clima)), ('user_type', 'in', list(usuario)),
+           ('hour', '>=', intervalo_horas[0]), ('hour', '<=', intervalo_horas[1])]
+dados_filtrados = carregar_dados(versao_base, filtros, ['temp', 'count'])
+
+agregado_filtrado = agregado[
+    (agregado['ano'].isin(anos)) &
+    (agregado['weather'].isin(clima)) &
+    (agregado['user_type'].isin(usuario)) &
+    (agregado['hour'].between(intervalo_horas[0], intervalo_horas[1]))
 ]
 
 # Métricas
-st.metric('Total de Aluguéis', formata_numero(dados_filtrados['count'].sum()))
+st.metric('Total de Aluguéis', formata_numero(agregado_filtrado['count'].sum()))
 
-# Gráficos
-fig_alugueis_horario = px.line(dados_filtrados.groupby('hour')['count'].sum().reset_index(), 
+# Gráficos (totais por hora e por dia da semana saem da tabela pré-agregada)
+fig_alugueis_horario = px.line(agregado_filtrado.groupby('hour')['count'].sum().reset_index(), 
                                x='hour', y='count', markers=True, title='Aluguéis por Hora')
 
-fig_temp_impacto = px.scatter(dados_filtrados, x='temp', y='count', title='Impacto da Temperatura nos Aluguéis', trendline='ols')
+# Uma linha por hora e tipo de usuário: acima do limite vira mapa de densidade; a reta
+# de tendência (np.polyfit) é calculada uma vez por estado dos filtros
+fig_temp_impacto = dispersao(dados_filtrados, 'temp', 'count', (versao_base, tuple(anos), tuple(clima), tuple(usuario), intervalo_horas),
+                             titulo='Impacto da Temperatura nos Aluguéis', tendencia=True)
 
-fig_alugueis_semana = px.bar(dados_filtrados.groupby('weekday')['count'].sum().reset_index(), 
+fig_alugueis_semana = px.bar(agregado_filtrado.groupby('weekday')['count'].sum().reset_index(), 
                               x='weekday', y='count', title='Aluguéis por Dia da Semana')
 
 # Layout
@@ -48,9 +77,9 @@ st.plotly_chart(fig_temp_impacto, use_container_width=True)
 st.plotly_chart(fig_alugueis_semana, use_container_width=True)
 
 # Baixar dados filtrados
-@st.cache_data
-def convert_df(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-csv = convert_df(dados_filtrados)
+# O CSV (com todas as colunas) é lido e gerado só quando o usuário clica, e fica guardado pela versão da base e pelos filtros
+csv = preparar_download(lambda: pipeline_bike_horario.ler_detalhe(filtros=filtros), 'csv',
+                        assinatura('test2', versao_base, filtros))
 st.download_button('Baixar Dados Filtrados', csv, 'dados_filtrados.csv', 'text/csv')
+
+perfilador.finalizar()
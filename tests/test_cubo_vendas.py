@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from cubo_vendas import CuboVendas
+
+
+def test_venda_com_vendedor_nulo_fica_nas_outras_tabelas():
+    dados = pd.DataFrame({
+        'Local da compra': pd.Categorical(['SP', 'SP', 'RJ']),
+        'Data da Compra': pd.to_datetime(['2024-01-05', '2024-01-20', '2024-02-03']),
+        'Categoria do Produto': pd.Categorical(['livros', 'livros', 'brinquedos']),
+        'Vendedor': pd.Categorical(['Ana', None, 'Bruno']),
+        'Preço': [10.0, 20.0, 5.0],
+        'Frete': [1.0, 2.0, 0.5],
+        'lat': [-23.5, -23.5, -22.9],
+        'lon': [-46.6, -46.6, -43.2],
+    })
+    cubo = CuboVendas.construir(dados)
+
+    # A venda sem vendedor conta por categoria e por estado, mas não na tabela de vendedores
+    assert cubo.receita_categorias()['Preço'].to_dict() == {'livros': 30.0, 'brinquedos': 5.0}
+    assert cubo.receita_estados().set_index('Local da compra')['Preço'].to_dict() == {'SP': 30.0, 'RJ': 5.0}
+    assert cubo.vendedores()['sum'].to_dict() == {'Ana': 10.0, 'Bruno': 5.0}
+    assert np.isclose(cubo.receita_total(), 35.0)
@@ -0,0 +1,24 @@
+import numpy as np
+
+import gerador_sintetico
+
+
+def test_bike_horario_mais_de_dez_milhoes_de_linhas():
+    # Bloco a bloco: nada de OverflowError nas datas nem 'yr' negativo depois do fim do calendário
+    linhas = 10 ** 7 + 1
+    fim_calendario = gerador_sintetico.INICIO_BIKE + np.timedelta64(gerador_sintetico.DIAS_BIKE, 'D')
+    total = 0
+    for bloco in gerador_sintetico.blocos('bike_horario', linhas):
+        assert bloco['yr'].between(0, gerador_sintetico.ANOS_BIKE - 1).all()
+        assert (bloco['dteday'] >= gerador_sintetico.INICIO_BIKE).all() and (bloco['dteday'] < fim_calendario).all()
+        total += len(bloco)
+    assert total == linhas
+    assert bloco['instant'].iloc[-1] == linhas
+
+
+def test_bike_diario_depois_do_fim_do_calendario():
+    rng = np.random.default_rng(0)
+    inicio = 10 ** 8 - 10
+    bloco = gerador_sintetico.GERADORES['bike_diario'](rng, inicio, inicio + 10)
+    assert bloco['yr'].between(0, gerador_sintetico.ANOS_BIKE - 1).all()
+    assert bloco['instant'].tolist() == list(range(inicio + 1, inicio + 11))
@@ -0,0 +1,49 @@
+import functools
+import hashlib
+import threading
+import weakref
+
+import pandas as pd
+
+_AUSENTE = object()
+
+
+def por_dataframe(construir):
+    """Decorador que guarda um resultado por DataFrame.
+
+    O carregador devolve o mesmo objeto enquanto os dados não mudam, então a
+    identidade do DataFrame serve de versão. A entrada sai do cache quando o
+    DataFrame é coletado, por isso o resultado guardado só pode apontar para
+    ele com weakref.ref (uma referência forte o manteria vivo para sempre).
+    """
+    resultados = {}
+    trava = threading.Lock()
+
+    @functools.wraps(construir)
+    def obter(dados):
+        chave = id(dados)
+        with trava:
+            resultado = resultados.get(chave, _AUSENTE)
+        if resultado is _AUSENTE:
+            resultado = construir(dados)
+            with trava:
+                if chave in resultados:
+                    return resultados[chave]
+                resultados[chave] = resultado
+                weakref.finalize(dados, resultados.pop, chave, None)
+        return resultado
+
+    return obter
+
+
+@por_dataframe
+def versao(dados):
+    """Hash do conteúdo do DataFrame (colunas, tipos, índice e valores), calculado uma vez por DataFrame.
+
+    Serve de versão dos dados nas chaves de cache que passam de uma carga para
+    outra (exportações, páginas da tabela): ao contrário do id(), não se repete
+    quando os dados mudam.
+    """
+    resumo = hashlib.sha1(repr([(str(coluna), str(tipo)) for coluna, tipo in dados.dtypes.items()]).encode('utf-8'))
+    resumo.update(pd.util.hash_pandas_object(dados, index=True).to_numpy().tobytes())
+    return resumo.hexdigest()